@@ -0,0 +1,336 @@
+"""异步渲染后端（Playwright）
+
+Selenium的get_page_content是阻塞的：等待网络时整个浏览器线程空闲。该后端在一个
+后台事件循环中使用异步Playwright，同时保持多个页面加载，通过与多标签页后端相同的
+render(url) 接口提供给抓取线程，链接提取和保存流程不变。
+
+页面的其余流程（预检、下载资源、保存）仍是同步的，每个抓取线程一次处理一个页面并
+阻塞等待渲染结果，因此同时加载的页面数等于抓取线程数（render_workers）。等待中的
+抓取线程只占用很少的资源，需要更多页面同时加载时直接增大render_workers，浏览器仍只有一个。
+
+与Selenium后端一致，没有保存的cookies时启动后先访问一次预热页面，接受cookies提示后
+把浏览器的cookies同步给下载会话。
+
+抓取线程最多按页面剩余的时间预算等待渲染结果，超时后取消该页面的协程（关闭其标签页），
+页面由抓取线程重新加入抓取队列。
+
+需要安装 playwright 并下载浏览器:
+    pip install playwright && playwright install chromium
+
+基准测试（离线镜像，比较Selenium与异步Playwright）:
+    python huawei_doc_async_render.py bench huawei_docs_full --concurrency 16 --selenium-workers 4
+"""
+import argparse
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from huawei_doc_engine import (CONSENT_XPATH, CONTENT_SELECTOR, ERROR_PAGE, ERROR_SELECTOR, ERROR_TITLE_KEYWORDS,
+                               PROFILES, CrawlEngine)
+
+logger = logging.getLogger("huawei_scraper")
+
+# 页面导航和等待正文的超时（毫秒），与Selenium后端一致
+NAVIGATION_TIMEOUT = 30000
+CONTENT_TIMEOUT = 10000
+# 启动和关闭浏览器、访问预热页面的超时（秒）
+LAUNCH_TIMEOUT = 60
+# 预热页面加载后的等待（秒），与Selenium后端一致
+WARMUP_WAIT = 5
+
+
+def playwright_cookie(cookie):
+    """Selenium格式的cookie转换为Playwright格式"""
+    result = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "domain": cookie.get("domain", ""),
+        "path": cookie.get("path", "/"),
+        "secure": cookie.get("secure", False),
+        "httpOnly": cookie.get("httpOnly", False),
+    }
+    if cookie.get("expiry"):
+        result["expires"] = cookie["expiry"]
+    return result
+
+
+def selenium_cookie(cookie):
+    """Playwright格式的cookie转换为Selenium格式"""
+    result = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "domain": cookie.get("domain", ""),
+        "path": cookie.get("path", "/"),
+        "secure": cookie.get("secure", False),
+        "httpOnly": cookie.get("httpOnly", False),
+    }
+    if cookie.get("expires", -1) > 0:
+        result["expiry"] = int(cookie["expires"])
+    return result
+
+
+class PlaywrightRenderer:
+    """在后台事件循环中用异步Playwright渲染页面，最多同时加载concurrency个页面"""
+
+    def __init__(self, engine, concurrency):
+        self.engine = engine
+        self.concurrency = concurrency
+        self.loop = asyncio.new_event_loop()
+        self.thread = None
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.semaphore = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.rendered = 0
+        self.failed = 0
+        self.timeouts = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self.loop.run_forever, name="playwright-loop", daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.launch(), self.loop).result(timeout=LAUNCH_TIMEOUT)
+        try:
+            asyncio.run_coroutine_threadsafe(self.establish_session(), self.loop).result(timeout=LAUNCH_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"访问预热页面失败: {e}")
+        logger.info(f"异步渲染: 1 个浏览器，最多同时加载 {self.concurrency} 个页面")
+
+    async def launch(self):
+        from playwright.async_api import async_playwright
+
+        profile = self.engine.profile
+        headers = profile["headers"]
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(
+            headless=True, args=["--no-sandbox", "--disable-dev-shm-usage"])
+        self.context = await self.browser.new_context(
+            user_agent=headers["User-Agent"],
+            extra_http_headers={key: value for key, value in headers.items() if key.lower() != "user-agent"},
+            viewport={"width": 1920, "height": 1080},
+            ignore_https_errors=True,
+        )
+        if profile["block_images"]:
+            await self.context.route("**/*", lambda route: route.abort() if route.request.resource_type == "image"
+                                     else route.continue_())
+        # 与Selenium浏览器和下载会话共享cookies
+        cookies = [playwright_cookie(cookie) for cookie in self.engine.session_state.cookies.values()]
+        if cookies:
+            await self.context.add_cookies(cookies)
+
+    async def establish_session(self):
+        """与Selenium后端的establish_session一致：没有可用的cookies时访问一次预热页面并接受cookies提示"""
+        state = self.engine.session_state
+        warmup_url = self.engine.profile["warmup_url"]
+        if state.ready or not warmup_url:
+            return
+        logger.info(f"访问预热页面: {warmup_url}")
+        page = await self.context.new_page()
+        try:
+            await page.goto(warmup_url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT)
+            await self.pause(WARMUP_WAIT)
+            await self.accept_consent(page)
+            await self.sync_session_state()
+        finally:
+            await page.close()
+
+    async def accept_consent(self, page):
+        """接受cookies提示之前在每个页面上查找"接受"按钮，返回是否点击了按钮"""
+        state = self.engine.session_state
+        if not self.engine.profile["consent_click"] or state.consent:
+            return False
+        try:
+            for button in await page.query_selector_all(f"xpath={CONSENT_XPATH}"):
+                if await button.is_visible():
+                    await button.click()
+                    await self.pause(1)
+                    state.mark_consent()
+                    return True
+        except Exception:
+            pass
+        return False
+
+    async def sync_session_state(self):
+        """从浏览器读取cookies，同步给requests会话并保存"""
+        engine = self.engine
+        cookies = [selenium_cookie(cookie) for cookie in await self.context.cookies()]
+        with engine.state_lock:
+            engine.session_state.merge(cookies)
+            if engine.session is not None:
+                engine.session_state.apply_session(engine.session)
+            engine.session_state.save()
+        logger.info(f"已同步浏览器的 {len(cookies)} 个cookies到下载会话")
+
+    def wait_timeout(self):
+        """抓取线程等待渲染结果的时间：页面剩余的时间预算，没有时限时按导航超时和重试次数计算"""
+        remaining = self.engine.watchdog.remaining()
+        if remaining == float('inf'):
+            remaining = (NAVIGATION_TIMEOUT + CONTENT_TIMEOUT) / 1000 * (self.engine.profile["render_retries"] + 1) + 30
+        return max(1, remaining)
+
+    def render(self, url):
+        """渲染页面并返回HTML，错误页面返回ERROR_PAGE，失败时返回None（可以被多个抓取线程同时调用）"""
+        future = asyncio.run_coroutine_threadsafe(self.fetch(url), self.loop)
+        try:
+            return future.result(timeout=self.wait_timeout())
+        except FutureTimeoutError:
+            # 取消协程（关闭页面、释放并发名额），由抓取线程重新排队
+            future.cancel()
+            self.timeouts += 1
+            logger.error(f"等待渲染超时，取消页面: {url}")
+            self.engine.watchdog.interrupt()
+            return None
+
+    async def pause(self, seconds):
+        self.engine.profiler.record_sleep(seconds)
+        await asyncio.sleep(seconds)
+
+    async def fetch(self, url):
+        async with self.semaphore:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                html_content = await self.fetch_page(url)
+            finally:
+                self.in_flight -= 1
+        if not html_content:
+            self.failed += 1
+        else:
+            self.rendered += 1
+        return html_content
+
+    async def fetch_page(self, url):
+        retry = self.engine.profile["render_retries"]
+        for attempt in range(retry + 1):
+            page = await self.context.new_page()
+            try:
+                logger.info(f"正在加载页面 (尝试 {attempt+1}/{retry+1}): {url}")
+                self.engine.mark_first_request()
+                await page.goto(url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT)
+                try:
+                    await page.wait_for_selector(CONTENT_SELECTOR, timeout=CONTENT_TIMEOUT)
+                except Exception:
+                    logger.debug(f"在页面 {url} 上未找到预期的内容元素，使用整个页面")
+
+                title = (await page.title() or "").lower()
+                if any(keyword in title for keyword in ERROR_TITLE_KEYWORDS) or await page.query_selector(ERROR_SELECTOR):
+                    logger.warning(f"页面 {url} 被识别为错误页面，跳过")
+                    return ERROR_PAGE
+                if await self.accept_consent(page):
+                    await self.sync_session_state()
+
+                # 滚动页面以加载懒加载资源
+                await page.evaluate("window.scrollTo(0, document.body.scrollHeight/2)")
+                await self.pause(1)
+                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                await self.pause(1)
+
+                html_content = await page.content()
+                if html_content and len(html_content) > 1000:
+                    return html_content
+                logger.warning(f"页面内容为空或太小 ({len(html_content) if html_content else 0} 字节)")
+            except Exception as e:
+                if attempt < retry:
+                    wait_time = (attempt + 1) * 2
+                    logger.warning(f"尝试 {attempt+1} 失败: {e}，等待 {wait_time} 秒后重试...")
+                    await self.pause(wait_time)
+                else:
+                    logger.error(f"获取页面失败: {url}，错误: {e}")
+            finally:
+                await page.close()
+        return None
+
+    async def shutdown(self):
+        if self.context is not None:
+            # 页面可能更新了cookies，写回会话状态
+            try:
+                self.engine.session_state.merge([selenium_cookie(cookie) for cookie in await self.context.cookies()])
+            except Exception as e:
+                logger.warning(f"读取Playwright cookies失败: {e}")
+            await self.context.close()
+        if self.browser is not None:
+            await self.browser.close()
+        if self.playwright is not None:
+            await self.playwright.stop()
+
+    def close(self):
+        if self.thread is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result(timeout=30)
+        except Exception as e:
+            logger.warning(f"关闭Playwright失败: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+    def report(self):
+        logger.info(f"异步渲染: {self.rendered} 个页面，失败 {self.failed} 个，超时取消 {self.timeouts} 个，"
+                    f"同时加载的页面数峰值 {self.peak_in_flight}")
+
+
+def bench(mirror_dir, concurrency, selenium_workers, pages):
+    """在离线镜像上比较Selenium（每个线程一个浏览器）与异步Playwright的吞吐"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from huawei_doc_transport import serve_directory
+
+    files = []
+    for root, _, names in os.walk(mirror_dir):
+        for name in names:
+            if name.endswith('.html'):
+                files.append(os.path.relpath(os.path.join(root, name), mirror_dir).replace(os.sep, '/'))
+    if not files:
+        raise SystemExit(f"镜像目录中没有页面: {mirror_dir}")
+    server, base = serve_directory(mirror_dir)
+    urls = [f"{base}/{files[i % len(files)]}" for i in range(pages)]
+    profile = dict(PROFILES["full"], output_dir=os.path.join(mirror_dir, "_bench"), warmup_url=None,
+                   request_delay=(0, 0))
+    results = []
+    try:
+        engine = CrawlEngine(profile)
+        drivers = [engine.init_driver() for _ in range(selenium_workers)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=selenium_workers) as executor:
+            rendered = list(executor.map(
+                lambda item: engine.get_page_content(item[1], drivers[item[0] % selenium_workers]), enumerate(urls)))
+        results.append((f"Selenium ({selenium_workers} 个浏览器)", time.perf_counter() - start, rendered))
+        for driver in drivers:
+            driver.quit()
+
+        engine = CrawlEngine(profile)
+        renderer = PlaywrightRenderer(engine, concurrency)
+        renderer.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            rendered = list(executor.map(renderer.render, urls))
+        results.append((f"异步Playwright (同时加载 {concurrency} 个页面)", time.perf_counter() - start, rendered))
+        renderer.close()
+    finally:
+        server.shutdown()
+
+    for name, seconds, rendered in results:
+        ok = sum(1 for html_content in rendered if html_content)
+        logger.info(f"{name}: {pages} 个页面（成功 {ok} 个），耗时 {seconds:.1f} 秒，{pages / seconds:.2f} 页/秒")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="异步渲染后端工具")
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('mirror_dir', help="离线镜像目录（爬虫的输出目录）")
+    parser.add_argument('--concurrency', type=int, default=16, help="异步后端同时加载的页面数")
+    parser.add_argument('--selenium-workers', type=int, default=4, help="Selenium浏览器数量")
+    parser.add_argument('--pages', type=int, default=100, help="渲染的页面数")
+    args = parser.parse_args()
+
+    bench(args.mirror_dir, args.concurrency, args.selenium_workers, args.pages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""解析与改写热点函数的微基准测试
+
+测试页面处理中的CPU密集函数（不涉及网络和浏览器）:
+process_html_resources、get_safe_filename、get_directory_path、should_process_url、
+is_api_reference_url、extract_page_title，以及process_page使用的链接提取（解析 + extract_links）。
+
+测试页面默认使用按官方文档页面结构生成的大页面（导航树、参数表格、代码块、图片），
+也可以用 --pages 指定爬虫的输出目录，使用其中最大的若干个已保存页面。
+
+每个用例报告每秒操作数（多轮取最好的一轮）和单次调用的峰值内存分配（tracemalloc）。
+结果可以追加到历史文件（JSONL）中跟踪变化，并与基线比较，性能下降超过阈值时
+以非零状态退出，可在CI中使用:
+    python huawei_doc_bench.py run --save-baseline bench_baseline.json
+    python huawei_doc_bench.py run --baseline bench_baseline.json --history bench_history.jsonl
+
+仓库中的 bench_baseline.json 是生成页面上的基线，make bench 与它比较。判定阈值:
+- 每秒操作数下降超过30%（--threshold）：专用机器上重复运行的波动约为20%，
+  更小的阈值会误报；
+- 峰值内存增加超过10%（--memory-threshold）：内存分配几乎没有波动，阈值可以更严。
+每秒操作数与机器有关，换了运行比较的机器后先用 make bench-baseline 重新生成基线。
+共享的单核虚拟机上每秒操作数的波动可能超过一倍，这时只有内存比较可靠，
+可以用 make bench BENCH_THRESHOLD=1 只比较内存。
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from huawei_doc_engine import (
+    ARENGINE_INCLUDE,
+    DEFAULT_EXCLUDE,
+    extract_links,
+    extract_page_title,
+    get_directory_path,
+    get_safe_filename,
+    is_api_reference_url,
+    process_html_resources,
+    should_process_url,
+)
+
+logger = logging.getLogger("huawei_scraper")
+
+BENCH_DOC_ROOT = "https://developer.huawei.com/consumer/cn/doc/harmonyos-references/"
+# 每轮的最短测量时间（秒）和轮数
+MIN_ROUND_SECONDS = 0.2
+DEFAULT_ROUNDS = 5
+# 测量内存分配的调用次数
+ALLOC_CALLS = 5
+# 每秒操作数下降、峰值内存增加超过该比例时视为性能退化（依据见模块说明）
+DEFAULT_THRESHOLD = 0.3
+DEFAULT_MEMORY_THRESHOLD = 0.1
+# 使用已保存页面时最多读取的页面数
+MAX_FIXTURE_PAGES = 5
+
+
+def synthetic_page(index, sections=40, links=600):
+    """生成与文档页面结构相近的大页面（约数百KB）"""
+    nav = ''.join(f'<li><a href="/consumer/cn/doc/harmonyos-references/api-{index}-{i}">接口 {i}</a></li>'
+                  for i in range(links))
+    head_assets = ''.join(f'<link rel="stylesheet" href="/static/css/theme-{i}.css?v=1.{i}">'
+                          f'<script src="//res.vmallres.com/doc/js/chunk-{i}.js"></script>' for i in range(20))
+    body = []
+    for s in range(sections):
+        rows = ''.join(f'<tr><td>param{r}</td><td>string</td><td>是</td><td>参数 {r} 的说明，取值范围见下文。</td></tr>'
+                       for r in range(12))
+        body.append(
+            f'<h2 id="section-{s}">方法 {s}</h2>'
+            f'<p style="background:url(/static/img/bg-{s % 4}.png)">接口说明与使用约束。'
+            f'<a href="/consumer/en/doc/harmonyos-guides/guide-{s}">开发指南</a>'
+            f'<a href="#section-{s + 1}">下一节</a></p>'
+            f'<table><thead><tr><th>参数名</th><th>类型</th><th>必填</th><th>说明</th></tr></thead>'
+            f'<tbody>{rows}</tbody></table>'
+            f'<pre><code>import {{ api{s} }} from "@kit.ArkUI";\nlet result = api{s}.call("demo");</code></pre>'
+            f'<img src="/static/img/figure-{s}.png" srcset="/static/img/figure-{s}@2x.png 2x" alt="示意图">'
+        )
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>接口 {index} - 华为开发者联盟</title>'
+            f'{head_assets}</head><body><nav><ul>{nav}</ul></nav><main><h1>接口 {index}</h1>'
+            f'{"".join(body)}</main></body></html>')
+
+
+def load_pages(pages_dir, limit=MAX_FIXTURE_PAGES):
+    """读取输出目录中最大的若干个已保存页面，返回 [(页面URL, HTML)]"""
+    files = []
+    for root, _, names in os.walk(pages_dir):
+        if os.path.basename(root) == "resources":
+            continue
+        for name in names:
+            if name.endswith('.html'):
+                path = os.path.join(root, name)
+                files.append((os.path.getsize(path), path))
+    pages = []
+    for _, path in sorted(files, reverse=True)[:limit]:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            rel_path = os.path.relpath(path, pages_dir).replace(os.sep, '/')
+            pages.append((BENCH_DOC_ROOT + rel_path[:-len('.html')], f.read()))
+    return pages
+
+
+def build_cases(pages):
+    """基准用例 {名称: (函数, 参数列表)}，每次操作对参数列表中的所有参数各调用一次"""
+    from bs4 import BeautifulSoup
+
+    options = {'link_scope': None, 'include': ARENGINE_INCLUDE, 'exclude': DEFAULT_EXCLUDE}
+    urls = []
+    for url, html in pages:
+        urls.append(url)
+        urls.extend(link for link, _ in extract_links(BeautifulSoup(html, 'html.parser'), url, options))
+    urls = urls[:1000]
+
+    def link_extraction(page):
+        url, html = page
+        return extract_links(BeautifulSoup(html.encode('utf-8'), 'html.parser'), url, options)
+
+    return {
+        'process_html_resources': (lambda page: process_html_resources(page[1], page[0]), pages),
+        'extract_page_title': (extract_page_title, [html for _, html in pages]),
+        'extract_links': (link_extraction, pages),
+        'get_safe_filename': (get_safe_filename, urls),
+        'get_directory_path': (lambda url: get_directory_path(url, "huawei_docs_full"), urls),
+        'should_process_url': (should_process_url, urls),
+        'is_api_reference_url': (is_api_reference_url, urls),
+    }
+
+
+def measure_speed(func, args, rounds=DEFAULT_ROUNDS, min_seconds=MIN_ROUND_SECONDS):
+    """返回每秒操作数（每次操作对所有参数各调用一次，取最好的一轮）"""
+    def run(loops):
+        start = time.perf_counter()
+        for _ in range(loops):
+            for arg in args:
+                func(arg)
+        return time.perf_counter() - start
+
+    # 确定每轮的循环次数，使每轮耗时不少于min_seconds
+    loops = 1
+    while True:
+        elapsed = run(loops)
+        if elapsed >= min_seconds:
+            break
+        loops = max(loops * 2, int(loops * min_seconds / max(elapsed, 1e-9)))
+    best = min([elapsed] + [run(loops) for _ in range(rounds - 1)])
+    return loops / best
+
+
+def measure_allocations(func, args, calls=ALLOC_CALLS):
+    """返回单次操作的峰值内存分配（字节，多次调用的中位数）"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            for arg in args:
+                func(arg)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return sorted(peaks)[len(peaks) // 2]
+
+
+def run_benchmarks(pages, rounds=DEFAULT_ROUNDS, only=None):
+    """运行所有用例，返回 {名称: {"ops": 每秒操作数, "peak_bytes": 峰值内存分配}}"""
+    results = {}
+    for name, (func, args) in build_cases(pages).items():
+        if only and name not in only:
+            continue
+        ops = measure_speed(func, args, rounds)
+        peak = measure_allocations(func, args)
+        results[name] = {"ops": ops, "peak_bytes": peak}
+        logger.info(f"{name:24s} {ops:12,.1f} 次/秒  峰值内存 {peak / 1024:10,.1f} KB  ({len(args)} 个输入/次)")
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, memory_threshold=DEFAULT_MEMORY_THRESHOLD):
+    """与基线比较，返回性能退化的描述列表"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["ops"] < base["ops"] * (1 - threshold):
+            regressions.append(f"{name}: {base['ops']:,.1f} -> {result['ops']:,.1f} 次/秒 "
+                               f"({result['ops'] / base['ops'] - 1:+.0%})")
+        if base["peak_bytes"] and result["peak_bytes"] > base["peak_bytes"] * (1 + memory_threshold):
+            regressions.append(f"{name}: 峰值内存 {base['peak_bytes'] / 1024:,.1f} -> "
+                               f"{result['peak_bytes'] / 1024:,.1f} KB "
+                               f"({result['peak_bytes'] / base['peak_bytes'] - 1:+.0%})")
+    return regressions
+
+
+def record(results, fixture):
+    return {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "fixture": fixture,
+        "results": results,
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="解析与改写热点函数的微基准测试")
+    parser.add_argument('command', choices=['run'])
+    parser.add_argument('--pages', help="使用该输出目录中已保存的页面，默认使用生成的页面")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help="每个用例的测量轮数")
+    parser.add_argument('--only', nargs='+', help="只运行这些用例")
+    parser.add_argument('--baseline', help="与该基线文件比较，性能退化时以状态1退出")
+    parser.add_argument('--save-baseline', help="将本次结果保存为基线文件")
+    parser.add_argument('--history', help="将本次结果追加到该历史文件（JSONL）")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="每秒操作数下降超过该比例时判定为性能退化，默认0.3（30%%）")
+    parser.add_argument('--memory-threshold', type=float, default=DEFAULT_MEMORY_THRESHOLD,
+                        help="峰值内存增加超过该比例时判定为性能退化，默认0.1（10%%）")
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = load_pages(args.pages)
+        if not pages:
+            raise SystemExit(f"目录中没有已保存的页面: {args.pages}")
+        fixture = os.path.abspath(args.pages)
+    else:
+        pages = [(f"{BENCH_DOC_ROOT}api-{i}", synthetic_page(i)) for i in range(3)]
+        fixture = "synthetic"
+    logger.info(f"测试页面: {len(pages)} 个，共 {sum(len(html) for _, html in pages) / 1024:,.0f} KB")
+
+    results = run_benchmarks(pages, args.rounds, args.only)
+    entry = record(results, fixture)
+
+    if args.history:
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+        logger.info(f"已保存基线: {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("fixture") != fixture:
+            logger.warning(f"基线使用的测试页面不同（{baseline.get('fixture')}），结果可能不可比")
+        regressions = compare(results, baseline["results"], args.threshold, args.memory_threshold)
+        for regression in regressions:
+            logger.error(f"性能退化: {regression}")
+        if regressions:
+            sys.exit(1)
+        logger.info(f"与基线相比没有超过阈值的性能退化（速度 {args.threshold:.0%}，内存 {args.memory_threshold:.0%}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""按域名和文档栏目的熔断器
+
+站点或CDN开始报错、限流时，每个页面和资源仍会走完整的重试流程（urllib3的重试加上
+爬虫自己的重试），浪费大量时间。熔断器按键（"host:<域名>" 和 "section:<栏目>"）统计
+最近的请求结果，错误率超过阈值后熔断（open）。所有栏目共用同一个域名，因此域名只统计
+传输层错误（网络错误、429、5xx），页面内容和渲染错误只计入栏目:
+- 调度器暂停分配该域名或栏目的页面（其他栏目继续抓取），该域名的资源直接跳过并进入重试队列；
+- 冷却时间过后进入半开（half_open）状态，只放行一个探测请求；
+- 探测成功则恢复（closed），失败则再次熔断，冷却时间加倍（有上限）。
+
+状态变化写入日志，抓取结束时汇总各键的熔断次数、熔断时长和被拒绝的请求数。
+"""
+import logging
+import threading
+import time
+from collections import Counter, deque
+from urllib.parse import urlparse
+
+logger = logging.getLogger("huawei_scraper")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 统计错误率的最近请求数，以及判断是否熔断所需的最少请求数
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 8
+# 冷却时间的上限（秒）
+MAX_COOLDOWN = 900
+
+
+class CircuitOpenError(Exception):
+    """请求的域名或栏目处于熔断状态"""
+
+
+def host_key(url):
+    return f"host:{urlparse(url).netloc}"
+
+
+def section_key(section):
+    return f"section:{section}"
+
+
+def page_keys(url, section):
+    """页面请求对应的熔断键"""
+    return [host_key(url), section_key(section)]
+
+
+class CircuitBreaker:
+    """单个键的熔断器"""
+
+    def __init__(self, key, error_rate, cooldown):
+        self.key = key
+        self.error_rate = error_rate
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.results = deque(maxlen=BREAKER_WINDOW)
+        self.opened_at = 0.0
+        self.probe_at = None
+        self.open_seconds = 0.0
+        self.opens = 0
+        self.rejected = 0
+        self.transitions = Counter()
+
+    def ready(self, now):
+        """是否可以放行请求（熔断中的键冷却结束后可以放行探测请求）"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return now >= self.opened_at + self.cooldown
+        # 探测请求没有返回结果（例如页面被跳过）时，超过冷却时间后允许新的探测
+        return self.probe_at is None or now >= self.probe_at + self.cooldown
+
+    def acquire(self, now):
+        """请求放行，返回是否允许；冷却结束后转为半开并放行一个探测请求"""
+        if self.state == CLOSED:
+            return True
+        if not self.ready(now):
+            self.rejected += 1
+            return False
+        if self.state == OPEN:
+            self.transition(HALF_OPEN, now)
+        self.probe_at = now
+        return True
+
+    def record(self, ok, now):
+        if self.state == HALF_OPEN:
+            if ok:
+                self.results.clear()
+                self.cooldown = self.base_cooldown
+                self.transition(CLOSED, now)
+            else:
+                self.cooldown = min(self.cooldown * 2, MAX_COOLDOWN)
+                self.transition(OPEN, now)
+            return
+        if self.state == OPEN:
+            return
+        self.results.append(ok)
+        failures = self.results.count(False)
+        if len(self.results) >= BREAKER_MIN_CALLS and failures / len(self.results) >= self.error_rate:
+            self.transition(OPEN, now)
+
+    def transition(self, state, now):
+        previous = self.state
+        if previous == HALF_OPEN:
+            self.open_seconds += now - self.opened_at
+        if state == OPEN:
+            self.opened_at = now
+            self.opens += 1
+            self.probe_at = None
+        self.state = state
+        self.transitions[f"{previous}->{state}"] += 1
+        if state == OPEN:
+            failures = self.results.count(False)
+            logger.warning(f"熔断器 {self.key}: {previous} -> {state}，最近 {len(self.results)} 次请求失败 {failures} 次，"
+                           f"{self.cooldown:.0f} 秒后探测")
+        else:
+            logger.info(f"熔断器 {self.key}: {previous} -> {state}")
+
+
+class BreakerBoard:
+    """所有键的熔断器（线程安全）"""
+
+    def __init__(self, error_rate, cooldown, enabled=True):
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.breakers = {}
+
+    def breaker(self, key):
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers[key] = CircuitBreaker(key, self.error_rate, self.cooldown)
+        return breaker
+
+    def acquire(self, keys):
+        """请求放行一组键，返回阻止请求的键，全部放行时返回None"""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self.lock:
+            for key in keys:
+                breaker = self.breaker(key)
+                if not breaker.ready(now):
+                    breaker.rejected += 1
+                    return key
+            for key in keys:
+                self.breaker(key).acquire(now)
+        return None
+
+    def ready(self, key):
+        """键是否可以放行请求（不改变状态，调度器用于恢复暂停的URL）"""
+        if not self.enabled:
+            return True
+        with self.lock:
+            breaker = self.breakers.get(key)
+            return breaker is None or breaker.ready(time.monotonic())
+
+    def is_open(self, keys):
+        """是否有键处于熔断状态（用于中止重试）"""
+        if not self.enabled:
+            return False
+        with self.lock:
+            return any(key in self.breakers and self.breakers[key].state == OPEN for key in keys)
+
+    def record(self, keys, ok):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self.lock:
+            for key in keys:
+                self.breaker(key).record(ok, now)
+
+    def record_probe(self, keys, ok):
+        """只为处于半开状态的键记录结果（探测请求的结果没有通过record记录时使用）"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self.lock:
+            for key in keys:
+                breaker = self.breakers.get(key)
+                if breaker is not None and breaker.state == HALF_OPEN:
+                    breaker.record(ok, now)
+
+    def report(self):
+        tripped = [breaker for breaker in self.breakers.values() if breaker.opens]
+        if not tripped:
+            return
+        now = time.monotonic()
+        transitions = sum((breaker.transitions for breaker in tripped), Counter())
+        logger.info(f"熔断器状态变化: {dict(transitions)}")
+        for breaker in sorted(tripped, key=lambda b: -b.opens):
+            open_seconds = breaker.open_seconds + (now - breaker.opened_at if breaker.state != CLOSED else 0.0)
+            logger.info(f"熔断器 {breaker.key}: 熔断 {breaker.opens} 次，共 {open_seconds:.0f} 秒，"
+                        f"拒绝请求 {breaker.rejected} 次，当前状态 {breaker.state}")
@@ -0,0 +1,235 @@
+"""只发现链接的试运行模式
+
+按抓取配置的规则（入口、include/exclude、深度）遍历文档链接图，但不下载资源、
+不保存页面。页面优先用HTTP请求获取静态HTML，静态HTML中没有文档链接时才启动浏览器渲染。
+
+结果保存在 output_dir/_discovery/ 下（不影响正式抓取的输出）:
+- discovery_graph.json.gz: 链接图，节点为 [URL, 深度, 栏目, 是否目标页面, 获取方式]，
+  边为节点下标对；
+- discovery_estimate.json: 各深度、各栏目的页面数，以及正式抓取的耗时估算。
+
+用法:
+    python huawei_doc_scraper_advanced.py --dry-run [--discovery-fetch auto|static|render]
+"""
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from collections import Counter
+
+from huawei_doc_engine import DOWNLOAD_TIMEOUT, CrawlEngine, canonical_url, is_api_reference_url
+from huawei_doc_scheduler import default_section, match_section
+
+logger = logging.getLogger("huawei_scraper")
+
+DISCOVERY_DIRNAME = "_discovery"
+GRAPH_NAME = "discovery_graph.json.gz"
+ESTIMATE_NAME = "discovery_estimate.json"
+
+# 静态HTML中是否包含文档链接
+DOC_LINK_PATTERN = re.compile(r'<a\s[^>]*href=["\'][^"\']*/doc/', re.IGNORECASE)
+
+# 估算时使用的默认值（秒）：未实际渲染过页面时的单页渲染耗时（含滚动等待），单个资源的下载耗时
+ASSUMED_RENDER_SECONDS = 8.0
+ASSUMED_ASSET_SECONDS = 0.9
+
+
+def mean_delay(delay):
+    low, high = delay
+    return (low + high) / 2
+
+
+def profile_localizes(profile):
+    return profile["asset_mode"] == "localize"
+
+
+class DiscoveryEngine(CrawlEngine):
+    """只发现和分类URL的抓取引擎"""
+
+    def __init__(self, profile, fetch='auto'):
+        self.target_profile = profile
+        # 试运行不保存页面：不写变更流、不建链接索引；fetch_page使用每个线程自己的浏览器，
+        # 不启动共享的渲染后端
+        profile = dict(profile, output_dir=os.path.join(profile["output_dir"], DISCOVERY_DIRNAME),
+                       asset_mode="none", preflight=False, storage_mode="full", change_feed=False,
+                       rewrite_links=False, render_backend="driver")
+        super().__init__(profile)
+        self.fetch = fetch
+        # 只计算资源的计划路径（不下载），用于估算资源数量
+        self.cpu_options['localize'] = profile_localizes(self.target_profile)
+        self.local = threading.local()
+        self.nodes = {}
+        self.edges = []
+        self.assets = set()
+        self.render_seconds = []
+
+    def needs_session(self):
+        return True
+
+    def section_of(self, url):
+        section = match_section(url, self.profile["sections"])
+        return section["name"] if section else default_section(url)
+
+    def thread_driver(self):
+        """当前线程的浏览器，第一次需要渲染时才启动"""
+        driver = getattr(self.local, 'driver', None)
+        if driver is None:
+            driver = self.local.driver = self.init_driver()
+        return driver
+
+    def fetch_page(self, url):
+        """返回 (HTML, 获取方式)，优先使用HTTP请求"""
+        if self.fetch != 'render':
+            try:
+                response = self.session.get(url, timeout=DOWNLOAD_TIMEOUT)
+                if response.status_code >= 400:
+                    logger.warning(f"HTTP {response.status_code}: {url}")
+                    return None, 'static'
+                html = response.text
+                if self.fetch == 'static' or DOC_LINK_PATTERN.search(html):
+                    return html, 'static'
+            except Exception as e:
+                if self.fetch == 'static':
+                    logger.warning(f"请求页面失败: {url}，错误: {e}")
+                    return None, 'static'
+        start = time.perf_counter()
+        html = self.get_page_content(url, self.thread_driver())
+        with self.lock:
+            self.render_seconds.append(time.perf_counter() - start)
+        return html, 'render'
+
+    def process_page(self, url, driver, level=0, other=False):
+        """发现单个页面的链接：获取 → 提取链接 → 调度子页面（不下载资源、不保存）"""
+        max_level = self.profile["max_level"]
+        key = canonical_url(url)
+        if key in self.processed_urls or level > max_level:
+            return
+        target = is_api_reference_url(url, self.profile["include"])
+        if level > 0 and not other and not target:
+            return
+        if not self.processed_urls.add(key):
+            return
+        with self.lock:
+            self.processed_log.write(f"{url}\n")
+
+        html, method = self.fetch_page(url)
+        node = {"depth": level, "section": self.section_of(url), "target": target, "fetch": method}
+        with self.lock:
+            self.nodes[url] = node
+        if not html:
+            node["fetch"] = "failed"
+            self.stats['pages_failed'] += 1
+            return
+        self.stats[f'pages_{method}'] += 1
+
+        result = self.run_cpu_stage(html, url)
+        with self.lock:
+            self.assets.update(asset_url for asset_url, *_ in result['assets'])
+        if level >= max_level:
+            return
+
+        target_links = [link for link, is_target in result['links'] if is_target]
+        other_links = []
+        if level == 0:
+            other_links = [link for link, is_target in result['links'] if not is_target]
+            other_links = other_links[:self.profile["other_links_limit"]]
+        with self.lock:
+            self.edges.extend((url, link) for link in target_links + other_links)
+        for next_url in target_links:
+            self.schedule(next_url, level + 1)
+        for next_url in other_links:
+            self.schedule(next_url, level + 1, other=True)
+
+    def worker(self):
+        """发现线程：只有需要渲染时才启动浏览器"""
+        try:
+            while True:
+                item = self.frontier.pop()
+                if item is None:
+                    break
+                url, level, other = item
+                start = time.monotonic()
+                try:
+                    self.process_page(url, None, level, other)
+                except Exception as e:
+                    logger.error(f"处理页面 {url} 时出错: {e}")
+                    traceback.print_exc()
+                finally:
+                    self.frontier.task_done(url, time.monotonic() - start)
+        finally:
+            driver = getattr(self.local, 'driver', None)
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+
+    def estimate(self):
+        """估算按目标配置正式抓取的页面数、资源数和耗时"""
+        profile = self.target_profile
+        pages = sum(1 for node in self.nodes.values() if node["fetch"] != "failed")
+        # 实测的渲染耗时已包含get_page_content中的request_delay（试运行与目标配置的延迟相同）
+        if self.render_seconds:
+            render = sum(self.render_seconds) / len(self.render_seconds)
+        else:
+            render = ASSUMED_RENDER_SECONDS + mean_delay(profile["request_delay"])
+        page_seconds = render + mean_delay(profile["page_delay"])
+        asset_seconds = len(self.assets) * ASSUMED_ASSET_SECONDS if profile_localizes(profile) else 0.0
+        workers = max(1, profile["render_workers"])
+        return {
+            "profile": profile["name"],
+            "pages": pages,
+            "failed_pages": len(self.nodes) - pages,
+            "edges": len(self.edges),
+            "max_depth": max((node["depth"] for node in self.nodes.values()), default=0),
+            "pages_per_depth": dict(sorted(Counter(node["depth"] for node in self.nodes.values()).items())),
+            "pages_per_section": dict(Counter(node["section"] for node in self.nodes.values()).most_common()),
+            "assets": len(self.assets),
+            "seconds_per_page": round(page_seconds, 2),
+            "render_seconds_measured": bool(self.render_seconds),
+            "estimated_seconds": round((pages * page_seconds + asset_seconds) / workers),
+        }
+
+    def save_graph(self, path):
+        """保存链接图：节点按URL排序，边使用节点下标"""
+        urls = sorted(set(self.nodes) | {target for _, target in self.edges})
+        index = {url: i for i, url in enumerate(urls)}
+        nodes = []
+        for url in urls:
+            node = self.nodes.get(url)
+            if node is None:
+                # 超出深度或未抓取到的链接目标
+                nodes.append([url, None, self.section_of(url), None, None])
+            else:
+                nodes.append([url, node["depth"], node["section"], node["target"], node["fetch"]])
+        graph = {"nodes": nodes, "edges": sorted({(index[src], index[dst]) for src, dst in self.edges})}
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(graph, f, ensure_ascii=False, separators=(',', ':'))
+
+    def finish(self):
+        """保存链接图和耗时估算"""
+        self.frontier.report()
+        self.save_graph(os.path.join(self.output_dir, GRAPH_NAME))
+        estimate = self.estimate()
+        with open(os.path.join(self.output_dir, ESTIMATE_NAME), 'w', encoding='utf-8') as f:
+            json.dump(estimate, f, ensure_ascii=False, indent=2)
+        self.processed_log.close()
+        self.watchdog.stop()
+        for url_set in (self.processed_urls, self.scheduled_urls):
+            if hasattr(url_set, 'close'):
+                url_set.close()
+
+        logger.info(f"=== 试运行完成! 发现 {estimate['pages']} 个页面（静态获取 {self.stats['pages_static']} 个，"
+                    f"渲染 {self.stats['pages_render']} 个，失败 {estimate['failed_pages']} 个），"
+                    f"{estimate['edges']} 条链接，最大深度 {estimate['max_depth']} ===")
+        logger.info(f"各深度页面数: {estimate['pages_per_depth']}")
+        logger.info(f"各栏目页面数: {estimate['pages_per_section']}")
+        logger.info(f"正式抓取预计: {estimate['assets']} 个资源，每页约 {estimate['seconds_per_page']} 秒，"
+                    f"共约 {estimate['estimated_seconds'] / 3600:.1f} 小时 "
+                    f"({self.target_profile['render_workers']} 个浏览器)")
+        logger.info(f"链接图和估算已保存到 {self.output_dir}")
+
@@ -0,0 +1,375 @@
+"""分布式抓取
+
+多个抓取节点通过协调器共享待抓取队列，队列按规范URL的哈希分片，
+每个节点只抓取属于自己分片的URL，发现的其他分片的链接转交给对应节点。
+预检发现的重定向目标也登记到协调器，不同分片的URL重定向到同一页面时只抓取一次。
+协调器最后合并各节点的 processed_urls、failed_resources 和输出文件；资源清单和图片映射
+按键合并，URL指纹文件和性能剖析结果是节点本地的状态，不合并。
+
+这里的协调器使用SQLite实现，足以在单机上用多个进程运行和测试。SQLite的WAL模式
+不支持网络文件系统，多台机器部署时需要提供实现相同方法的协调器。
+
+用法:
+    # 单机启动4个节点并在结束后合并
+    python huawei_doc_distributed.py local --crawl-profile full --shards 4
+    # 分别启动单个节点
+    python huawei_doc_distributed.py node --crawl-profile full --shard 0 --shards 4 --coordinator crawl.db
+    # 合并结果
+    python huawei_doc_distributed.py merge --crawl-profile full --coordinator crawl.db
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+
+from huawei_doc_engine import (ASSET_MANIFEST_NAME, PROFILES, CrawlEngine, add_profile_arguments, canonical_url,
+                               configure_logging, content_hash, profile_from_args, url_hash)
+from huawei_doc_failures import FAILURES_NAME
+from huawei_doc_feed import FEED_DIRNAME
+from huawei_doc_images import IMAGE_MAP_NAME
+from huawei_doc_links import LINK_INDEX_NAME, LinkIndex
+from huawei_doc_preflight import PREFLIGHT_NAME
+from huawei_doc_profiler import PROFILE_DIRNAME
+from huawei_doc_scheduler import HISTORY_NAME, PriorityFrontier
+from huawei_doc_session_state import SESSION_STATE_NAME
+
+logger = logging.getLogger("huawei_scraper")
+
+COORDINATOR_NAME = "coordinator.db"
+NODES_DIRNAME = "nodes"
+NODE_STATE_FILES = {'processed_urls.txt', 'failed_resources.txt', FAILURES_NAME, HISTORY_NAME, PREFLIGHT_NAME,
+                    SESSION_STATE_NAME, LINK_INDEX_NAME}
+# URL集合的磁盘指纹文件（.processed_urls.fp 等）
+NODE_STATE_SUFFIXES = ('.fp', '.fp.tmp')
+# 不合并的节点目录：变更流由下游分别读取，性能剖析结果只描述该节点
+NODE_STATE_DIRS = {FEED_DIRNAME, PROFILE_DIRNAME}
+# 按键合并的JSON文件 (resources下的文件名 -> 需要合并的字段，None表示合并整个对象)
+MERGED_JSON_FILES = {ASSET_MANIFEST_NAME: None, IMAGE_MAP_NAME: ("map", "done")}
+
+# 节点领取URL后，超过该时间未完成则视为节点失效，URL重新进入队列
+CLAIM_LEASE = 600
+# 本分片暂无URL时的轮询间隔
+POLL_INTERVAL = 1.0
+
+
+def shard_of(url, num_shards):
+    """URL所属的分片（基于规范URL的稳定哈希）"""
+    return int(url_hash(canonical_url(url)), 16) % num_shards
+
+
+class SQLiteCoordinator:
+    """基于SQLite的协调器：共享待抓取队列、已处理页面和失败资源"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                shard INTEGER NOT NULL,
+                level INTEGER NOT NULL,
+                other INTEGER NOT NULL,
+                score REAL NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                node TEXT,
+                claimed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS frontier_claim ON frontier (shard, state, score);
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                node TEXT NOT NULL,
+                rel_path TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                saved_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS failed_resources (
+                key TEXT PRIMARY KEY,
+                node TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS nodes (
+                node TEXT PRIMARY KEY,
+                shard INTEGER NOT NULL,
+                output_dir TEXT NOT NULL,
+                heartbeat REAL NOT NULL
+            );
+        """)
+
+    def execute(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def register_node(self, node, shard, output_dir):
+        self.execute("INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?)",
+                     (node, shard, output_dir, time.time()))
+
+    def push(self, url, shard, level, other, score):
+        """加入URL，全局按规范URL去重；返回是否为新URL"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO frontier (key, url, shard, level, other, score) VALUES (?, ?, ?, ?, ?, ?)",
+                (canonical_url(url), url, shard, level, int(other), score))
+            return cursor.rowcount > 0
+
+    def claim(self, shard, node):
+        """领取本分片分数最高的URL，同时回收超时未完成的URL"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    "UPDATE frontier SET state='pending', node=NULL WHERE state='claimed' AND claimed_at < ?",
+                    (now - CLAIM_LEASE,))
+                row = self.conn.execute(
+                    "SELECT key, url, level, other FROM frontier WHERE shard=? AND state='pending' "
+                    "ORDER BY score DESC, level LIMIT 1", (shard,)).fetchone()
+                if row:
+                    self.conn.execute(
+                        "UPDATE frontier SET state='claimed', node=?, claimed_at=? WHERE key=?",
+                        (node, now, row[0]))
+                self.conn.execute("UPDATE nodes SET heartbeat=? WHERE node=?", (now, node))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        if row:
+            return row[1], row[2], bool(row[3])
+        return None
+
+    def claim_redirect(self, url, shard, node):
+        """登记由node处理的重定向目标页面，返回是否为新URL（已被调度或处理过时返回False）"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO frontier (key, url, shard, level, other, score, state, node, claimed_at) "
+                "VALUES (?, ?, ?, 0, 0, 0.0, 'done', ?, ?)",
+                (canonical_url(url), url, shard, node, time.time()))
+            return cursor.rowcount > 0
+
+    def release(self, url):
+        """把已领取的URL放回队列（处理中断时）"""
+        self.execute("UPDATE frontier SET state='pending', node=NULL WHERE key=?", (canonical_url(url),))
+
+    def complete(self, url):
+        self.execute("UPDATE frontier SET state='done' WHERE key=?", (canonical_url(url),))
+
+    def unfinished(self):
+        """全局尚未完成（等待或正在抓取）的URL数"""
+        return self.execute("SELECT COUNT(*) FROM frontier WHERE state != 'done'")[0][0]
+
+    def pending(self, shard):
+        return self.execute("SELECT COUNT(*) FROM frontier WHERE shard=? AND state='pending'", (shard,))[0][0]
+
+    def record_page(self, url, node, rel_path, page_hash):
+        self.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                     (url, node, rel_path, page_hash, time.time()))
+
+    def record_failed(self, keys, node):
+        with self.lock:
+            self.conn.executemany("INSERT OR IGNORE INTO failed_resources VALUES (?, ?)",
+                                  [(key, node) for key in keys])
+
+    def merge(self, output_dir):
+        """合并各节点的输出文件、processed_urls和failed_resources到output_dir"""
+        copied = skipped = 0
+        link_index = LinkIndex(output_dir)
+        for node, node_dir in self.execute("SELECT node, output_dir FROM nodes"):
+            if not os.path.isdir(node_dir):
+                logger.warning(f"节点 {node} 的输出目录不存在: {node_dir}")
+                continue
+            if os.path.exists(os.path.join(node_dir, LINK_INDEX_NAME)):
+                link_index.merge(LinkIndex(node_dir))
+            for root, dirs, files in os.walk(node_dir):
+                if root == node_dir:
+                    dirs[:] = [name for name in dirs if name not in NODE_STATE_DIRS]
+                for name in files:
+                    # 各节点自己的状态文件不合并
+                    if name in NODE_STATE_FILES or name.endswith(NODE_STATE_SUFFIXES):
+                        continue
+                    src = os.path.join(root, name)
+                    dst = os.path.join(output_dir, os.path.relpath(src, node_dir))
+                    if root == os.path.join(node_dir, "resources") and name in MERGED_JSON_FILES:
+                        merge_json(src, dst, MERGED_JSON_FILES[name])
+                        continue
+                    # 共享资源可能被多个节点下载，只保留一份
+                    if os.path.exists(dst) and os.path.getsize(dst) == os.path.getsize(src):
+                        skipped += 1
+                        continue
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    shutil.copy2(src, dst)
+                    copied += 1
+
+        # 各节点只能改写指向本节点页面的链接，合并后改写跨节点的链接
+        relinked = link_index.relink()
+        link_index.save()
+
+        urls = [row[0] for row in self.execute("SELECT url FROM frontier WHERE state='done' ORDER BY url")]
+        with open(os.path.join(output_dir, 'processed_urls.txt'), 'w', encoding='utf-8') as f:
+            for url in urls:
+                f.write(f"{url}\n")
+        failed = [row[0] for row in self.execute("SELECT key FROM failed_resources ORDER BY key")]
+        with open(os.path.join(output_dir, 'failed_resources.txt'), 'w', encoding='utf-8') as f:
+            for key in failed:
+                f.write(f"{key}\n")
+
+        logger.info(f"合并完成: 复制 {copied} 个文件，跳过 {skipped} 个重复文件，"
+                    f"{len(urls)} 个已处理页面，{len(failed)} 个失败资源，改写跨节点链接的页面 {relinked} 个")
+        return copied
+
+
+def merge_json(src, dst, fields=None):
+    """把src中的条目按键合并到dst（fields为需要合并的字段，None表示合并整个对象）"""
+    with open(src, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    merged = {}
+    if os.path.exists(dst):
+        with open(dst, 'r', encoding='utf-8') as f:
+            merged = json.load(f)
+    if fields is None:
+        merged.update(data)
+    else:
+        for field in fields:
+            merged.setdefault(field, {}).update(data.get(field, {}))
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    with open(f"{dst}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(merged, f, ensure_ascii=False)
+    os.replace(f"{dst}.tmp", dst)
+
+
+class DistributedFrontier:
+    """分片的待抓取队列，接口与PriorityFrontier相同
+
+    本节点只领取属于自己分片的URL；其他分片的链接写入协调器，由对应节点领取。
+    分数沿用PriorityFrontier的打分规则（不执行栏目预算）。
+    """
+
+    def __init__(self, coordinator, shard, num_shards, node, scorer):
+        self.coordinator = coordinator
+        self.shard = shard
+        self.num_shards = num_shards
+        self.node = node
+        self.scorer = scorer
+        self.closed = False
+        self.claimed = 0
+        self.forwarded = 0
+
+    def push(self, url, level, other=False):
+        shard = shard_of(url, self.num_shards)
+        score = self.scorer.score(url, level, target=not other)
+        if self.coordinator.push(url, shard, level, other, score) and shard != self.shard:
+            self.forwarded += 1
+
+    def pop(self):
+        """领取本分片的URL；全局所有URL都完成后返回None"""
+        while not self.closed:
+            item = self.coordinator.claim(self.shard, self.node)
+            if item:
+                self.claimed += 1
+                return item
+            if self.coordinator.unfinished() == 0:
+                return None
+            time.sleep(POLL_INTERVAL)
+        return None
+
+    def requeue(self, url, level, other=False):
+        self.coordinator.release(url)
+
+    def task_done(self, url=None, elapsed=0.0, requeued=False):
+        if url is not None and not requeued:
+            self.coordinator.complete(url)
+
+    def close(self):
+        self.closed = True
+
+    def report(self):
+        logger.info(f"节点 {self.node} (分片 {self.shard}/{self.num_shards}): 抓取 {self.claimed} 个URL，"
+                    f"转交其他分片 {self.forwarded} 个URL")
+
+    def __len__(self):
+        return self.coordinator.pending(self.shard)
+
+
+class DistributedEngine(CrawlEngine):
+    """分布式节点：向协调器上报保存的页面和失败的资源"""
+
+    def __init__(self, profile, coordinator, shard, num_shards, node):
+        self.coordinator = coordinator
+        self.node = node
+        super().__init__(profile)
+        self.frontier = DistributedFrontier(coordinator, shard, num_shards, node,
+                                            PriorityFrontier(profile["sections"], self.history))
+        coordinator.register_node(node, shard, self.output_dir)
+
+    def claim_redirect(self, final_url, final_key):
+        """重定向目标同时在本地和协调器登记，其他分片已调度或处理过的页面不再抓取"""
+        new = super().claim_redirect(final_url, final_key)
+        shard = shard_of(final_url, self.frontier.num_shards)
+        return self.coordinator.claim_redirect(final_url, shard, self.node) and new
+
+    def page_saved(self, url, file_path, content, title=None):
+        super().page_saved(url, file_path, content, title)
+        self.coordinator.record_page(url, self.node, os.path.relpath(file_path, self.output_dir),
+                                     content_hash(content))
+
+    def finish(self):
+        super().finish()
+        self.coordinator.record_failed(self.failures, self.node)
+
+
+def coordinator_path(profile, args):
+    return args.coordinator or os.path.join(profile["output_dir"], COORDINATOR_NAME)
+
+
+def run_node(profile, path, shard, num_shards, node=None):
+    """运行一个抓取节点，节点输出保存在 output_dir/nodes/<节点名>"""
+    configure_logging()
+    node = node or f"{socket.gethostname()}-{shard}"
+    node_profile = dict(profile)
+    node_profile["output_dir"] = os.path.join(profile["output_dir"], NODES_DIRNAME, node)
+    coordinator = SQLiteCoordinator(path)
+    DistributedEngine(node_profile, coordinator, shard, num_shards, node).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="华为开发者文档分布式爬虫")
+    parser.add_argument('mode', choices=['local', 'node', 'merge'],
+                        help="local: 单机启动多个节点并合并; node: 启动单个节点; merge: 合并结果")
+    parser.add_argument('--crawl-profile', default='full', choices=sorted(PROFILES), help="抓取配置")
+    parser.add_argument('--coordinator', help="协调器数据库路径，默认为 output_dir/coordinator.db")
+    parser.add_argument('--shards', type=int, default=2, help="分片（节点）总数")
+    parser.add_argument('--shard', type=int, default=0, help="本节点的分片编号（node模式）")
+    parser.add_argument('--node-id', help="节点名，默认为 主机名-分片编号")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    profile = profile_from_args(args.crawl_profile, args)
+    path = coordinator_path(profile, args)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    if args.mode == 'node':
+        run_node(profile, path, args.shard, args.shards, args.node_id)
+        return
+
+    configure_logging()
+    coordinator = SQLiteCoordinator(path)
+    if args.mode == 'local':
+        # 只需有一个节点加入入口URL，其余节点会等待
+        coordinator.push(profile["seed_url"], shard_of(profile["seed_url"], args.shards), 0, False, 0.0)
+        processes = [multiprocessing.Process(target=run_node, args=(profile, path, shard, args.shards))
+                     for shard in range(args.shards)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    coordinator.merge(profile["output_dir"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1782 @@
+"""华为开发者文档爬虫引擎
+
+三个爬虫脚本共用的抓取引擎。脚本之间的差异（驱动安装方式、输出目录、
+URL过滤规则、是否本地化资源、并发度等）通过声明式的抓取配置(profile)描述，
+脚本本身只负责选择配置并启动引擎。
+
+导入本模块没有副作用且开销很小：BeautifulSoup、Selenium、requests等依赖
+只在真正解析、渲染或下载时才加载；日志和输出目录在开始抓取时才配置和创建。
+测量导入耗时:
+    python huawei_doc_engine.py --measure-import
+"""
+import time
+
+IMPORT_STARTED = time.perf_counter()
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import traceback
+import urllib.parse
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+from huawei_doc_breaker import BreakerBoard, CircuitOpenError, host_key, section_key
+from huawei_doc_failures import FAILURES_NAME, FailureStore, InvalidResourceError
+from huawei_doc_feed import FEED_DIRNAME, ChangeFeed
+from huawei_doc_images import DEFAULT_MIN_BYTES, IMAGE_MODES, ImageOptimizer, load_image_map
+from huawei_doc_links import LinkIndex
+from huawei_doc_preflight import PREFLIGHT_NAME, Preflight
+from huawei_doc_profiler import PROFILE_DIRNAME, PROFILE_ENV, Profiler
+from huawei_doc_scheduler import HISTORY_NAME, CrawlHistory, PriorityFrontier, default_section, match_section
+from huawei_doc_session_state import SESSION_STATE_NAME, SessionState
+from huawei_doc_storage import PAGE_SUFFIX, ShellStore, reassemble_file
+from huawei_doc_urlset import (DEFAULT_ERROR_RATE, DEFAULT_MEMORY_LIMIT, URL_SET_MODES, canonical_url, make_url_set,
+                               memory_report)
+from huawei_doc_watchdog import Watchdog
+
+logger = logging.getLogger("huawei_scraper")
+
+# 华为开发者文档站点
+SITE_ROOT = "https://developer.huawei.com"
+DOC_ROOT = "https://developer.huawei.com/consumer/cn/doc/"
+
+# 正文区域与错误页面的选择器
+CONTENT_SELECTOR = '.doc-content, .api-content, .markdown-body, article, main'
+ERROR_SELECTOR = '#error-page, .error-container, .page-not-found'
+ERROR_TITLE_KEYWORDS = ('not found', '404', '错误', 'error')
+# "接受cookies"类按钮（Selenium和Playwright共用）
+CONSENT_XPATH = ("//button[contains(text(), '接受') or contains(text(), '同意') or contains(text(), 'Accept') "
+                 "or contains(text(), 'Agree')]")
+# 渲染后端识别出错误页面时的返回值：与渲染失败（None）区分，服务器正常响应，熔断器记为成功
+ERROR_PAGE = ""
+
+# 本地化资源的类型目录
+RESOURCE_TYPES = ['css', 'js', 'img', 'fonts']
+FONT_EXTENSIONS = ('.woff', '.woff2', '.ttf', '.otf', '.eot')
+# <link rel="preload" as=...> 对应的资源类型
+PRELOAD_TYPES = {'style': 'css', 'script': 'js', 'font': 'fonts', 'image': 'img'}
+CSS_URL_PATTERN = re.compile(r'''url\(\s*(['"]?)([^'")]*)\1\s*\)''')
+CSS_IMPORT_PATTERN = re.compile(r'''@import\s+(['"])([^'"]+)\1''')
+
+# 资源下载：分块大小、(连接, 读取)超时，以及每种资源期望的内容类型和最小有效大小
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# 临时文件（.part）旁保存断点续传验证信息的文件后缀
+VALIDATOR_SUFFIX = ".validator"
+DOWNLOAD_TIMEOUT = (10, 30)
+EXPECTED_CONTENT = {
+    'js': (('javascript', 'text'), 50),
+    'css': (('css', 'text'), 50),
+    'img': (('image',), 100),
+}
+ASSET_MANIFEST_NAME = "asset_manifest.json"
+
+# 性能分析时计时的抓取阶段（run_cpu_stage包含链接提取和资源链接改写）
+PROFILED_STAGES = ['render', 'check_preflight', 'run_cpu_stage', 'download_page_assets',
+                   'download_resource', 'save_page']
+
+# 根据文件头识别内容类型
+MAGIC_NUMBERS = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'\x00\x00\x01\x00', 'image/x-icon'),
+    (b'wOFF', 'font/woff'),
+    (b'wOF2', 'font/woff2'),
+    (b'OTTO', 'font/otf'),
+    (b'\x00\x01\x00\x00', 'font/ttf'),
+]
+
+# 默认排除的URL（登录页面、注册页面、下载文件等）
+DEFAULT_EXCLUDE = [
+    '/login', '/register', '/sign', '/account',
+    '/download/', '/contact', '/support',
+    '.pdf', '.zip', '.exe', '.apk', '.jar'
+]
+
+
+def browser_headers(platform):
+    """模拟真实浏览器的完整请求头"""
+    return {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+        "Accept-Encoding": "gzip, deflate, br",
+        "Referer": "https://developer.huawei.com/consumer/cn/",
+        "Connection": "keep-alive",
+        "Cache-Control": "max-age=0",
+        "Sec-Ch-Ua": '"Not.A/Brand";v="8", "Chromium";v="114", "Google Chrome";v="114"',
+        "Sec-Ch-Ua-Mobile": "?0",
+        "Sec-Ch-Ua-Platform": f'"{platform}"',
+        "Sec-Fetch-Dest": "document",
+        "Sec-Fetch-Mode": "navigate",
+        "Sec-Fetch-Site": "same-origin",
+        "Sec-Fetch-User": "?1",
+        "Upgrade-Insecure-Requests": "1"
+    }
+
+
+SIMPLE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+    "Referer": "https://developer.huawei.com/",
+}
+
+# 抓取配置的默认值，各配置只需声明与默认值不同的部分
+DEFAULT_PROFILE = {
+    "name": "default",
+    # 抓取入口
+    "seed_url": DOC_ROOT,
+    # 开始抓取前先访问的页面（用于获取cookies等），None表示不访问
+    "warmup_url": None,
+    # URL规则：以http开头的规则按前缀匹配，否则按子串匹配
+    # include为空表示所有文档页面都是目标页面
+    "include": [],
+    "exclude": DEFAULT_EXCLUDE,
+    # 入口页面中不匹配include的链接最多额外处理多少个（0表示不处理）
+    "other_links_limit": 0,
+    # 提取链接的区域，None表示整个页面
+    "link_scope": None,
+    "max_level": 2,
+    # 栏目配置: [{"name", "match": [规则], "weight", "max_pages", "max_seconds"}]
+    # 权重越高越先抓取，max_pages/max_seconds为该栏目的预算
+    "sections": [],
+    # 整次抓取的时间预算（秒），None表示不限时
+    "time_budget": None,
+    # 已处理/已调度URL的集合: "exact" 内存中的64位指纹, "disk" 超出内存上限的指纹写入磁盘,
+    # "bloom" 布隆过滤器（按url_set_error_rate的概率把新URL误判为已处理）
+    "url_set": "exact",
+    "url_set_memory_limit": DEFAULT_MEMORY_LIMIT,
+    "url_set_error_rate": DEFAULT_ERROR_RATE,
+    # 资源处理方式: "none" 保存渲染后的原始页面, "localize" 下载资源并改写为本地路径
+    "asset_mode": "none",
+    # 输出方式: "relative" 按URL相对路径保存, "hierarchy" 按URL目录层次保存（最多3层）
+    "output_dir": "huawei_docs_full",
+    "output_backend": "hierarchy",
+    # 存储方式: "full" 保存完整页面, "shell" 每个栏目的页面框架只保存一次，页面只保存差异
+    "storage_mode": "full",
+    # 是否在页面正文前插入标题
+    "inject_title": False,
+    # 是否把指向已保存页面的文档链接改写为本地相对路径
+    "rewrite_links": True,
+    # 是否把已保存的页面写入变更流（output_dir/feed/*.jsonl），供下游增量处理
+    "change_feed": True,
+    # 渲染前是否先用HEAD请求检查页面状态和重定向（404/410/5xx页面不进入浏览器）
+    "preflight": True,
+    # 浏览器设置
+    "driver_install": "webdriver_manager",  # 或 "chromedriver_autoinstaller"
+    "headers": SIMPLE_HEADERS,
+    "stealth": False,
+    "block_images": False,
+    "consent_click": False,
+    # HTTP连接池: 缓存的域名连接池数量、每个域名的连接数，以及使用HTTP/2的域名（需要httpx）
+    "pool_connections": 16,
+    "pool_maxsize": 32,
+    "http2_hosts": [],
+    # 单个资源的最大大小（字节），超出的资源不下载
+    "max_asset_size": 50 * 1024 * 1024,
+    # 抓取结束后压缩和去重下载的图片: None 不处理, "lossless" PNG无损压缩, "webp" 转为WebP（需要Pillow）
+    "image_optimization": None,
+    # 小于该大小（字节）的图片不重新编码（仍参与去重）
+    "image_min_bytes": DEFAULT_MIN_BYTES,
+    # 渲染后端: "driver" 每个抓取线程一个Chrome, "tabs" 一个Chrome中打开render_workers个标签页,
+    # "playwright" 异步Playwright在一个事件循环中同时加载render_workers个页面（每个抓取线程一个）
+    "render_backend": "driver",
+    # 并发度: 浏览器（或标签页）数量和HTML解析进程数（None表示CPU核数）
+    "render_workers": 1,
+    "cpu_workers": None,
+    # 是否开启采样性能分析（也可以通过环境变量 HUAWEI_SCRAPER_PROFILE=1 开启）
+    "profiling": False,
+    # 重试与延迟（秒）
+    "render_retries": 2,
+    # 单个页面（预检、渲染、下载资源、保存）的总时限（秒，None表示不限制），超出后看门狗结束卡住的浏览器，
+    # 页面重新排队，最多处理page_attempts次
+    "page_deadline": 180,
+    "page_attempts": 2,
+    # 熔断器: 域名或栏目最近请求的错误率达到breaker_error_rate后暂停breaker_cooldown秒，再放行探测请求
+    "circuit_breaker": True,
+    "breaker_error_rate": 0.5,
+    "breaker_cooldown": 60,
+    "request_delay": (0, 0),
+    "root_page_delay": (2, 4),
+    "page_delay": (1, 2.5),
+}
+
+
+def make_profile(**overrides):
+    """基于默认值创建抓取配置"""
+    unknown = set(overrides) - set(DEFAULT_PROFILE)
+    if unknown:
+        raise ValueError(f"未知的配置项: {', '.join(sorted(unknown))}")
+    profile = dict(DEFAULT_PROFILE)
+    profile.update(overrides)
+    return profile
+
+
+# AR Engine API参考栏目的URL规则
+ARENGINE_INCLUDE = [
+    "https://developer.huawei.com/consumer/cn/doc/harmonyos-references/ar-engine-",
+    "/ability-",
+    "/harmonyos-references/ability",
+    "/js-apis-ability",
+    "/apis-ability",
+    "/ability-api",
+]
+
+# AR Engine参考栏目优先，其次是Ability相关参考
+ARENGINE_SECTIONS = [
+    {"name": "ar-engine", "match": ["/harmonyos-references/ar-engine-"], "weight": 10},
+    {"name": "ability", "match": ["ability"], "weight": 5},
+]
+
+PROFILES = {
+    # Windows: AR Engine参考栏目，保存渲染后的页面
+    "arengine-windows": make_profile(
+        name="arengine-windows",
+        seed_url="https://developer.huawei.com/consumer/cn/doc/harmonyos-references/ar-engine-overview",
+        warmup_url="https://developer.huawei.com/consumer/cn/",
+        include=ARENGINE_INCLUDE,
+        other_links_limit=5,
+        sections=ARENGINE_SECTIONS,
+        link_scope=CONTENT_SELECTOR,
+        max_level=3,
+        output_dir=r"D:\00code\04hmdev\huawei_docs_arengine",
+        output_backend="relative",
+        inject_title=True,
+        headers=browser_headers("Windows"),
+        stealth=True,
+        block_images=True,
+        request_delay=(1, 3),
+        root_page_delay=(2, 5),
+        page_delay=(2, 5),
+    ),
+    # macOS: 与Windows相同，但使用chromedriver_autoinstaller并保存到用户目录
+    "arengine-mac": make_profile(
+        name="arengine-mac",
+        seed_url="https://developer.huawei.com/consumer/cn/doc/harmonyos-references/ar-engine-overview",
+        warmup_url="https://developer.huawei.com/consumer/cn/",
+        include=ARENGINE_INCLUDE,
+        other_links_limit=5,
+        sections=ARENGINE_SECTIONS,
+        link_scope=CONTENT_SELECTOR,
+        max_level=3,
+        output_dir=os.path.expanduser("~/code/hmdevelop/huawei_docs_arengine"),
+        output_backend="relative",
+        headers=browser_headers("macOS"),
+        driver_install="chromedriver_autoinstaller",
+        stealth=True,
+        block_images=True,
+        request_delay=(1, 3),
+        root_page_delay=(2, 5),
+        page_delay=(2, 5),
+    ),
+    # 完整文档站点，下载资源以便离线浏览
+    "full": make_profile(
+        name="full",
+        asset_mode="localize",
+        consent_click=True,
+    ),
+}
+
+
+def match_rule(url, rule):
+    """判断URL是否匹配一条规则"""
+    if rule.startswith('http'):
+        return url.startswith(rule)
+    return rule in url
+
+
+def should_process_url(url, exclude=DEFAULT_EXCLUDE):
+    """判断URL是否应该被处理"""
+    for pattern in exclude:
+        if match_rule(url, pattern):
+            return False
+
+    # 只处理文档相关URL
+    return '/doc/' in url
+
+
+def is_api_reference_url(url, include=ARENGINE_INCLUDE):
+    """判断URL是否属于目标API参考栏目，include为空时所有URL都是目标"""
+    if not url:
+        return False
+    if not include:
+        return True
+    return any(match_rule(url, rule) for rule in include)
+
+
+def clean_url(url):
+    """清理URL中的动态参数"""
+    return url.split('?')[0]
+
+
+def content_hash(content):
+    """页面内容的SHA-256哈希"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def url_hash(text, length=16):
+    """跨进程、跨运行稳定的短哈希（不能使用hash()）"""
+    return hashlib.md5(text.encode('utf-8')).hexdigest()[:length]
+
+
+def clean_filename(name):
+    """清理文件名，移除非法字符"""
+    # 移除换行符、制表符等空白字符
+    name = re.sub(r'\s+', ' ', name).strip()
+
+    # 移除Windows文件系统不允许的字符
+    name = re.sub(r'[\\/*?:"<>|]', '_', name)
+
+    # 确保文件名不过长
+    if len(name) > 200:
+        name = name[:197] + "..."
+
+    return name
+
+
+def get_relative_path(url):
+    """从URL获取相对路径，用于创建目录结构"""
+    # 移除基础URL部分和查询参数
+    rel_path = clean_url(url.replace(DOC_ROOT, ""))
+    # 确保路径不为空
+    return rel_path or "index"
+
+
+def get_safe_filename(url):
+    """从URL生成安全的文件名"""
+    # 提取URL中的路径部分，移除页面锚点和查询参数
+    clean_path = urlparse(url).path.split('#')[0].split('?')[0]
+
+    # 如果路径为空或只有/，使用域名作为文件名
+    if clean_path == '' or clean_path == '/':
+        domain = urlparse(url).netloc
+        return f"{domain.replace('.', '_')}.html"
+
+    # 移除扩展名，稍后我们会添加.html
+    basename = os.path.basename(clean_path)
+    if '.' in basename:
+        basename = basename.split('.')[0]
+
+    # 替换非法字符
+    safe_name = re.sub(r'[\\/*?:"<>|]', '_', basename)
+
+    # 确保文件名不为空
+    if not safe_name:
+        safe_name = url_hash(url)
+
+    # 文件名过长则截断并添加哈希值
+    if len(safe_name) > 50:
+        safe_name = safe_name[:40] + '_' + url_hash(url, 8)
+
+    return f"{safe_name}.html"
+
+
+def get_directory_path(url, output_dir):
+    """从URL获取目录路径"""
+    # 提取URL中关键部分创建层次结构
+    parts = urlparse(url).path.strip('/').split('/')
+
+    # 创建层次结构目录，但排除最后一个部分(文件名)
+    if len(parts) > 1:
+        # 限制目录深度，防止路径过长
+        parts = parts[:3]
+        return os.path.join(output_dir, *parts[:-1])
+    return output_dir
+
+
+def get_page_path(url, output_dir, output_backend):
+    """计算页面的本地保存路径"""
+    if output_backend == "relative":
+        rel_path = get_relative_path(url)
+        if not rel_path.endswith(".html"):
+            rel_path = f"{rel_path}.html"
+        # 仅清理文件名部分
+        dirname, basename = os.path.split(rel_path)
+        return os.path.join(output_dir, dirname, clean_filename(basename))
+    return os.path.join(get_directory_path(url, output_dir), get_safe_filename(url))
+
+
+def get_resource_path(url, resource_type, resources_dir):
+    """计算资源的标准URL和本地保存路径，不涉及任何IO，无法下载的URL返回None"""
+    # 标准化URL
+    if url.startswith('//'):
+        url = 'https:' + url
+    elif url.startswith('/'):
+        url = SITE_ROOT + url
+
+    # 如果URL不是以http开头，跳过下载
+    if not url.startswith('http'):
+        return None
+
+    # 清理URL中的动态参数用于检查是否已下载
+    base_url_for_check = clean_url(url)
+
+    # 生成资源保存路径
+    parsed_url = urlparse(base_url_for_check)
+    path_parts = parsed_url.path.strip('/').split('/')
+
+    # 创建更好的文件名
+    if len(path_parts) > 0 and path_parts[-1]:
+        file_name = path_parts[-1]
+        # 确保文件名有适当的扩展名
+        if '.' not in file_name:
+            file_name = f"{file_name}.{resource_type}"
+    else:
+        file_name = f"{url_hash(base_url_for_check)}.{resource_type}"
+
+    # 处理查询参数中的版本信息
+    query = urllib.parse.parse_qs(parsed_url.query)
+    if 'v' in query and query['v']:
+        # 将版本信息添加到文件名中，但避免文件名过长
+        version = query['v'][0][:8]  # 只使用版本号的前8个字符
+        name_parts = file_name.rsplit('.', 1)
+        file_name = f"{name_parts[0]}_v{version}.{name_parts[1]}"
+
+    return url, os.path.join(resources_dir, resource_type, file_name)
+
+
+def response_validator(response):
+    """断点续传使用的验证信息：强ETag，否则Last-Modified（弱ETag不能用于If-Range）"""
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+
+def discard_part(part_path):
+    """删除未完成的临时文件及其验证信息"""
+    for path in (part_path, f"{part_path}{VALIDATOR_SUFFIX}"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def sniff_content_type(head):
+    """根据下载的第一块内容识别内容类型，无法识别时返回None"""
+    for magic, content_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return content_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    text = head[:512].lstrip().lower()
+    if text.startswith(b'<!doctype html') or text.startswith(b'<html'):
+        return 'text/html'
+    if text.startswith(b'<svg') or (text.startswith(b'<?xml') and b'<svg' in text):
+        return 'image/svg+xml'
+    return None
+
+
+def soup_title(soup):
+    """从已解析的页面中提取标题"""
+    title_tag = soup.find('title')
+    if title_tag:
+        title = title_tag.text.strip()
+        # 移除可能的网站名称后缀
+        if " - " in title:
+            title = title.split(" - ")[0].strip()
+        return title
+
+    # 如果没有title标签，尝试h1
+    h1_tag = soup.find('h1')
+    if h1_tag:
+        return h1_tag.text.strip()
+
+    return None
+
+
+def extract_page_title(html_content):
+    """从HTML内容中提取页面标题"""
+    try:
+        from bs4 import BeautifulSoup
+
+        return soup_title(BeautifulSoup(html_content, 'html.parser'))
+    except Exception as e:
+        logger.warning(f"提取标题失败: {e}")
+        return None
+
+
+def extract_links(soup, page_url, options):
+    """提取页面中需要继续抓取的同域名文档链接，返回 (URL, 是否目标页面) 列表"""
+    scope = None
+    if options['link_scope']:
+        scope = soup.select_one(options['link_scope'])
+    if scope is None:
+        scope = soup.body or soup
+
+    links = []
+    seen = {page_url}
+    site_netloc = urlparse(SITE_ROOT).netloc
+    for link in scope.find_all('a', href=True):
+        href = link['href']
+
+        # 跳过空链接、锚点和JavaScript链接
+        if not href or href.startswith('#') or href.startswith('javascript:'):
+            continue
+
+        # 构建完整URL，只处理同域名下的文档链接
+        next_url = urljoin(page_url, href)
+        if next_url in seen or urlparse(next_url).netloc != site_netloc:
+            continue
+        seen.add(next_url)
+        if should_process_url(next_url, options['exclude']):
+            links.append((next_url, is_api_reference_url(next_url, options['include'])))
+    return links
+
+
+def rewrite_resource(assets, raw_url, page_url, resource_type, options):
+    """登记资源并返回改写后的本地相对路径（相对页面所在的目录）"""
+    planned = get_resource_path(urljoin(page_url, raw_url), resource_type, options['resources_dir'])
+    if not planned:
+        return None
+    url, file_path = planned
+    rel_path = os.path.relpath(file_path, options['page_dir']).replace('\\', '/')
+    assets[url] = (resource_type, rel_path, os.path.relpath(file_path, options['output_dir']).replace('\\', '/'))
+    return rel_path
+
+
+def asset_type(url, default='img'):
+    """按扩展名判断CSS中url()引用的资源类型"""
+    path = urlparse(url).path.lower()
+    if path.endswith(FONT_EXTENSIONS):
+        return 'fonts'
+    if path.endswith('.css'):
+        return 'css'
+    return default
+
+
+def rewrite_css_urls(css, resolve):
+    """改写CSS中的 url() 和 @import 引用
+
+    resolve(原始URL, 资源类型) 返回替换后的路径，返回None时保留原引用。
+    """
+    def replace_url(match):
+        raw = match.group(2).strip()
+        if not raw or raw.startswith(('data:', '#')):
+            return match.group(0)
+        local = resolve(raw, asset_type(raw))
+        return f'url({match.group(1)}{local}{match.group(1)})' if local else match.group(0)
+
+    def replace_import(match):
+        local = resolve(match.group(2).strip(), 'css')
+        return f'@import {match.group(1)}{local}{match.group(1)}' if local else match.group(0)
+
+    css = CSS_URL_PATTERN.sub(replace_url, css)
+    return CSS_IMPORT_PATTERN.sub(replace_import, css)
+
+
+def rewrite_srcset(assets, srcset, page_url, options):
+    """改写srcset中的每个候选图片，保留宽度/像素密度描述"""
+    if 'data:' in srcset:
+        # data URL中可能包含逗号，无法可靠地拆分
+        return srcset
+    candidates = []
+    for candidate in srcset.split(','):
+        parts = candidate.split()
+        if not parts:
+            continue
+        rel_path = rewrite_resource(assets, parts[0], page_url, 'img', options)
+        candidates.append(' '.join([rel_path or parts[0]] + parts[1:]))
+    return ', '.join(candidates)
+
+
+def localize_resources(soup, page_url, options):
+    """将页面中的资源链接改写为计划的本地路径，返回 {url: (资源类型, 相对页面的路径, 相对output_dir的路径)}
+
+    只遍历一次文档树，处理样式表、脚本、图片（含srcset和<picture><source>）、网页图标、
+    preload/prefetch、视频封面、SVG图片、style属性和<style>标签中的url()（含字体和@import）。
+    同一资源只登记一次。
+    """
+    assets = {}
+
+    def rewrite(tag, attr, resource_type):
+        value = tag.get(attr)
+        if value:
+            rel_path = rewrite_resource(assets, value.strip(), page_url, resource_type, options)
+            if rel_path:
+                tag[attr] = rel_path
+
+    def resolve(raw_url, resource_type):
+        return rewrite_resource(assets, raw_url, page_url, resource_type, options)
+
+    for tag in soup.find_all(True):
+        name = tag.name
+        if name == 'link':
+            rel = [value.lower() for value in (tag.get('rel') or [])]
+            if 'stylesheet' in rel:
+                rewrite(tag, 'href', 'css')
+            elif any('icon' in value for value in rel):
+                rewrite(tag, 'href', 'img')
+            elif 'preload' in rel or 'prefetch' in rel or 'modulepreload' in rel:
+                resource_type = PRELOAD_TYPES.get((tag.get('as') or '').lower(),
+                                                  'js' if 'modulepreload' in rel else None)
+                if resource_type:
+                    rewrite(tag, 'href', resource_type)
+                if tag.get('imagesrcset'):
+                    tag['imagesrcset'] = rewrite_srcset(assets, tag['imagesrcset'], page_url, options)
+        elif name == 'script':
+            rewrite(tag, 'src', 'js')
+        elif name == 'img':
+            rewrite(tag, 'src', 'img')
+            if tag.get('srcset'):
+                tag['srcset'] = rewrite_srcset(assets, tag['srcset'], page_url, options)
+        elif name == 'source':
+            # <picture>中的候选图片；<video>/<audio>的媒体文件不下载
+            if tag.get('srcset'):
+                tag['srcset'] = rewrite_srcset(assets, tag['srcset'], page_url, options)
+            if tag.parent is not None and tag.parent.name == 'picture':
+                rewrite(tag, 'src', 'img')
+        elif name == 'video':
+            rewrite(tag, 'poster', 'img')
+        elif name == 'image':
+            # 内联SVG中的图片
+            for attr in ('href', 'xlink:href'):
+                rewrite(tag, attr, 'img')
+        elif name == 'style' and tag.string:
+            tag.string = rewrite_css_urls(tag.string, resolve)
+
+        style = tag.get('style')
+        if style and 'url(' in style:
+            tag['style'] = rewrite_css_urls(style, resolve)
+
+    return assets
+
+
+def transform_page(html_bytes, page_url, options):
+    """页面的CPU密集阶段：解析 → 提取标题和链接 → 改写资源链接 → 序列化
+
+    在进程池中执行，只接收原始HTML字节和可序列化的选项。不本地化资源时
+    不重新序列化页面，html为None，调用方直接使用原始内容。
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_bytes, 'html.parser')
+    result = {
+        'title': soup_title(soup),
+        # 在改写资源之前提取链接
+        'links': extract_links(soup, page_url, options),
+        'html': None,
+        'assets': [],
+    }
+    if options['localize']:
+        # 资源链接相对于页面的保存目录
+        page_path = get_page_path(page_url, options['output_dir'], options['output_backend'])
+        assets = localize_resources(soup, page_url, dict(options, page_dir=os.path.dirname(page_path)))
+        result['html'] = str(soup)
+        result['assets'] = [(url,) + asset for url, asset in assets.items()]
+    return result
+
+
+def process_html_resources(html_content, page_url, output_dir="huawei_docs_full"):
+    """改写HTML中的资源链接为本地路径（不下载），返回改写后的HTML和资源列表"""
+    options = {
+        'output_dir': output_dir,
+        'resources_dir': os.path.join(output_dir, "resources"),
+        'localize': True,
+        'output_backend': DEFAULT_PROFILE["output_backend"],
+        'link_scope': None,
+        'include': [],
+        'exclude': DEFAULT_EXCLUDE,
+    }
+    result = transform_page(html_content.encode('utf-8'), page_url, options)
+    return result['html'], result['assets']
+
+
+def inject_title(content, title):
+    """在<body>标签后插入标题"""
+    return re.sub(r'(<body[^>]*>)', lambda m: f"{m.group(1)}\n<h1>{title}</h1>\n", content, count=1)
+
+
+def install_chromedriver(method):
+    """按配置安装chromedriver，返回驱动路径"""
+    if method == "chromedriver_autoinstaller":
+        import chromedriver_autoinstaller
+        return chromedriver_autoinstaller.install()
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+
+class CrawlEngine:
+    """按抓取配置执行抓取：渲染页面、解析链接、本地化资源并保存"""
+
+    def __init__(self, profile, frontier=None):
+        self.profile = profile
+        self.output_dir = profile["output_dir"]
+        self.resources_dir = os.path.join(self.output_dir, "resources")
+        self.localize = profile["asset_mode"] == "localize"
+        # 之前运行中已转码或去重的图片: 原相对路径 -> 保留的相对路径
+        self.image_map = load_image_map(self.resources_dir) if self.localize else {}
+
+        # 已处理、已调度的URL（按规范URL的指纹保存）和失败的资源
+        self.processed_urls = self.make_url_set("processed")
+        self.scheduled_urls = self.make_url_set("scheduled")
+        self.processed_log = None
+        self.feed = None
+        self.failures = FailureStore(os.path.join(self.output_dir, FAILURES_NAME))
+        self.stats = Counter()
+        # 启动到首个请求的耗时
+        self.started = time.perf_counter()
+        self.first_request_at = None
+        # 本地资源的相对路径 -> {url, sha256, size, content_type}
+        self.asset_manifest = {}
+        self.lock = threading.Lock()
+        # 正在下载的资源: 本地路径 -> Future（同一资源的并发请求合并为一次下载）
+        self.downloads = {}
+
+        self.history = CrawlHistory(os.path.join(self.output_dir, HISTORY_NAME))
+        self.breakers = BreakerBoard(profile["breaker_error_rate"], profile["breaker_cooldown"],
+                                     profile["circuit_breaker"])
+        self.frontier = frontier or PriorityFrontier(profile["sections"], self.history, profile["time_budget"],
+                                                     self.breakers)
+        self.shell_store = ShellStore(self.output_dir) if profile["storage_mode"] == "shell" else None
+        self.link_index = LinkIndex(self.output_dir) if profile["rewrite_links"] else None
+        self.session = None
+        # 共享的渲染后端（为None时每个抓取线程使用自己的浏览器）
+        self.renderer = None
+        # 浏览器与requests会话共享的cookies和cookies提示状态
+        self.session_state = SessionState(os.path.join(self.output_dir, SESSION_STATE_NAME))
+        self.state_lock = threading.Lock()
+        self.preflight = None
+        self.cpu_pool = None
+        self.driver_path = None
+
+        # 性能分析：主要阶段的计时随时可以通过SIGUSR1开启
+        self.profiler = Profiler(os.path.join(self.output_dir, PROFILE_DIRNAME))
+        # 单页时限和卡住的浏览器；被看门狗中断后重新排队的页面: 规范URL -> 已处理次数
+        self.watchdog = Watchdog(profile["page_deadline"])
+        self.requeued = {}
+        self.profiler.instrument(self, PROFILED_STAGES)
+        # 所有抓取线程的总耗时
+        self.crawl_seconds = 0.0
+
+        # 传给解析进程的选项（必须可序列化）
+        self.cpu_options = {
+            'output_dir': self.output_dir,
+            'resources_dir': self.resources_dir,
+            'localize': self.localize,
+            'output_backend': profile["output_backend"],
+            'link_scope': profile["link_scope"],
+            'include': profile["include"],
+            'exclude': profile["exclude"],
+        }
+
+    def make_url_set(self, name):
+        profile = self.profile
+        return make_url_set(profile["url_set"], os.path.join(self.output_dir, f".{name}_urls.fp"),
+                            profile["url_set_memory_limit"], profile["url_set_error_rate"])
+
+    def needs_session(self):
+        """是否需要requests会话（下载资源或预检页面）"""
+        return self.localize or self.profile["preflight"]
+
+    def mark_first_request(self):
+        """记录并输出从启动到发出首个页面请求的耗时"""
+        if self.first_request_at is None:
+            with self.lock:
+                if self.first_request_at is None:
+                    self.first_request_at = time.perf_counter()
+                    logger.info(f"启动到首个请求耗时 {self.first_request_at - self.started:.2f} 秒 "
+                                f"(模块导入 {IMPORT_SECONDS * 1000:.0f} 毫秒)")
+
+    def sleep(self, delay):
+        """主动延迟；delay为秒数，或 (最小值, 最大值) 表示随机延迟（避免被封IP）"""
+        low, high = delay if isinstance(delay, tuple) else (delay, delay)
+        if high > 0:
+            seconds = random.uniform(low, high)
+            self.profiler.record_sleep(seconds)
+            time.sleep(seconds)
+
+    def init_driver(self, page_load_strategy=None):
+        """初始化Chrome WebDriver；page_load_strategy为"none"时driver.get不等待页面加载"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+
+        profile = self.profile
+        headers = profile["headers"]
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")  # 无头模式
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument(f"user-agent={headers['User-Agent']}")
+        chrome_options.add_argument("--window-size=1920,1080")
+
+        if profile["stealth"]:
+            # 添加请求头和伪装参数，降低被检测风险
+            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+            for key, value in headers.items():
+                if key.lower() != "user-agent":  # User-Agent已单独设置
+                    chrome_options.add_argument(f"--header={key}: {value}")
+            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+            chrome_options.add_experimental_option("useAutomationExtension", False)
+        else:
+            # 性能相关配置
+            chrome_options.add_argument(f"accept-language={headers['Accept-Language']}")
+            chrome_options.add_argument("--disable-gpu")
+            chrome_options.add_argument("--disable-extensions")
+            chrome_options.add_argument("--disable-infobars")
+            chrome_options.add_argument("--ignore-certificate-errors")
+            chrome_options.add_argument("--disable-popup-blocking")
+
+        if page_load_strategy:
+            chrome_options.page_load_strategy = page_load_strategy
+
+        if profile["block_images"]:
+            # 设置不加载图片，加快速度
+            chrome_options.experimental_options["prefs"] = {"profile.default_content_settings": {"images": 2}}
+
+        # 多个抓取线程共用同一次驱动安装
+        with self.lock:
+            if self.driver_path is None:
+                self.driver_path = install_chromedriver(profile["driver_install"])
+        driver = webdriver.Chrome(service=Service(self.driver_path), options=chrome_options)
+
+        if profile["stealth"]:
+            # 进一步伪装WebDriver
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+        # 设置页面加载超时
+        driver.set_page_load_timeout(30)
+        driver.set_script_timeout(30)
+
+        self.establish_session(driver)
+        return driver
+
+    def establish_session(self, driver):
+        """为浏览器建立登录态：已有cookies时直接写入，否则由第一个浏览器访问一次预热页面"""
+        state = self.session_state
+        warmup_url = self.profile["warmup_url"]
+        with self.state_lock:
+            if not state.ready and warmup_url:
+                # 先访问首页，可能需要接受cookies或其他设置
+                logger.info(f"访问预热页面: {warmup_url}")
+                try:
+                    driver.get(warmup_url)
+                    self.sleep(5)
+                    if self.profile["consent_click"] and self.accept_consent(driver):
+                        state.mark_consent()
+                    self.sync_session_state(driver)
+                except Exception as e:
+                    logger.warning(f"访问预热页面失败: {e}")
+                return
+        if state.ready:
+            state.apply_driver(driver, warmup_url)
+            logger.info(f"已为浏览器写入 {len(state.cookies)} 个cookies，跳过预热")
+
+    def sync_session_state(self, driver):
+        """从浏览器读取cookies，同步给requests会话并保存"""
+        state = self.session_state
+        count = state.capture_driver(driver)
+        if self.session is not None:
+            state.apply_session(self.session)
+        state.save()
+        logger.info(f"已同步浏览器的 {count} 个cookies到下载会话")
+
+    def accept_consent(self, driver):
+        """尝试点击"接受cookies"类型的按钮（如果存在），返回是否点击了按钮"""
+        from selenium.webdriver.common.by import By
+
+        try:
+            accept_buttons = driver.find_elements(By.XPATH, CONSENT_XPATH)
+            for button in accept_buttons:
+                if button.is_displayed():
+                    button.click()
+                    self.sleep(1)
+                    return True
+        except Exception:
+            pass
+        return False
+
+    def is_error_page(self, driver):
+        """根据标题和错误提示元素判断是否为错误页面"""
+        from selenium.webdriver.common.by import By
+
+        page_title = (driver.title or "").lower()
+        # 检查标题是否包含常见的错误指示词
+        if any(keyword in page_title for keyword in ERROR_TITLE_KEYWORDS):
+            logger.warning(f"页面标题 '{page_title}' 暗示可能是错误页面")
+            return True
+        # 检查页面中是否有特定的错误提示元素
+        if driver.find_elements(By.CSS_SELECTOR, ERROR_SELECTOR):
+            logger.warning("页面包含错误元素")
+            return True
+        return False
+
+    def get_page_content(self, url, driver):
+        """使用Selenium获取网页内容，带重试机制"""
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        retry = self.profile["render_retries"]
+        for attempt in range(retry + 1):
+            if self.watchdog.expired():
+                logger.warning(f"页面超出处理时限，不再重试: {url}")
+                break
+            if attempt and self.breakers.is_open(self.page_keys(url)):
+                logger.warning(f"熔断中，不再重试: {url}")
+                break
+            try:
+                logger.info(f"正在加载页面 (尝试 {attempt+1}/{retry+1}): {url}")
+                self.sleep(self.profile["request_delay"])
+                self.mark_first_request()
+                driver.get(url)
+
+                # 等待页面加载完成（等待body元素完全加载）
+                WebDriverWait(driver, self.wait_seconds(20)).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                )
+
+                # 尝试等待特定的内容加载完成
+                try:
+                    WebDriverWait(driver, self.wait_seconds(10)).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, CONTENT_SELECTOR))
+                    )
+                except TimeoutException:
+                    logger.debug(f"在页面 {url} 上未找到预期的内容元素，使用整个页面")
+
+                if self.is_error_page(driver):
+                    logger.warning(f"页面 {url} 被识别为错误页面，跳过")
+                    self.record_render(url, True)
+                    return None
+
+                # 接受过cookies提示后不再在每个页面上查找按钮
+                if self.profile["consent_click"] and not self.session_state.consent:
+                    if self.accept_consent(driver):
+                        self.session_state.mark_consent()
+                        with self.state_lock:
+                            self.sync_session_state(driver)
+
+                # 滚动页面以加载懒加载资源
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
+                self.sleep(1)
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                self.sleep(1)
+
+                # 获取渲染后的HTML，确保获取到了有意义的内容
+                html_content = driver.page_source
+                if html_content and len(html_content) > 1000:
+                    logger.debug(f"成功获取页面内容, 大小: {len(html_content)} 字节")
+                    self.record_render(url, True)
+                    return html_content
+                logger.warning(f"页面内容为空或太小 ({len(html_content) if html_content else 0} 字节)")
+                self.record_render(url, False)
+            except Exception as e:
+                self.record_render(url, False)
+                if attempt < retry:
+                    wait_time = (attempt + 1) * 2  # 递增的等待时间
+                    logger.warning(f"尝试 {attempt+1} 失败: {e}，等待 {wait_time} 秒后重试...")
+                    self.sleep(wait_time)
+                else:
+                    logger.error(f"获取页面失败: {url}，错误: {e}")
+        return None
+
+    def record_render(self, url, ok):
+        """记录渲染结果
+
+        渲染结果只计入栏目的熔断器，域名熔断器只统计传输层错误（见check_preflight和资源下载）。
+        但调度器放行的域名探测请求没有经过预检（未启用预检或使用了缓存结果）时，域名熔断器
+        仍处于半开状态，由渲染结果决定探测是否成功。
+        """
+        self.breakers.record([self.section_key(url)], ok)
+        self.breakers.record_probe([host_key(url)], ok)
+
+    def section_key(self, url):
+        """页面所属栏目的熔断键"""
+        section = match_section(url, self.profile["sections"])
+        return section_key(section["name"] if section else default_section(url))
+
+    def page_keys(self, url):
+        """页面请求的熔断键（域名和栏目），任一熔断时暂停该页面"""
+        return [host_key(url), self.section_key(url)]
+
+    def wait_seconds(self, seconds):
+        """等待时间不超过页面剩余的时间预算"""
+        return max(1, min(seconds, self.watchdog.remaining()))
+
+    def download_resource(self, url, resource_type, driver=None):
+        """下载资源文件"""
+        # 忽略负缓存期内的失败资源（404等永久性错误）
+        key = f"{url}_{resource_type}"
+        if self.failures.is_blocked(key):
+            self.stats['negative_cache_hits'] += 1
+            return None
+
+        planned = get_resource_path(url, resource_type, self.resources_dir)
+        if not planned:
+            return None
+        url, file_path = planned
+
+        # 确保目录存在
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        # 如果文件已存在，直接返回路径
+        if os.path.exists(file_path):
+            self.failures.record_success(key)
+            return file_path
+
+        # 同一资源正在被其他线程下载时，等待并共享其结果（按本地路径合并，即规范化后的资源URL）
+        with self.lock:
+            pending = self.downloads.get(file_path)
+            if pending is None:
+                pending = self.downloads[file_path] = Future()
+                leader = True
+            else:
+                leader = False
+        if not leader:
+            self.stats['assets_coalesced'] += 1
+            return pending.result()
+        result = None
+        try:
+            result = self.fetch_resource(url, file_path, resource_type, key, driver)
+            if result and resource_type == 'css':
+                self.localize_css(url, result, driver)
+        finally:
+            with self.lock:
+                del self.downloads[file_path]
+            pending.set_result(result)
+        return result
+
+    def localize_css(self, css_url, file_path, driver=None):
+        """下载样式表中 url() 和 @import 引用的字体、图片和样式表，并改写为相对样式表的本地路径"""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                css = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"读取样式表失败，跳过其中的资源: {file_path}，错误: {e}")
+            return
+        css_dir = os.path.dirname(file_path)
+
+        def resolve(raw_url, resource_type):
+            local_path = self.download_resource(urljoin(css_url, raw_url), resource_type, driver)
+            if not local_path:
+                return None
+            return os.path.relpath(local_path, css_dir).replace('\\', '/')
+
+        localized = rewrite_css_urls(css, resolve)
+        if localized != css:
+            tmp_path = f"{file_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(localized)
+            os.replace(tmp_path, file_path)
+
+    def fetch_resource(self, url, file_path, resource_type, key, driver=None):
+        """实际下载资源（每个资源同一时间只有一个线程下载）"""
+        keys = [host_key(url)]
+        try:
+            # 资源域名熔断期间不请求，资源进入重试队列
+            blocked = self.breakers.acquire(keys)
+            if blocked is not None:
+                self.stats['assets_breaker_rejected'] += 1
+                raise CircuitOpenError(f"{blocked} 熔断中")
+            # 会话与浏览器共享cookies，先用requests以流式方式下载资源
+            try:
+                self.stream_to_file(url, file_path, resource_type)
+            except Exception as e:
+                # 对于某些需要JavaScript渲染的资源，退回到使用Selenium
+                if (resource_type in ['js', 'css'] and driver and (url.endswith('.js') or url.endswith('.css'))
+                        and self.download_with_driver(url, file_path, resource_type, driver)):
+                    logger.info(f"已通过Selenium下载资源: {file_path}")
+                    self.stats['assets_downloaded'] += 1
+                    self.stats['assets_via_selenium'] += 1
+                    self.failures.record_success(key)
+                    return file_path
+                raise e
+
+            logger.info(f"已下载资源: {file_path}")
+            self.stats['assets_downloaded'] += 1
+            self.failures.record_success(key)
+            self.breakers.record(keys, True)
+            self.sleep((0.3, 0.8))  # 短暂延迟
+            return file_path
+        except Exception as e:
+            # 记录失败的资源：永久性错误进入负缓存，临时性错误进入重试队列
+            permanent = self.failures.record_failure(key, url, resource_type, e)
+            # 永久性错误（404等）说明服务器正常响应，不计入熔断错误率
+            if not isinstance(e, CircuitOpenError):
+                self.breakers.record(keys, permanent)
+            logger.warning(f"下载资源失败{'' if permanent else '，稍后重试'}: {url}，错误: {e}")
+            return None
+
+    def download_with_driver(self, url, file_path, resource_type, driver):
+        """通过浏览器打开资源并保存，返回是否成功"""
+        try:
+            driver.get(url)
+            self.sleep(1)
+            content = driver.page_source
+
+            # 对于CSS和JS，需要从页面源码中提取实际内容
+            tag = 'style' if resource_type == 'css' else 'script'
+            content_match = re.search(rf'<{tag}[^>]*>(.*?)</{tag}>', content, re.DOTALL)
+            if content_match:
+                content = content_match.group(1).strip()
+
+            if content and len(content) > 10:  # 确保有内容
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                return True
+        except Exception:
+            logger.warning(f"Selenium下载资源失败: {url}")
+        return False
+
+    def stream_to_file(self, url, file_path, resource_type):
+        """以流式方式将资源下载到临时文件，边下载边计算哈希，完成后再移动到目标位置
+
+        第一块内容用于识别内容类型；超过max_asset_size的资源放弃下载；
+        之前未下载完的临时文件通过Range请求继续下载，并用If-Range带上开始下载时保存的
+        验证信息（ETag或Last-Modified），资源已变化时服务器返回完整内容，重新下载。
+        """
+        max_size = self.profile["max_asset_size"]
+        part_path = f"{file_path}.part"
+        validator_path = f"{part_path}{VALIDATOR_SUFFIX}"
+        digest = hashlib.sha256()
+
+        # 已有未完成的临时文件时，从断点继续下载；没有验证信息则无法确认资源未变化，重新下载
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = None
+        if offset and os.path.exists(validator_path):
+            with open(validator_path, 'r', encoding='utf-8') as f:
+                validator = f.read().strip() or None
+        if offset and not validator:
+            offset = 0
+        request_headers = {'Range': f"bytes={offset}-", 'If-Range': validator} if offset else None
+
+        response = self.session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT, headers=request_headers)
+        if offset and response.status_code == 416:
+            # 临时文件已经完整（或比资源还长），无法继续，丢弃后重新下载
+            response.close()
+            logger.info(f"断点位置超出资源大小，重新下载: {url}")
+            offset = 0
+            response = self.session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT)
+
+        with response:
+            response.raise_for_status()
+            if offset and response.status_code == 206:
+                # 继续下载：先把已下载的部分计入哈希
+                with open(part_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                mode = 'ab'
+                self.stats['downloads_resumed'] += 1
+            else:
+                offset = 0
+                mode = 'wb'
+                # 保存验证信息，下次断点续传时确认资源未变化
+                validator = response_validator(response)
+                if validator:
+                    with open(validator_path, 'w', encoding='utf-8') as f:
+                        f.write(validator)
+                elif os.path.exists(validator_path):
+                    os.remove(validator_path)
+
+            content_length = int(response.headers.get('Content-Length') or 0)
+            if max_size and offset + content_length > max_size:
+                raise InvalidResourceError(f"资源过大 ({offset + content_length} 字节)")
+
+            content_type = response.headers.get('Content-Type', '').lower()
+            expected, min_size = EXPECTED_CONTENT.get(resource_type, ((), 0))
+            type_matches = not expected or any(e in content_type for e in expected)
+
+            size = offset
+            sniffed = None
+            try:
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if not chunk:
+                            continue
+                        if size == 0:
+                            sniffed = sniff_content_type(chunk)
+                            # 声明的类型不符且内容实际上是HTML（通常是错误页面），立即放弃
+                            if not type_matches and sniffed == 'text/html':
+                                raise InvalidResourceError(f"资源内容无效 (内容类型: {content_type}，实际为HTML)")
+                        size += len(chunk)
+                        if max_size and size > max_size:
+                            raise InvalidResourceError(f"资源过大 (超过 {max_size} 字节)")
+                        digest.update(chunk)
+                        f.write(chunk)
+            except InvalidResourceError:
+                # 无效内容不保留，其他错误（如连接中断）保留临时文件以便断点续传
+                discard_part(part_path)
+                raise
+
+        # 内容类型不符且内容太小，可能不是有效资源
+        if not type_matches and size < min_size:
+            discard_part(part_path)
+            raise InvalidResourceError(f"资源内容无效 (内容类型: {content_type})")
+
+        os.replace(part_path, file_path)
+        if os.path.exists(validator_path):
+            os.remove(validator_path)
+        self.stats['asset_bytes'] += size - offset
+        rel_path = os.path.relpath(file_path, self.output_dir).replace('\\', '/')
+        self.asset_manifest[rel_path] = {
+            'url': url, 'sha256': digest.hexdigest(), 'size': size,
+            'content_type': sniffed or content_type.split(';')[0],
+        }
+
+    def download_page_assets(self, result, driver=None):
+        """下载CPU阶段收集到的资源，下载失败的资源恢复为原始URL
+
+        返回改写后的HTML和临时失败的资源列表 [(key, url, 相对页面的路径)]，
+        这些资源在抓取结束时重试，成功后再改写页面。
+        """
+        html = result['html']
+        deferred = []
+        for url, resource_type, rel_path, resource_path in result['assets']:
+            if self.watchdog.expired():
+                # 超出页面时限，剩余资源保留原始URL
+                html = html.replace(rel_path, url)
+                self.stats['assets_skipped_deadline'] += 1
+                continue
+            optimized = self.image_map.get(resource_path)
+            if optimized and os.path.exists(os.path.join(self.output_dir, optimized)):
+                # rel_path为 "../" * 页面目录深度 + resource_path
+                html = html.replace(rel_path, rel_path[:len(rel_path) - len(resource_path)] + optimized)
+                self.stats['assets_optimized_reused'] += 1
+                continue
+            if not self.download_resource(url, resource_type, driver):
+                html = html.replace(rel_path, url)
+                key = f"{url}_{resource_type}"
+                if self.failures.is_transient(key):
+                    deferred.append((key, url, rel_path))
+        return html, deferred
+
+    def retry_failed_resources(self):
+        """按指数退避重试本次运行中临时失败的资源，成功后改写引用它们的页面"""
+        recovered = 0
+        # 改写过的页面文件 -> 页面URL，全部重试结束后每个页面追加一条变更记录
+        rewritten = {}
+        for key, entry in self.failures.retry_queue():
+            logger.info(f"重试资源 (第 {entry['attempts']} 次失败后): {entry['url']}")
+            if not self.download_resource(entry['url'], entry['type']):
+                continue
+            recovered += 1
+            for page in entry.get("pages", []):
+                # 之前版本的记录没有页面URL
+                file_path, url, rel_path = page[:3]
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        content = f.read()
+                    new_content = content.replace(url, rel_path)
+                    if new_content != content:
+                        with open(file_path, 'w', encoding='utf-8') as f:
+                            f.write(new_content)
+                        rewritten[file_path] = page[3] if len(page) > 3 else None
+                except Exception as e:
+                    logger.warning(f"改写页面中的资源链接失败 ({file_path}): {e}")
+        for file_path, page_url in rewritten.items():
+            self.page_rewritten(page_url, file_path)
+        if recovered:
+            logger.info(f"重试队列: {recovered} 个资源重试成功，改写 {len(rewritten)} 个页面")
+
+    def run_cpu_stage(self, html_content, page_url):
+        """将页面的解析和改写交给进程池执行，进程池不可用或正在采样分析时在当前线程执行"""
+        html_bytes = html_content.encode('utf-8')
+        if self.cpu_pool is None or self.profiler.enabled:
+            return transform_page(html_bytes, page_url, self.cpu_options)
+        return self.cpu_pool.submit(transform_page, html_bytes, page_url, self.cpu_options).result()
+
+    def save_page(self, content, url, title=None):
+        """保存页面内容到文件，返回保存路径"""
+        file_path = get_page_path(url, self.output_dir, self.profile["output_backend"])
+        if title and self.profile["inject_title"]:
+            content = inject_title(content, title)
+        link_index = self.link_index
+        if link_index is not None:
+            # 避免截断目录层次后与其他页面的路径冲突，并把已保存页面的链接改写为本地路径
+            file_path = link_index.claim_path(url, file_path)
+            content, resolved, pending = link_index.rewrite(content, url, file_path)
+        try:
+            if self.shell_store is not None:
+                file_path = self.shell_store.save(content, file_path, default_section(url))
+            else:
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+        except Exception as e:
+            logger.warning(f"保存文件失败 ({file_path}): {e}")
+            # 使用安全的替代文件名保存到output_dir
+            file_path = os.path.join(self.output_dir, f"page_{url_hash(url)}.html")
+            if link_index is not None:
+                content, resolved, pending = link_index.rewrite(content, url, file_path)
+            try:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+            except Exception as e2:
+                logger.error(f"替代保存也失败: {e2}")
+                return None
+        logger.info(f"已保存: {file_path}")
+        self.stats['pages_saved'] += 1
+        if link_index is not None:
+            link_index.record(url, file_path, resolved, pending)
+        return file_path
+
+    def page_saved(self, url, file_path, content, title=None):
+        """页面保存后的处理：记录抓取历史，写入变更流
+
+        抓取历史按页面源内容判断是否变化；变更流记录实际写入的文件（注入标题、改写链接之后，
+        框架去重存储时为差异记录）的哈希和大小，消费者可以据此校验path指向的文件。
+        """
+        changed = self.history.record(url, content_hash(content))
+        if self.feed is not None:
+            self.append_feed(url, file_path, title, changed)
+
+    def append_feed(self, url, file_path, title, changed):
+        digest = hashlib.sha256()
+        size = 0
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                size += len(chunk)
+        self.feed.append(url, os.path.relpath(file_path, self.output_dir).replace('\\', '/'), title,
+                         digest.hexdigest(), size, changed)
+
+    def page_rewritten(self, url, file_path, content=None):
+        """后处理（链接重新改写、重试成功的资源）改写已保存的页面后，向变更流追加新记录
+
+        之前的记录中的哈希已不再对应文件；content为还原后的完整页面，用于提取标题。
+        """
+        if self.feed is None or url is None or not os.path.exists(file_path):
+            return
+        if content is None:
+            try:
+                if file_path.endswith(PAGE_SUFFIX):
+                    content = reassemble_file(file_path, self.output_dir)
+                else:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        content = f.read()
+            except Exception as e:
+                logger.warning(f"读取改写后的页面失败 ({file_path}): {e}")
+        self.append_feed(url, file_path, extract_page_title(content) if content else None, True)
+
+    def schedule(self, url, level, other=False):
+        """将URL加入待抓取队列（按规范URL去重，每个URL只加入一次）"""
+        if not self.scheduled_urls.add(canonical_url(url)):
+            return False
+        self.frontier.push(url, level, other)
+        return True
+
+    def process_page(self, url, driver, level=0, other=False):
+        """处理单个页面：渲染 → 解析 → 下载资源 → 保存 → 调度子页面"""
+        max_level = self.profile["max_level"]
+        key = canonical_url(url)
+        # 被看门狗中断后重新排队的页面已经在已处理集合中
+        retry = key in self.requeued
+        if (key in self.processed_urls and not retry) or level > max_level:
+            return
+
+        # 入口页面和首页额外链接不受include规则限制
+        if level > 0 and not other and not is_api_reference_url(url, self.profile["include"]):
+            logger.info(f"跳过非目标页面: {url}")
+            return
+
+        if not self.processed_urls.add(key) and not retry:
+            return
+        if self.preflight is not None:
+            url = self.check_preflight(url, key, retry)
+            if url is None:
+                return
+        # URL集合只保存指纹，已处理的URL随处理过程写入processed_urls.txt
+        with self.lock:
+            self.processed_log.write(f"{url}\n")
+            self.processed_log.flush()
+        logger.info(f"--- 抓取页面 [{level}/{max_level}]: {url} ---")
+        html_content = self.render(url, driver)
+        if not html_content:
+            if not self.watchdog.killed():
+                self.stats['pages_failed'] += 1
+            return
+
+        # 在进程池中解析页面、提取链接并改写资源链接
+        result = self.run_cpu_stage(html_content, url)
+        if result['title']:
+            logger.info(f"页面标题: {result['title']}")
+
+        # 下载页面中的资源
+        deferred = []
+        if self.localize:
+            html_content, deferred = self.download_page_assets(result, driver)
+
+        file_path = self.save_page(html_content, url, result['title'])
+        if file_path:
+            self.page_saved(url, file_path, html_content, result['title'])
+            for key, asset_url, rel_path in deferred:
+                self.failures.attach_page(key, file_path, asset_url, rel_path, url)
+
+        # 随机延迟，避免被封IP
+        self.sleep(self.profile["root_page_delay"] if level == 0 else self.profile["page_delay"])
+
+        if level >= max_level:
+            return
+
+        # 调度目标页面链接和入口页面中的其他链接（可能包含未检测到的API参考），
+        # 抓取顺序由调度器按分数决定
+        target_links = [link for link, is_target in result['links'] if is_target]
+        other_links = [link for link, is_target in result['links'] if not is_target]
+        logger.info(f"找到 {len(target_links)} 个目标链接，{len(other_links)} 个其他链接")
+        for next_url in target_links:
+            self.schedule(next_url, level + 1)
+        if level == 0:
+            for next_url in other_links[:self.profile["other_links_limit"]]:
+                self.schedule(next_url, level + 1, other=True)
+
+    def render(self, url, driver):
+        """渲染页面并返回HTML：使用共享的渲染后端，或抓取线程自己的浏览器"""
+        if self.renderer is not None:
+            html_content = self.renderer.render(url)
+            self.record_render(url, html_content is not None)
+            return html_content or None
+        return self.get_page_content(url, driver)
+
+    def check_preflight(self, url, key, retry=False):
+        """预检页面，返回需要渲染的URL（重定向时为目标URL），错误页面或重复页面返回None
+
+        retry为True时是被看门狗中断后重新排队的页面，重定向目标已在上次处理时加入已处理集合，不再去重。
+        """
+        result = self.preflight.check(url, key)
+        # 网络错误（status为None）、429和5xx是传输层错误，计入域名和栏目的熔断错误率；
+        # 404等确定的页面状态说明服务器正常响应。缓存的结果不反映服务器当前的状态，不计入
+        status = result["status"]
+        if not result["cached"]:
+            self.breakers.record(self.page_keys(url), status is not None and status < 500 and status != 429)
+        if not result["ok"]:
+            logger.warning(f"预检发现错误页面 (HTTP {result['status']})，跳过: {url}")
+            self.stats['preflight_errors'] += 1
+            return None
+        if status is not None and status >= 500:
+            logger.info(f"预检返回 HTTP {status}，仍交给浏览器渲染: {url}")
+            self.stats['preflight_server_errors'] += 1
+            return url
+        final_url = result["final_url"]
+        final_key = canonical_url(final_url)
+        if final_key == key:
+            return url
+        # 重定向：按目标URL去重，目标页面也不会再被调度
+        self.scheduled_urls.add(final_key)
+        if not should_process_url(final_url, self.profile["exclude"]):
+            logger.info(f"页面重定向到排除的URL，跳过: {url} -> {final_url}")
+            return None
+        if not self.claim_redirect(final_url, final_key) and not retry:
+            logger.info(f"页面重定向到已处理的页面，跳过: {url} -> {final_url}")
+            self.stats['redirect_duplicates'] += 1
+            return None
+        logger.info(f"页面重定向: {url} -> {final_url}")
+        return final_url
+
+    def claim_redirect(self, final_url, final_key):
+        """登记重定向的目标页面，返回是否为第一次处理该页面"""
+        return self.processed_urls.add(final_key)
+
+    def worker(self):
+        """抓取线程：每个线程使用独立的浏览器，或共用渲染后端"""
+        driver = None
+        try:
+            if self.renderer is None:
+                driver = self.init_driver()
+            while True:
+                item = self.frontier.pop()
+                if item is None:
+                    break
+                url, level, other = item
+                slot = self.watchdog.begin(url, driver)
+                requeued = False
+                try:
+                    self.process_page(url, driver, level, other)
+                except Exception as e:
+                    if not slot.killed:
+                        logger.error(f"处理页面 {url} 时出错: {e}")
+                        traceback.print_exc()
+                finally:
+                    elapsed = self.watchdog.end(slot)
+                    # 先重新排队再标记完成，避免其他线程误以为队列已空
+                    if slot.killed:
+                        requeued = self.requeue(url, level, other)
+                    self.frontier.task_done(url, elapsed, requeued)
+                if slot.killed and self.renderer is None:
+                    # 浏览器已被看门狗结束，换一个新的浏览器（共享渲染后端自行重启浏览器）
+                    try:
+                        driver.quit()
+                    except Exception:
+                        pass
+                    driver = None
+                    driver = self.init_driver()
+        except Exception as e:
+            logger.error(f"抓取线程出错: {e}")
+            traceback.print_exc()
+        finally:
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+
+    def requeue(self, url, level, other):
+        """重新排队被看门狗中断的页面，超过处理次数后放弃，返回是否重新排队"""
+        key = canonical_url(url)
+        with self.lock:
+            attempts = self.requeued.get(key, 1)
+            if attempts >= self.profile["page_attempts"]:
+                self.requeued.pop(key, None)
+                self.stats['pages_failed'] += 1
+                logger.error(f"页面 {attempts} 次超出处理时限，放弃: {url}")
+                return False
+            self.requeued[key] = attempts + 1
+            self.stats['pages_requeued'] += 1
+        logger.warning(f"页面重新排队 (已处理 {attempts} 次): {url}")
+        self.frontier.requeue(url, level, other)
+        return True
+
+    def run(self):
+        """执行抓取"""
+        profile = self.profile
+        logger.info(f"=== 开始抓取华为开发者文档 [{profile['name']}] ===")
+        logger.info(f"内容将保存到目录: {self.output_dir}")
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.processed_log = open(os.path.join(self.output_dir, 'processed_urls.txt'), 'w', encoding='utf-8')
+        if profile["change_feed"]:
+            self.feed = ChangeFeed(os.path.join(self.output_dir, FEED_DIRNAME))
+
+        if self.localize:
+            logger.info(f"资源文件将保存在 {self.resources_dir} 目录")
+            for res_type in RESOURCE_TYPES:
+                os.makedirs(os.path.join(self.resources_dir, res_type), exist_ok=True)
+
+        if self.needs_session():
+            from huawei_doc_transport import create_session
+
+            self.session = create_session(profile["headers"], profile["pool_connections"],
+                                          profile["pool_maxsize"], profile["http2_hosts"])
+        if self.session is not None:
+            self.session_state.apply_session(self.session)
+        if profile["preflight"]:
+            self.preflight = Preflight(self.session, os.path.join(self.output_dir, PREFLIGHT_NAME))
+
+        if profile["render_backend"] == "tabs":
+            from huawei_doc_tabs import TabRenderer
+
+            self.renderer = TabRenderer(self, profile["render_workers"])
+        elif profile["render_backend"] == "playwright":
+            from huawei_doc_async_render import PlaywrightRenderer
+
+            self.renderer = PlaywrightRenderer(self, profile["render_workers"])
+        if self.renderer is not None:
+            self.renderer.start()
+
+        cpu_workers = profile["cpu_workers"] or os.cpu_count() or 1
+        self.cpu_pool = ProcessPoolExecutor(max_workers=cpu_workers)
+        logger.info(f"HTML解析进程池: {cpu_workers} 个进程，浏览器: {profile['render_workers']} 个")
+
+        self.watchdog.start()
+        if profile["profiling"] or os.environ.get(PROFILE_ENV):
+            self.profiler.start()
+        self.profiler.install_signal()
+
+        self.schedule(profile["seed_url"], 0)
+        started = time.perf_counter()
+        threads = [threading.Thread(target=self.worker, name=f"crawler-{i}", daemon=True)
+                   for i in range(profile["render_workers"])]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+            # 抓取结束后处理临时失败资源的重试队列
+            if self.localize:
+                self.retry_failed_resources()
+        except KeyboardInterrupt:
+            logger.info("用户中断，停止抓取")
+            self.frontier.close()
+            for thread in threads:
+                thread.join()
+        finally:
+            self.cpu_pool.shutdown()
+            if self.renderer is not None:
+                self.renderer.close()
+        self.crawl_seconds = (time.perf_counter() - started) * len(threads)
+
+        self.finish()
+
+    def finish(self):
+        """输出统计信息并保存已处理URL和失败资源列表"""
+        logger.info(f"=== 抓取完成! 共处理了 {len(self.processed_urls)} 个页面，"
+                    f"保存 {self.stats['pages_saved']} 个，失败 {self.stats['pages_failed']} 个 ===")
+        self.frontier.report()
+        self.profiler.report(self.crawl_seconds)
+        self.watchdog.report()
+        self.breakers.report()
+        if self.stats['pages_requeued'] or self.stats['assets_skipped_deadline']:
+            logger.info(f"超出时限重新排队 {self.stats['pages_requeued']} 次，"
+                        f"因超出时限跳过资源 {self.stats['assets_skipped_deadline']} 个")
+        if self.renderer is not None:
+            self.renderer.report()
+        if self.link_index is not None:
+            # 增量后处理：改写先于链接目标保存的页面
+            relinked = self.link_index.relink(on_rewrite=self.page_rewritten)
+            self.link_index.save()
+            logger.info(f"链接本地化: 索引中 {len(self.link_index.urls)} 个页面，后处理改写 {relinked} 个页面")
+        self.history.save()
+        if self.shell_store is not None:
+            self.shell_store.report()
+        self.failures.save()
+        if self.preflight is not None:
+            self.preflight.save()
+            self.preflight.report()
+            logger.info(f"预检跳过错误页面 {self.stats['preflight_errors']} 个，"
+                        f"服务器错误仍渲染 {self.stats['preflight_server_errors']} 个，"
+                        f"重定向到已处理页面 {self.stats['redirect_duplicates']} 个")
+        if self.session is not None:
+            self.session_state.capture_session(self.session)
+        self.session_state.save()
+        if self.session is not None:
+            from huawei_doc_transport import log_session_metrics
+
+            log_session_metrics(self.session)
+        if self.asset_manifest:
+            self.save_asset_manifest()
+        if self.localize and self.profile["image_optimization"]:
+            ImageOptimizer(self.output_dir, self.profile["image_optimization"], self.profile["image_min_bytes"],
+                           self.profile["cpu_workers"], os.path.join(self.resources_dir, ASSET_MANIFEST_NAME)).run()
+        if self.localize:
+            logger.info(f"下载了 {self.stats['assets_downloaded']} 个资源，有 {len(self.failures)} 个资源下载失败 "
+                        f"{self.failures.summary()}，负缓存跳过 {self.stats['negative_cache_hits']} 次，"
+                        f"退回Selenium下载 {self.stats['assets_via_selenium']} 个，"
+                        f"合并并发下载请求 {self.stats['assets_coalesced']} 次")
+
+        memory_report("已处理URL集合", self.processed_urls)
+        memory_report("已调度URL集合", self.scheduled_urls)
+        for url_set in (self.processed_urls, self.scheduled_urls):
+            if hasattr(url_set, 'close'):
+                url_set.close()
+        self.processed_log.close()
+        if self.feed is not None:
+            self.feed.close()
+            logger.info(f"变更流: 写入 {self.feed.records} 条页面记录")
+
+        with open(os.path.join(self.output_dir, 'failed_resources.txt'), 'w', encoding='utf-8') as f:
+            for failed_resource in self.failures:
+                f.write(f"{failed_resource}\n")
+
+
+    def save_asset_manifest(self):
+        """合并保存本次下载的资源清单（相对路径 -> URL、哈希、大小、内容类型）"""
+        path = os.path.join(self.resources_dir, ASSET_MANIFEST_NAME)
+        manifest = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except Exception as e:
+                logger.warning(f"读取资源清单失败，将重新生成: {e}")
+        manifest.update(self.asset_manifest)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+
+
+def configure_logging():
+    """配置日志输出到控制台和scraper.log"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("scraper.log", encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def add_profile_arguments(parser):
+    """添加可以覆盖抓取配置的命令行参数"""
+    # 传输层依赖requests，只在解析命令行时导入，不影响模块的导入时间
+    from huawei_doc_transport import HTTP2_HOSTS
+
+    parser.add_argument('--output-dir', help="输出目录")
+    parser.add_argument('--seed-url', help="抓取入口")
+    parser.add_argument('--max-level', type=int, help="最大抓取深度")
+    parser.add_argument('--render-workers', type=int, help="并发浏览器数量")
+    parser.add_argument('--render-backend', choices=['driver', 'tabs', 'playwright'], help="渲染后端")
+    parser.add_argument('--cpu-workers', type=int, help="HTML解析进程数")
+    parser.add_argument('--page-deadline', type=float, help="单个页面的处理时限（秒，0表示不限制）")
+    parser.add_argument('--time-budget', type=float, help="抓取时间预算（秒），优先抓取最重要的页面")
+    parser.add_argument('--url-set', choices=URL_SET_MODES,
+                        help="已处理URL集合: exact 内存指纹, disk 指纹可写入磁盘, bloom 布隆过滤器")
+    parser.add_argument('--profile', dest='profiling', action='store_const', const=True,
+                        help="开启采样性能分析，结果保存在 output_dir/profile")
+    parser.add_argument('--storage-mode', choices=['full', 'shell'], help="页面存储方式")
+    parser.add_argument('--no-preflight', dest='preflight', action='store_false', default=None,
+                        help="不在渲染前预检页面状态")
+    parser.add_argument('--no-circuit-breaker', dest='circuit_breaker', action='store_false', default=None,
+                        help="不按域名和栏目熔断")
+    parser.add_argument('--no-change-feed', dest='change_feed', action='store_false', default=None,
+                        help="不把已保存的页面写入变更流")
+    parser.add_argument('--no-link-rewrite', dest='rewrite_links', action='store_false', default=None,
+                        help="不把文档链接改写为本地路径")
+    parser.add_argument('--optimize-images', dest='image_optimization', choices=IMAGE_MODES,
+                        help="抓取结束后压缩和去重下载的图片（需要Pillow）")
+    parser.add_argument('--pool-maxsize', type=int, help="每个域名的HTTP连接数")
+    parser.add_argument('--http2', dest='http2_hosts', action='store_const', const=HTTP2_HOSTS,
+                        help="对华为开发者站点和资源CDN使用HTTP/2（需要httpx[http2]）")
+
+
+def profile_from_args(profile_name, args):
+    """基于命名的抓取配置和命令行参数生成最终配置"""
+    profile = dict(PROFILES[profile_name])
+    for key in DEFAULT_PROFILE:
+        value = getattr(args, key, None)
+        if value is not None:
+            profile[key] = value
+    return profile
+
+
+def main(profile_name, argv=None):
+    """命令行入口：选择抓取配置并允许覆盖部分配置项"""
+    parser = argparse.ArgumentParser(description=f"华为开发者文档爬虫 [{profile_name}]")
+    add_profile_arguments(parser)
+    parser.add_argument('--dry-run', action='store_true', help="只发现链接并估算抓取耗时，不保存页面")
+    parser.add_argument('--discovery-fetch', choices=['auto', 'static', 'render'], default='auto',
+                        help="试运行获取页面的方式: auto 静态HTML中没有链接时才渲染")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    profile = profile_from_args(profile_name, args)
+    if args.dry_run:
+        from huawei_doc_discovery import DiscoveryEngine
+
+        DiscoveryEngine(profile, args.discovery_fetch).run()
+    else:
+        CrawlEngine(profile).run()
+
+
+def measure_import(module="huawei_doc_engine", runs=5):
+    """在新的解释器中多次导入模块，返回导入耗时的中位数（秒）以及导入的重量级依赖"""
+    import statistics
+    import subprocess
+
+    code = (f"import time, sys; t = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - t); "
+            f"print(','.join(m for m in ('bs4', 'selenium', 'requests', 'urllib3') if m in sys.modules))")
+    samples = []
+    heavy = ''
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split('\n')
+        samples.append(float(output[0]))
+        heavy = output[1]
+    return statistics.median(samples), heavy
+
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
+
+if __name__ == "__main__" and '--measure-import' in sys.argv:
+    seconds, heavy = measure_import()
+    print(f"导入 huawei_doc_engine 耗时 {seconds * 1000:.1f} 毫秒，已加载的重量级依赖: {heavy or '无'}")
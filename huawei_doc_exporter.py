@@ -0,0 +1,408 @@
+"""华为开发者文档导出工具
+
+将爬虫保存在 output_dir 中的渲染后HTML页面转换为干净的Markdown，
+并将API签名、参数、返回值提取为JSON，便于内部工具直接加载。
+
+用法:
+    python huawei_doc_exporter.py [output_dir] [--export-dir DIR] [--workers N] [--force]
+
+导出是增量的：每个页面按内容哈希记录在 export_manifest.json 中，
+内容未变化的页面会被跳过。
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from huawei_doc_storage import PAGE_SUFFIX, TEMPLATES_DIRNAME, reassemble_file
+
+logger = logging.getLogger("huawei_exporter")
+
+# 默认导出目录名（位于output_dir下）
+EXPORT_DIRNAME = "export"
+MANIFEST_NAME = "export_manifest.json"
+
+# 遍历output_dir时跳过的目录
+SKIP_DIRS = {"resources", EXPORT_DIRNAME, TEMPLATES_DIRNAME}
+
+# 正文区域选择器，与爬虫保持一致
+CONTENT_SELECTOR = '.doc-content, .api-content, .markdown-body, article, main'
+
+# 页面框架元素（导航、脚本、侧边栏等），导出前移除
+CHROME_SELECTORS = [
+    'script', 'style', 'noscript', 'iframe', 'svg', 'link', 'meta',
+    'nav', 'header', 'footer', 'aside', 'form', 'button',
+    '.sidebar', '.side-bar', '.catalog', '.doc-catalog', '.toc', '.anchor-list',
+    '.breadcrumb', '.feedback', '.doc-feedback', '.pagination', '.page-footer',
+]
+
+# API签名识别，例如: createSession(config: ARConfig): Promise<ARSession>
+SIGNATURE_RE = re.compile(
+    r'^\s*(?:(?:static|function|async|declare|export|public)\s+)*'
+    r'[A-Za-z_$][\w$.]*\s*(?:<[^()]*>)?\s*\([^()]*(?:\([^()]*\)[^()]*)*\)\s*(?::\s*\S.*)?;?\s*$'
+)
+
+# 参数表与返回值表的表头关键词
+PARAM_HEADER_KEYWORDS = ('参数名', '参数', 'parameter', 'name')
+TYPE_HEADER_KEYWORDS = ('类型', 'type')
+RETURN_LABEL_KEYWORDS = ('返回值', 'return')
+
+
+def file_hash(path):
+    """计算文件内容的SHA-256哈希"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_saved_pages(output_dir):
+    """遍历output_dir中保存的HTML页面，返回相对路径"""
+    for root, dirs, files in os.walk(output_dir):
+        # 跳过资源目录和导出目录
+        if root == output_dir:
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            # 框架去重存储的页面也一并导出
+            if name.endswith('.html') or name.endswith(PAGE_SUFFIX):
+                yield os.path.relpath(os.path.join(root, name), output_dir)
+
+
+def clean_text(text):
+    """合并空白字符"""
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def inline_markdown(node):
+    """将行内元素转换为Markdown文本"""
+    from bs4 import NavigableString, Tag
+
+    if isinstance(node, NavigableString):
+        return re.sub(r'\s+', ' ', str(node))
+    if not isinstance(node, Tag):
+        return ''
+
+    name = node.name
+    if name == 'br':
+        return '\n'
+    if name == 'code':
+        text = node.get_text()
+        return f"`{text}`" if text.strip() else ''
+    if name == 'img':
+        alt = node.get('alt', '')
+        src = node.get('src', '')
+        return f"![{alt}]({src})" if src else ''
+
+    inner = ''.join(inline_markdown(child) for child in node.children)
+    if name in ('strong', 'b'):
+        return f"**{inner.strip()}**" if inner.strip() else ''
+    if name in ('em', 'i'):
+        return f"*{inner.strip()}*" if inner.strip() else ''
+    if name == 'a':
+        href = node.get('href', '')
+        text = inner.strip()
+        if href and not href.startswith(('#', 'javascript:')) and text:
+            return f"[{text}]({href})"
+        return inner
+    return inner
+
+
+def table_rows(table):
+    """提取表格的行（每行为单元格文本列表）"""
+    rows = []
+    for tr in table.find_all('tr'):
+        cells = [clean_text(inline_markdown(cell)) for cell in tr.find_all(['th', 'td'])]
+        if cells:
+            rows.append(cells)
+    return rows
+
+
+def table_markdown(rows):
+    """将表格行转换为Markdown表格"""
+    if not rows:
+        return ''
+    width = max(len(row) for row in rows)
+    rows = [row + [''] * (width - len(row)) for row in rows]
+    lines = ['| ' + ' | '.join(cell.replace('|', '\\|') for cell in rows[0]) + ' |',
+             '|' + ' --- |' * width]
+    for row in rows[1:]:
+        lines.append('| ' + ' | '.join(cell.replace('|', '\\|') for cell in row) + ' |')
+    return '\n'.join(lines)
+
+
+def block_markdown(node, blocks, depth=0):
+    """递归地将块级元素转换为Markdown段落列表"""
+    from bs4 import NavigableString, Tag
+
+    for child in node.children:
+        if isinstance(child, NavigableString):
+            text = clean_text(str(child))
+            if text:
+                blocks.append(text)
+            continue
+        if not isinstance(child, Tag):
+            continue
+
+        name = child.name
+        if name in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+            text = clean_text(child.get_text())
+            if text:
+                blocks.append(f"{'#' * int(name[1])} {text}")
+        elif name == 'pre':
+            code = child.get_text().strip('\n')
+            blocks.append(f"```\n{code}\n```")
+        elif name == 'table':
+            blocks.append(table_markdown(table_rows(child)))
+        elif name in ('ul', 'ol'):
+            items = []
+            list_markdown(child, items, depth)
+            if items:
+                blocks.append('\n'.join(items))
+        elif name == 'p':
+            text = ''.join(inline_markdown(c) for c in child.children).strip()
+            if text:
+                blocks.append(text)
+        elif name == 'blockquote':
+            inner = []
+            block_markdown(child, inner, depth)
+            if inner:
+                blocks.append('\n'.join(f"> {line}" for block in inner for line in block.split('\n')))
+        elif name in ('div', 'section', 'article', 'main', 'dl', 'dd', 'dt', 'body'):
+            block_markdown(child, blocks, depth)
+        else:
+            text = inline_markdown(child).strip()
+            if text:
+                blocks.append(text)
+
+
+def list_markdown(node, items, depth):
+    """转换（可能嵌套的）列表"""
+    ordered = node.name == 'ol'
+    for i, li in enumerate(node.find_all('li', recursive=False)):
+        marker = f"{i + 1}." if ordered else '-'
+        text = clean_text(''.join(inline_markdown(c) for c in li.children
+                                  if getattr(c, 'name', None) not in ('ul', 'ol')))
+        items.append(f"{'  ' * depth}{marker} {text}")
+        for sub in li.find_all(['ul', 'ol'], recursive=False):
+            list_markdown(sub, items, depth + 1)
+
+
+def classify_table(rows, label):
+    """判断表格是参数表、返回值表还是其他表格"""
+    if not rows:
+        return None
+    header = [cell.lower() for cell in rows[0]]
+    label = (label or '').lower()
+    has_type = any(any(k in cell for k in TYPE_HEADER_KEYWORDS) for cell in header)
+    if any(k in label for k in RETURN_LABEL_KEYWORDS):
+        return 'returns' if has_type else None
+    if has_type and any(any(k in cell for k in PARAM_HEADER_KEYWORDS) for cell in header):
+        return 'parameters'
+    return None
+
+
+def table_records(rows):
+    """将表格行转换为以表头为键的字典列表"""
+    header = rows[0]
+    records = []
+    for row in rows[1:]:
+        record = {}
+        for i, key in enumerate(header):
+            record[key or f"col{i}"] = row[i] if i < len(row) else ''
+        records.append(record)
+    return records
+
+
+def extract_apis(content):
+    """按文档顺序扫描正文，提取API签名、参数和返回值"""
+    apis = []
+    current = None
+    last_label = ''
+
+    for element in content.find_all(['h2', 'h3', 'h4', 'h5', 'pre', 'p', 'table']):
+        # 跳过嵌套在其他已处理元素中的元素
+        if element.find_parent(['pre', 'table']):
+            continue
+        name = element.name
+        if name in ('h2', 'h3', 'h4', 'h5'):
+            current = {'name': clean_text(element.get_text()), 'signature': None,
+                       'parameters': [], 'returns': []}
+            apis.append(current)
+            last_label = ''
+        elif name in ('pre', 'p'):
+            text = element.get_text().strip()
+            if current is not None and current['signature'] is None:
+                for line in text.splitlines():
+                    if SIGNATURE_RE.match(line) and len(line) < 300:
+                        current['signature'] = line.strip().rstrip(';')
+                        break
+            if name == 'p':
+                last_label = clean_text(text)[:40]
+        elif name == 'table' and current is not None:
+            rows = table_rows(element)
+            kind = classify_table(rows, last_label)
+            if kind:
+                current[kind].extend(table_records(rows))
+            last_label = ''
+
+    # 只保留真正描述API的条目
+    return [api for api in apis if api['signature'] or api['parameters'] or api['returns']]
+
+
+def export_page(source_path, export_base, page_hash):
+    """导出单个页面（在工作进程中执行），返回导出结果统计"""
+    from bs4 import BeautifulSoup
+
+    if source_path.endswith(PAGE_SUFFIX):
+        raw = reassemble_file(source_path).encode('utf-8')
+    else:
+        with open(source_path, 'rb') as f:
+            raw = f.read()
+    soup = BeautifulSoup(raw, 'html.parser')
+
+    # 页面标题与原始URL（如果页面中有记录）
+    title = clean_text(soup.title.get_text()) if soup.title else ''
+    if ' - ' in title:
+        title = title.split(' - ')[0].strip()
+    canonical = soup.find('link', rel='canonical') or soup.find('meta', property='og:url')
+    url = None
+    if canonical is not None:
+        url = canonical.get('href') or canonical.get('content')
+
+    # 定位正文区域并移除框架元素
+    content = soup.select_one(CONTENT_SELECTOR) or soup.body or soup
+    for selector in CHROME_SELECTORS:
+        for element in content.select(selector):
+            element.decompose()
+
+    if not title:
+        h1 = content.find('h1')
+        title = clean_text(h1.get_text()) if h1 else ''
+
+    blocks = []
+    block_markdown(content, blocks)
+    markdown = '\n\n'.join(block for block in blocks if block)
+    if title and not markdown.startswith('# '):
+        markdown = f"# {title}\n\n{markdown}"
+
+    data = {
+        'title': title,
+        'url': url,
+        'source': source_path,
+        'content_hash': page_hash,
+        'headings': [clean_text(h.get_text()) for h in content.find_all(['h1', 'h2', 'h3'])],
+        'apis': extract_apis(content),
+    }
+
+    os.makedirs(os.path.dirname(export_base), exist_ok=True)
+    with open(f"{export_base}.md", 'w', encoding='utf-8') as f:
+        f.write(markdown + '\n')
+    with open(f"{export_base}.json", 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+    out_size = os.path.getsize(f"{export_base}.md") + os.path.getsize(f"{export_base}.json")
+    return {'in_bytes': len(raw), 'out_bytes': out_size, 'apis': len(data['apis'])}
+
+
+def load_manifest(path):
+    """加载导出清单（相对路径 -> 内容哈希）"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"读取导出清单失败，将全量导出: {e}")
+        return {}
+
+
+def save_manifest(path, manifest):
+    """原子地写入导出清单"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def export_all(output_dir, export_dir=None, workers=None, force=False):
+    """并行导出output_dir中所有新增或变化的页面，返回统计信息"""
+    export_dir = export_dir or os.path.join(output_dir, EXPORT_DIRNAME)
+    workers = workers or os.cpu_count() or 1
+    manifest_path = os.path.join(export_dir, MANIFEST_NAME)
+    manifest = {} if force else load_manifest(manifest_path)
+    os.makedirs(export_dir, exist_ok=True)
+
+    stats = {'pages': 0, 'skipped': 0, 'failed': 0, 'apis': 0, 'in_bytes': 0, 'out_bytes': 0}
+    start = time.perf_counter()
+
+    # 先按内容哈希筛选需要导出的页面
+    pending = {}
+    for rel_path in iter_saved_pages(output_dir):
+        page_hash = file_hash(os.path.join(output_dir, rel_path))
+        if manifest.get(rel_path) == page_hash:
+            stats['skipped'] += 1
+            continue
+        pending[rel_path] = page_hash
+
+    logger.info(f"待导出 {len(pending)} 个页面，跳过 {stats['skipped']} 个未变化页面，使用 {workers} 个进程")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for rel_path, page_hash in pending.items():
+            export_base = os.path.join(export_dir, rel_path[:-len(PAGE_SUFFIX)] if rel_path.endswith(PAGE_SUFFIX)
+                                       else os.path.splitext(rel_path)[0])
+            future = executor.submit(export_page, os.path.join(output_dir, rel_path), export_base, page_hash)
+            futures[future] = rel_path
+
+        for future in as_completed(futures):
+            rel_path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.warning(f"导出页面失败: {rel_path}，错误: {e}")
+                stats['failed'] += 1
+                continue
+            manifest[rel_path] = pending[rel_path]
+            stats['pages'] += 1
+            stats['apis'] += result['apis']
+            stats['in_bytes'] += result['in_bytes']
+            stats['out_bytes'] += result['out_bytes']
+
+    save_manifest(manifest_path, manifest)
+
+    elapsed = time.perf_counter() - start
+    stats['elapsed'] = elapsed
+    stats['workers'] = workers
+    stats['pages_per_sec'] = stats['pages'] / elapsed if elapsed > 0 else 0.0
+    stats['pages_per_sec_per_core'] = stats['pages_per_sec'] / workers
+    stats['size_ratio'] = stats['out_bytes'] / stats['in_bytes'] if stats['in_bytes'] else 0.0
+    return stats
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="将抓取的华为开发者文档导出为Markdown和JSON")
+    parser.add_argument('output_dir', nargs='?', default='huawei_docs_full', help="爬虫的输出目录")
+    parser.add_argument('--export-dir', help="导出目录，默认为 output_dir/export")
+    parser.add_argument('--workers', type=int, help="工作进程数，默认为CPU核数")
+    parser.add_argument('--force', action='store_true', help="忽略导出清单，全量导出")
+    args = parser.parse_args()
+
+    stats = export_all(args.output_dir, args.export_dir, args.workers, args.force)
+
+    logger.info(f"导出完成! 共导出 {stats['pages']} 个页面，跳过 {stats['skipped']} 个，失败 {stats['failed']} 个")
+    logger.info(f"提取了 {stats['apis']} 个API条目")
+    logger.info(f"输入 {stats['in_bytes']} 字节，输出 {stats['out_bytes']} 字节 "
+                f"(为原大小的 {stats['size_ratio']:.1%})")
+    logger.info(f"耗时 {stats['elapsed']:.2f} 秒，{stats['pages_per_sec']:.1f} 页/秒，"
+                f"每核 {stats['pages_per_sec_per_core']:.1f} 页/秒 ({stats['workers']} 个进程)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""失败资源的持久化记录
+
+替代内存中的 failed_resources 集合：
+- 永久性错误（404、410等）按TTL进行负缓存，缓存期内的后续运行不再请求这些资源；
+- 临时性错误（超时、连接错误、429、5xx）进入延迟重试队列，按指数退避在抓取结束时重试；
+  重试次数和退避按本次运行中的失败次数计算，之前运行的失败不影响本次重试。
+
+记录保存在 output_dir/failed_resources.json。
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("huawei_scraper")
+
+FAILURES_NAME = "failed_resources.json"
+
+# 永久性错误的负缓存时间（秒）
+PERMANENT_TTL = {
+    404: 7 * 86400,
+    410: 30 * 86400,
+    400: 86400,
+    401: 86400,
+    403: 86400,
+    451: 7 * 86400,
+}
+# 内容无效（类型不符、内容过小）的负缓存时间
+INVALID_TTL = 86400
+
+# 临时性错误的重试：最多重试次数，退避基数和上限（秒）
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 5
+RETRY_MAX_DELAY = 300
+
+
+class InvalidResourceError(Exception):
+    """资源下载成功但内容无效"""
+
+
+def classify_error(error):
+    """返回 (错误类别, HTTP状态码, 负缓存TTL)；TTL为None表示临时性错误"""
+    error_class = type(error).__name__
+    if isinstance(error, InvalidResourceError):
+        return error_class, None, INVALID_TTL
+    status = None
+    response = getattr(error, 'response', None)
+    if response is not None and hasattr(response, 'status_code'):
+        status = response.status_code
+    if status in PERMANENT_TTL:
+        return error_class, status, PERMANENT_TTL[status]
+    # 超时、连接错误、429、5xx及其他未知错误都视为临时性错误
+    return error_class, status, None
+
+
+class FailureStore:
+    """持久化的失败资源记录：负缓存 + 延迟重试队列"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        # 本次运行中失败的资源，只有这些资源进入重试队列
+        self.run_keys = set()
+        # 本次运行中每个资源的失败次数，用于重试次数限制和退避（记录中的attempts是跨运行的累计次数）
+        self.run_attempts = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                logger.warning(f"读取失败资源记录失败，忽略: {e}")
+        self.expire()
+
+    def expire(self):
+        """清理已过期的负缓存"""
+        now = time.time()
+        with self.lock:
+            expired = [key for key, entry in self.entries.items()
+                       if entry.get("expires_at") and entry["expires_at"] <= now]
+            for key in expired:
+                del self.entries[key]
+        if expired:
+            logger.info(f"{len(expired)} 个失败资源的负缓存已过期，将重新尝试")
+
+    def is_blocked(self, key):
+        """资源是否处于负缓存期内（永久性错误）"""
+        entry = self.entries.get(key)
+        return bool(entry and entry.get("expires_at") and entry["expires_at"] > time.time())
+
+    def is_transient(self, key):
+        entry = self.entries.get(key)
+        return bool(entry and not entry.get("expires_at"))
+
+    def record_failure(self, key, url, resource_type, error):
+        """记录一次失败，返回是否为永久性错误"""
+        error_class, status, ttl = classify_error(error)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.setdefault(key, {
+                "url": url, "type": resource_type, "attempts": 0, "first_failed": now,
+            })
+            entry.update(error_class=error_class, status=status, message=str(error)[:200], last_failed=now)
+            entry["attempts"] += 1
+            attempts = self.run_attempts[key] = self.run_attempts.get(key, 0) + 1
+            if ttl is not None:
+                entry["expires_at"] = now + ttl
+                entry.pop("next_retry", None)
+            else:
+                entry.pop("expires_at", None)
+                entry["next_retry"] = now + min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempts - 1))
+            self.run_keys.add(key)
+        return ttl is not None
+
+    def record_success(self, key):
+        """资源下载成功，返回之前的失败记录（如果有）"""
+        with self.lock:
+            self.run_keys.discard(key)
+            self.run_attempts.pop(key, None)
+            return self.entries.pop(key, None)
+
+    def attach_page(self, key, file_path, url, rel_path, page_url=None):
+        """记录引用了该临时失败资源的页面，重试成功后改写页面中的链接"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry.setdefault("pages", []).append([file_path, url, rel_path, page_url])
+
+    def retry_queue(self):
+        """按到期时间依次返回本次运行中需要重试的临时失败资源，未到期时等待"""
+        while True:
+            with self.lock:
+                due = [(entry["next_retry"], key) for key, entry in self.entries.items()
+                       if key in self.run_keys and "next_retry" in entry
+                       and self.run_attempts.get(key, 0) <= MAX_RETRIES]
+            if not due:
+                return
+            next_retry, key = min(due)
+            wait = next_retry - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            entry = self.entries.get(key)
+            if entry is None:
+                continue
+            # 先移出队列，重试失败时record_failure会重新加入
+            self.run_keys.discard(key)
+            yield key, entry
+
+    def save(self):
+        with self.lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def summary(self):
+        """按错误类别统计失败资源数"""
+        counts = {}
+        for entry in self.entries.values():
+            label = entry["status"] or entry["error_class"]
+            counts[label] = counts.get(label, 0) + 1
+        return counts
+
+    def __iter__(self):
+        return iter(list(self.entries))
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,216 @@
+"""已保存页面的变更流（JSONL）
+
+抓取过程中每保存一个页面，就向 output_dir/feed/ 追加一行JSON记录，下游索引程序
+无需在抓取结束后重新扫描输出目录，可以在抓取进行中增量处理结果:
+    {"seq": 12, "url": ..., "path": 相对output_dir的路径, "title": ..., "hash": path文件的SHA-256,
+     "size": path文件的字节数, "fetched_at": 时间戳, "changed": 页面内容是否与上次抓取不同}
+抓取结束时的后处理（链接重新改写、重试成功的资源）改写已保存的页面后，会为该页面
+追加一条新记录（changed为true），同一URL以最后一条记录为准。
+
+记录按段文件保存（feed-000001.jsonl、feed-000002.jsonl……），当前段超过一定大小后
+切换到下一段，只保留最近的若干段。每条记录以一次写入追加完整的一行，读取时忽略
+末尾尚未写完的行。
+
+读取位置（offset）的格式为 "段号:字节偏移"，消费者保存最后处理的offset，
+下次从该位置继续读取:
+    python huawei_doc_feed.py tail huawei_docs_full --follow --offset-file indexer.offset
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+logger = logging.getLogger("huawei_scraper")
+
+FEED_DIRNAME = "feed"
+SEGMENT_PATTERN = re.compile(r'^feed-(\d{6})\.jsonl$')
+# 单个段文件的大小上限（字节）和保留的段数
+FEED_SEGMENT_BYTES = 64 * 1024 * 1024
+FEED_MAX_SEGMENTS = 16
+# --follow 时没有新记录的轮询间隔（秒）
+FOLLOW_INTERVAL = 1.0
+
+
+def segment_name(number):
+    return f"feed-{number:06d}.jsonl"
+
+
+def list_segments(directory):
+    """目录中的段号（升序）"""
+    if not os.path.isdir(directory):
+        return []
+    numbers = []
+    for name in os.listdir(directory):
+        match = SEGMENT_PATTERN.match(name)
+        if match:
+            numbers.append(int(match.group(1)))
+    return sorted(numbers)
+
+
+def parse_offset(offset):
+    """"段号:字节偏移" -> (段号, 字节偏移)，None表示从最早的记录开始"""
+    if not offset:
+        return None
+    segment, position = offset.split(':', 1)
+    return int(segment), int(position)
+
+
+def format_offset(segment, position):
+    return f"{segment}:{position}"
+
+
+class ChangeFeed:
+    """按段轮转的追加式JSONL变更流（线程安全）"""
+
+    def __init__(self, directory, segment_bytes=FEED_SEGMENT_BYTES, max_segments=FEED_MAX_SEGMENTS):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.lock = threading.Lock()
+        self.records = 0
+        os.makedirs(directory, exist_ok=True)
+
+        # 继续上次运行的最后一段和序号
+        segments = list_segments(directory)
+        self.segment = segments[-1] if segments else 1
+        self.seq = self.recover(self.segment)
+        self.file = open(os.path.join(directory, segment_name(self.segment)), 'ab')
+
+    def recover(self, segment):
+        """截掉段文件末尾未写完的行（上次运行中断时），返回最后一条完整记录的序号"""
+        path = os.path.join(self.directory, segment_name(segment))
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            start = f.seek(max(0, size - 64 * 1024))
+            tail_bytes = f.read()
+            if tail_bytes and not tail_bytes.endswith(b'\n'):
+                f.truncate(start + tail_bytes.rfind(b'\n') + 1)
+        lines = tail_bytes.split(b'\n')
+        for line in reversed(lines[:-1]):
+            try:
+                return json.loads(line)["seq"]
+            except Exception:
+                continue
+        return 0
+
+    def append(self, url, path, title, content_hash, size, changed, fetched_at=None):
+        """追加一条页面记录，返回记录的offset（该记录之后的位置）"""
+        with self.lock:
+            self.seq += 1
+            record = {
+                "seq": self.seq,
+                "url": url,
+                "path": path,
+                "title": title,
+                "hash": content_hash,
+                "size": size,
+                "fetched_at": fetched_at or time.time(),
+                "changed": changed,
+            }
+            line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+            if self.file.tell() and self.file.tell() + len(line) > self.segment_bytes:
+                self.rotate()
+            self.file.write(line)
+            self.file.flush()
+            self.records += 1
+            return format_offset(self.segment, self.file.tell())
+
+    def rotate(self):
+        """切换到下一段，删除超出保留数量的旧段"""
+        self.file.close()
+        self.segment += 1
+        self.file = open(os.path.join(self.directory, segment_name(self.segment)), 'ab')
+        for number in list_segments(self.directory)[:-self.max_segments]:
+            try:
+                os.remove(os.path.join(self.directory, segment_name(number)))
+            except OSError:
+                pass
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_feed(directory, offset=None):
+    """从offset开始读取当前已写入的完整记录，逐条返回 (记录, 该记录之后的offset)"""
+    segments = list_segments(directory)
+    if not segments:
+        return
+    start = parse_offset(offset)
+    if start is None:
+        segment, position = segments[0], 0
+    else:
+        segment, position = start
+        if segment < segments[0]:
+            logger.warning(f"offset {offset} 所在的段已被删除，从最早的段 {segments[0]} 开始读取")
+            segment, position = segments[0], 0
+
+    for number in segments:
+        if number < segment:
+            continue
+        if number > segment:
+            position = 0
+        with open(os.path.join(directory, segment_name(number)), 'rb') as f:
+            f.seek(position)
+            for line in f:
+                # 末尾尚未写完的行下次再读
+                if not line.endswith(b'\n'):
+                    break
+                position += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"跳过无法解析的记录: 段 {number}，位置 {position - len(line)}")
+                    continue
+                yield record, format_offset(number, position)
+
+
+def tail(directory, offset=None, follow=False, offset_file=None, out=sys.stdout):
+    """输出offset之后的记录；follow时持续等待新记录，offset_file保存读取位置"""
+    if offset is None and offset_file and os.path.exists(offset_file):
+        with open(offset_file, 'r', encoding='utf-8') as f:
+            offset = f.read().strip() or None
+    while True:
+        count = 0
+        for record, offset in read_feed(directory, offset):
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+        if count:
+            out.flush()
+            if offset_file:
+                tmp_path = f"{offset_file}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(offset)
+                os.replace(tmp_path, offset_file)
+        if not follow:
+            return offset
+        time.sleep(FOLLOW_INTERVAL)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="页面变更流工具")
+    parser.add_argument('command', choices=['tail'])
+    parser.add_argument('output_dir', help="爬虫的输出目录")
+    parser.add_argument('--offset', help="从该位置（段号:字节偏移）之后开始读取，默认从最早的记录开始")
+    parser.add_argument('--offset-file', help="读取并保存读取位置的文件，用于增量消费")
+    parser.add_argument('--follow', action='store_true', help="持续等待新记录")
+    args = parser.parse_args()
+
+    try:
+        offset = tail(os.path.join(args.output_dir, FEED_DIRNAME), args.offset, args.follow, args.offset_file)
+    except KeyboardInterrupt:
+        return
+    if offset:
+        logger.info(f"读取位置: {offset}")
+
+
+if __name__ == "__main__":
+    main()
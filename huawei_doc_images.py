@@ -0,0 +1,403 @@
+"""下载图片的压缩与去重（需要Pillow）
+
+文档中的PNG截图往往很大，而且同一张图片常以不同的 _v 版本后缀重复下载，离线镜像的
+大部分空间被图片占用。该后处理阶段在进程池中处理 resources/img 下的图片:
+- lossless: PNG无损重新压缩（JPEG的无损优化需要jpegtran，这里不处理）；
+- webp: 转为WebP（PNG使用无损WebP，JPEG使用有损WebP），只保留变小的结果；
+- 去重: 尺寸相同、差异哈希（dHash）足够接近且解码后的像素完全相同的图片只保留最小的一份
+  （只差几行文字的截图dHash也很接近，必须逐像素确认，避免把不同的图片当作重复删除）。
+
+小于大小阈值的图片不重新编码，但仍参与去重。转码或去重后的路径记录在
+resources/image_map.json 中，页面（包括框架去重存储的页面记录和模板）和 resources/css 下
+样式表中的引用被改写为保留的图片，全部改写完成后才删除被替换的原图；之后的抓取直接使用
+映射后的图片，不再重复下载。
+
+用法:
+    python huawei_doc_images.py optimize huawei_docs_full --mode webp
+    python huawei_doc_scraper_advanced.py --optimize-images webp
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger("huawei_scraper")
+
+IMAGE_MAP_NAME = "image_map.json"
+IMAGE_MODES = ('lossless', 'webp')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+# 小于该大小（字节）的图片不重新编码
+DEFAULT_MIN_BYTES = 32 * 1024
+# 有损WebP的质量
+WEBP_QUALITY = 85
+# dHash的边长（哈希共 DHASH_SIZE * DHASH_SIZE 位），以及视为重复的最大汉明距离
+DHASH_SIZE = 16
+DEDUP_DISTANCE = 4
+
+# 页面中对图片资源的引用（output_dir相对路径或页面相对路径都以 resources/img/ 开头）
+IMAGE_REF_PATTERN = re.compile(r'resources/img/[^"\'\s()<>?#\\]+')
+# resources/css 下的样式表以相对样式表的 ../img/ 形式引用图片
+CSS_IMAGE_REF_PATTERN = re.compile(r'\.\./img/[^"\'\s()<>?#\\]+')
+
+
+def load_image_map(resources_dir):
+    """已转码或去重的图片: 原相对路径 -> 保留的相对路径"""
+    path = os.path.join(resources_dir, IMAGE_MAP_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)["map"]
+    except Exception as e:
+        logger.warning(f"读取图片映射失败，忽略: {e}")
+        return {}
+
+
+def dhash(image):
+    """差异哈希：缩小为灰度图后比较相邻像素的亮度"""
+    from PIL import Image
+
+    small = image.convert('L').resize((DHASH_SIZE + 1, DHASH_SIZE), Image.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(DHASH_SIZE):
+        offset = row * (DHASH_SIZE + 1)
+        for col in range(DHASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def pixel_hash(image):
+    """解码后像素的SHA-256（与文件编码方式无关），用于确认dHash相近的图片确实相同"""
+    return hashlib.sha256(image.convert('RGBA').tobytes()).hexdigest()
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def optimize_image(path, target, mode, min_bytes):
+    """在工作进程中处理一张图片
+
+    target为转码后的路径（None表示不转码）。返回 {path, size_before, size, width, height, dhash, pixels}，
+    path为处理后的文件，pixels为像素哈希（动图为None，不参与去重）；无法识别的图片返回None。
+    转码后的原图不在这里删除，由主进程在改写完所有引用之后删除。
+    """
+    from PIL import Image
+
+    size_before = os.path.getsize(path)
+    try:
+        with Image.open(path) as image:
+            image.load()
+            animated = getattr(image, 'is_animated', False)
+            result = {"path": path, "size_before": size_before, "size": size_before,
+                      "width": image.width, "height": image.height, "dhash": dhash(image),
+                      "pixels": None if animated else pixel_hash(image)}
+            if size_before < min_bytes or animated:
+                return result
+
+            tmp_path = None
+            if mode == 'webp' and target and image.format in ('PNG', 'JPEG'):
+                tmp_path = f"{target}.tmp"
+                if image.format == 'PNG':
+                    image.save(tmp_path, 'WEBP', lossless=True, method=6)
+                else:
+                    image.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=6)
+                out_path = target
+            elif image.format == 'PNG':
+                tmp_path = f"{path}.tmp"
+                image.save(tmp_path, 'PNG', optimize=True)
+                out_path = path
+    except Exception as e:
+        logger.warning(f"处理图片失败 ({path}): {e}")
+        return None
+
+    if tmp_path is None:
+        return result
+    size = os.path.getsize(tmp_path)
+    if size >= size_before:
+        os.remove(tmp_path)
+        return result
+    os.replace(tmp_path, out_path)
+    result.update(path=out_path, size=size)
+    return result
+
+
+def directory_size(directory):
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def rewrite_file(file_path, pattern, replace):
+    """按pattern改写文件中的图片引用，返回文件是否被改写"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        new_content = pattern.sub(replace, content)
+        if new_content == content:
+            return False
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(new_content)
+        os.replace(tmp_path, file_path)
+        return True
+    except Exception as e:
+        logger.warning(f"改写文件中的图片引用失败 ({file_path}): {e}")
+        return False
+
+
+def rewrite_image_refs(output_dir, resources_dir, mapping):
+    """把页面、页面记录、模板和样式表中对图片的引用改写为保留的图片，返回改写的文件数"""
+    if not mapping:
+        return 0
+
+    def replace(match):
+        return mapping.get(match.group(0), match.group(0))
+
+    def replace_css(match):
+        target = mapping.get(f"resources/img/{match.group(0)[len('../img/'):]}")
+        return f"../img/{target[len('resources/img/'):]}" if target else match.group(0)
+
+    count = 0
+    for root, dirs, files in os.walk(output_dir):
+        if root == output_dir and os.path.basename(resources_dir) in dirs:
+            dirs.remove(os.path.basename(resources_dir))
+        for name in files:
+            if name.endswith('.html') or name.endswith('.page.json'):
+                count += rewrite_file(os.path.join(root, name), IMAGE_REF_PATTERN, replace)
+    css_dir = os.path.join(resources_dir, "css")
+    if os.path.isdir(css_dir):
+        for name in os.listdir(css_dir):
+            if name.endswith('.css'):
+                count += rewrite_file(os.path.join(css_dir, name), CSS_IMAGE_REF_PATTERN, replace_css)
+    return count
+
+
+class ImageOptimizer:
+    """压缩、转码和去重 resources/img 下的图片，并改写页面中的引用"""
+
+    def __init__(self, output_dir, mode='lossless', min_bytes=DEFAULT_MIN_BYTES, workers=None,
+                 manifest_path=None):
+        self.output_dir = output_dir
+        self.resources_dir = os.path.join(output_dir, "resources")
+        self.image_dir = os.path.join(self.resources_dir, "img")
+        self.mode = mode
+        self.min_bytes = min_bytes
+        self.workers = workers or os.cpu_count() or 1
+        self.manifest_path = manifest_path
+        self.map_path = os.path.join(self.resources_dir, IMAGE_MAP_NAME)
+        self.mapping = load_image_map(self.resources_dir)
+        # 之前已处理过的图片: 相对路径 -> 处理后的大小（大小未变化时不再处理）
+        self.done = {}
+        if os.path.exists(self.map_path):
+            try:
+                with open(self.map_path, 'r', encoding='utf-8') as f:
+                    self.done = json.load(f).get("done", {})
+            except Exception:
+                pass
+
+    def relative(self, path):
+        return os.path.relpath(path, self.output_dir).replace('\\', '/')
+
+    def collect(self):
+        """待处理的图片及其转码目标路径"""
+        tasks = []
+        if not os.path.isdir(self.image_dir):
+            return tasks
+        names = set(os.listdir(self.image_dir))
+        for name in sorted(names):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            path = os.path.join(self.image_dir, name)
+            if self.done.get(self.relative(path), {}).get("size") == os.path.getsize(path):
+                continue
+            target = None
+            if self.mode == 'webp' and not name.lower().endswith(('.webp', '.gif')):
+                # 转码后的文件名不能与已有文件冲突
+                target_name = f"{os.path.splitext(name)[0]}.webp"
+                if target_name in names:
+                    target_name = f"{name}.webp"
+                names.add(target_name)
+                target = os.path.join(self.image_dir, target_name)
+            tasks.append((path, target))
+        return tasks
+
+    def run(self):
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            logger.warning("图片优化需要安装Pillow (pip install Pillow)，跳过")
+            return None
+
+        mirror_before = directory_size(self.output_dir)
+        tasks = self.collect()
+        start = time.perf_counter()
+        results = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(optimize_image, path, target, self.mode, self.min_bytes)
+                       for path, target in tasks]
+            for (path, _), future in zip(tasks, futures):
+                result = future.result()
+                if result is not None:
+                    results.append((path, result))
+
+        mapping = {}
+        removed = []
+        for path, result in results:
+            if result["path"] != path:
+                mapping[self.relative(path)] = self.relative(result["path"])
+                removed.append(path)
+        transcoded = len(mapping)
+        results = [result for _, result in results]
+        for result in results:
+            self.done[self.relative(result["path"])] = {k: result[k] for k in ("size", "width", "height", "dhash", "pixels")}
+
+        duplicates, duplicate_bytes = self.deduplicate(mapping, removed)
+        self.update_mapping(mapping)
+        rewritten = rewrite_image_refs(self.output_dir, self.resources_dir, self.mapping)
+        self.update_manifest(mapping)
+        self.save()
+        # 所有引用都已改写为保留的图片后才删除被替换的原图
+        for path in removed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        seconds = time.perf_counter() - start
+        bytes_before = sum(result["size_before"] for result in results)
+        bytes_after = sum(result["size"] for result in results)
+        mirror_after = directory_size(self.output_dir)
+        stats = {
+            "images": len(results),
+            "bytes_before": bytes_before,
+            "bytes_after": bytes_after,
+            "transcoded": transcoded,
+            "duplicates": duplicates,
+            "duplicate_bytes": duplicate_bytes,
+            "pages_rewritten": rewritten,
+            "mirror_before": mirror_before,
+            "mirror_after": mirror_after,
+            "seconds": seconds,
+        }
+        self.report(stats)
+        return stats
+
+    def deduplicate(self, mapping, removed):
+        """尺寸相同、dHash相近且像素相同的图片只保留最小的一份，返回 (删除的图片数, 节省的字节数)
+
+        重复的图片加入removed，在引用改写完成后删除。之前运行记录的图片没有像素哈希，无法确认，不参与去重。
+        """
+        buckets = {}
+        for rel_path, info in self.done.items():
+            if os.path.exists(os.path.join(self.output_dir, rel_path)):
+                buckets.setdefault((info["width"], info["height"]), []).append((info["size"], rel_path, info))
+        duplicates = 0
+        saved = 0
+        for items in buckets.values():
+            if len(items) < 2:
+                continue
+            kept = []
+            for size, rel_path, info in sorted(items, key=lambda item: item[:2]):
+                pixels = info.get("pixels")
+                original = None
+                if pixels:
+                    original = next((keep for keep in kept if hamming(keep[1], info["dhash"]) <= DEDUP_DISTANCE
+                                     and keep[2] == pixels), None)
+                if original is None:
+                    kept.append((rel_path, info["dhash"], pixels))
+                    continue
+                mapping[rel_path] = original[0]
+                for source, target in mapping.items():
+                    if target == rel_path:
+                        mapping[source] = original[0]
+                removed.append(os.path.join(self.output_dir, rel_path))
+                del self.done[rel_path]
+                duplicates += 1
+                saved += size
+        return duplicates, saved
+
+    def update_mapping(self, mapping):
+        """合并本次的映射，并把之前映射到已删除图片的路径指向新的保留图片"""
+        for source, target in list(self.mapping.items()):
+            while target in mapping:
+                target = mapping[target]
+            self.mapping[source] = target
+        self.mapping.update(mapping)
+
+    def update_manifest(self, mapping):
+        """资源清单中的条目移动到保留的图片下，原URL记录为别名"""
+        if not self.manifest_path or not mapping or not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        for source, target in mapping.items():
+            entry = manifest.pop(source, None)
+            if entry is None:
+                continue
+            kept = manifest.setdefault(target, dict(entry))
+            if kept is not entry and kept.get('url') != entry['url']:
+                aliases = kept.setdefault('aliases', [])
+                if entry['url'] not in aliases:
+                    aliases.append(entry['url'])
+        for target in set(mapping.values()):
+            entry = manifest.get(target)
+            path = os.path.join(self.output_dir, target)
+            if entry is None or not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                entry['sha256'] = hashlib.sha256(f.read()).hexdigest()
+            entry['size'] = os.path.getsize(path)
+            if target.endswith('.webp'):
+                entry['content_type'] = 'image/webp'
+        with open(f"{self.manifest_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(f"{self.manifest_path}.tmp", self.manifest_path)
+
+    def save(self):
+        tmp_path = f"{self.map_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"map": self.mapping, "done": self.done}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.map_path)
+
+    def report(self, stats):
+        seconds = stats["seconds"] or 1e-9
+        logger.info(f"图片优化 [{self.mode}]: 处理 {stats['images']} 张图片，"
+                    f"{stats['bytes_before'] / 2 ** 20:.1f} MB -> {stats['bytes_after'] / 2 ** 20:.1f} MB，"
+                    f"转码 {stats['transcoded']} 张，去重删除 {stats['duplicates']} 张 "
+                    f"({stats['duplicate_bytes'] / 2 ** 20:.1f} MB)，改写 {stats['pages_rewritten']} 个页面文件")
+        logger.info(f"图片优化耗时 {stats['seconds']:.1f} 秒 ({stats['images'] / seconds:.1f} 张/秒，"
+                    f"{stats['bytes_before'] / 2 ** 20 / seconds:.1f} MB/秒)，"
+                    f"镜像总大小 {stats['mirror_before'] / 2 ** 20:.1f} MB -> {stats['mirror_after'] / 2 ** 20:.1f} MB")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="图片压缩与去重工具")
+    parser.add_argument('command', choices=['optimize'])
+    parser.add_argument('output_dir', help="爬虫的输出目录")
+    parser.add_argument('--mode', choices=IMAGE_MODES, default='lossless', help="压缩方式")
+    parser.add_argument('--min-bytes', type=int, default=DEFAULT_MIN_BYTES, help="小于该大小的图片不重新编码")
+    parser.add_argument('--workers', type=int, help="进程数（默认CPU核数）")
+    args = parser.parse_args()
+
+    from huawei_doc_engine import ASSET_MANIFEST_NAME
+
+    optimizer = ImageOptimizer(args.output_dir, args.mode, args.min_bytes, args.workers,
+                               os.path.join(args.output_dir, "resources", ASSET_MANIFEST_NAME))
+    optimizer.run()
+
+
+if __name__ == "__main__":
+    main()
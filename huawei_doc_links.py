@@ -0,0 +1,225 @@
+"""文档内部链接本地化
+
+保存页面时登记 规范URL -> 本地路径 的索引（output_dir/link_index.json），并把页面中
+指向已保存页面的 <a href> 改写为相对本地路径，离线镜像中的链接不再访问网络。
+原始URL保存在 data-origin-href 属性中，目标页面的路径变化后可以重新改写。
+
+页面可能先于其链接目标被保存：这些链接暂时保留原始URL并登记为待解析，
+抓取结束时的增量后处理只重新改写待解析目标已经保存（或目标路径发生变化）的页面。
+
+索引同时负责分配页面路径：按URL截断目录层次后与其他URL的页面路径冲突时，
+在文件名后加上URL哈希。
+
+用法:
+    python huawei_doc_links.py relink <output_dir>   # 增量改写
+    python huawei_doc_links.py relink <output_dir> --all
+"""
+import argparse
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import threading
+from urllib.parse import urljoin, urlparse
+
+from huawei_doc_scheduler import default_section
+from huawei_doc_storage import PAGE_SUFFIX, ShellStore, reassemble_file
+from huawei_doc_urlset import canonical_url
+
+logger = logging.getLogger("huawei_scraper")
+
+LINK_INDEX_NAME = "link_index.json"
+ORIGIN_ATTR = "data-origin-href"
+
+A_TAG_PATTERN = re.compile(r'<a\b[^>]*>', re.IGNORECASE)
+HREF_PATTERN = re.compile(r'''\shref\s*=\s*(["'])(.*?)\1''', re.IGNORECASE | re.DOTALL)
+ORIGIN_PATTERN = re.compile(rf'''\s{ORIGIN_ATTR}\s*=\s*(["'])(.*?)\1''', re.IGNORECASE | re.DOTALL)
+
+
+def rewrite_links(content, page_url, page_path, urls):
+    """把指向已索引页面的<a href>改写为相对路径
+
+    page_path为页面（还原后）相对output_dir的路径，urls为 规范URL -> 相对路径。
+    返回 (改写后的HTML, {已解析的目标: 使用的路径}, 待解析的目标集合)。
+    """
+    site_netloc = urlparse(page_url).netloc
+    page_dir = os.path.dirname(page_path)
+    resolved = {}
+    pending = set()
+
+    def replace(match):
+        tag = match.group(0)
+        href = HREF_PATTERN.search(tag)
+        if href is None:
+            return tag
+        origin = ORIGIN_PATTERN.search(tag)
+        raw = html.unescape((origin or href).group(2)).strip()
+        if not raw or raw.startswith('#') or raw.startswith('javascript:'):
+            return tag
+        absolute = urljoin(page_url, raw)
+        if urlparse(absolute).netloc != site_netloc:
+            return tag
+        key = canonical_url(absolute)
+        target = urls.get(key)
+        if target is None:
+            pending.add(key)
+            return tag
+        resolved[key] = target
+        local = os.path.relpath(target, page_dir).replace('\\', '/')
+        fragment = urlparse(absolute).fragment
+        if fragment:
+            local = f"{local}#{fragment}"
+        tag = f'{tag[:href.start()]} href="{html.escape(local)}"{tag[href.end():]}'
+        if origin is None:
+            tag = f'{tag[:2]} {ORIGIN_ATTR}="{html.escape(absolute)}"{tag[2:]}'
+        return tag
+
+    return A_TAG_PATTERN.sub(replace, content), resolved, pending
+
+
+def logical_path(stored_path):
+    """页面还原后的路径（框架去重存储的 .page.json 对应 .html）"""
+    if stored_path.endswith(PAGE_SUFFIX):
+        return stored_path[:-len(PAGE_SUFFIX)] + '.html'
+    return stored_path
+
+
+class LinkIndex:
+    """规范URL -> 本地路径的持久化索引，以及每个页面的链接解析状态"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, LINK_INDEX_NAME)
+        self.lock = threading.Lock()
+        # 规范URL -> 页面（还原后）相对output_dir的路径
+        self.urls = {}
+        # 规范URL -> {url, stored: 实际保存的相对路径, targets: {目标: 使用的路径}, pending: [目标]}
+        self.pages = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.urls = data["urls"]
+                self.pages = data["pages"]
+            except Exception as e:
+                logger.warning(f"读取链接索引失败，将重新生成: {e}")
+        self.owners = {path: key for key, path in self.urls.items()}
+
+    def relative(self, path):
+        return os.path.relpath(path, self.output_dir).replace('\\', '/')
+
+    def claim_path(self, url, file_path):
+        """为页面分配不与其他URL冲突的保存路径"""
+        key = canonical_url(url)
+        with self.lock:
+            rel_path = self.relative(file_path)
+            owner = self.owners.get(rel_path)
+            if owner is not None and owner != key:
+                base, ext = os.path.splitext(file_path)
+                file_path = f"{base}_{hashlib.md5(key.encode('utf-8')).hexdigest()[:8]}{ext}"
+                logger.info(f"页面路径冲突，改为: {file_path}")
+                rel_path = self.relative(file_path)
+            self.owners[rel_path] = key
+        return file_path
+
+    def rewrite(self, content, url, file_path):
+        """改写即将保存到file_path（还原后的路径）的页面"""
+        return rewrite_links(content, url, self.relative(file_path), self.urls)
+
+    def record(self, url, stored_path, resolved, pending):
+        """登记已保存的页面"""
+        key = canonical_url(url)
+        with self.lock:
+            rel_path = self.relative(logical_path(stored_path))
+            old_path = self.urls.get(key)
+            if old_path and old_path != rel_path and self.owners.get(old_path) == key:
+                del self.owners[old_path]
+            self.urls[key] = rel_path
+            self.owners[rel_path] = key
+            self.pages[key] = {
+                "url": url,
+                "stored": self.relative(stored_path),
+                "targets": resolved,
+                "pending": sorted(pending),
+            }
+
+    def stale_pages(self):
+        """需要重新改写的页面：待解析目标已保存，或已解析目标的路径发生了变化"""
+        stale = []
+        for key, page in self.pages.items():
+            if (any(target in self.urls for target in page["pending"])
+                    or any(self.urls.get(target) != path for target, path in page["targets"].items())):
+                stale.append(key)
+        return stale
+
+    def relink(self, keys=None, on_rewrite=None):
+        """重新改写页面（默认只改写需要更新的页面），返回改写的页面数
+
+        on_rewrite(url, 保存路径, 完整页面) 在每个页面改写后调用（例如向变更流追加新记录）。
+        """
+        keys = self.stale_pages() if keys is None else keys
+        shell_store = None
+        count = 0
+        for key in keys:
+            page = self.pages[key]
+            stored_path = os.path.join(self.output_dir, page["stored"])
+            if not os.path.exists(stored_path):
+                continue
+            shell = stored_path.endswith(PAGE_SUFFIX)
+            if shell:
+                content = reassemble_file(stored_path, self.output_dir)
+            else:
+                with open(stored_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            new_content, resolved, pending = rewrite_links(
+                content, page["url"], self.relative(logical_path(stored_path)), self.urls)
+            if new_content != content:
+                if shell:
+                    shell_store = shell_store or ShellStore(self.output_dir)
+                    # 差异不比完整页面小时改为保存完整页面，保存路径随之变化
+                    stored_path = shell_store.save(new_content, logical_path(stored_path), default_section(page["url"]))
+                    page["stored"] = self.relative(stored_path)
+                else:
+                    with open(stored_path, 'w', encoding='utf-8') as f:
+                        f.write(new_content)
+                count += 1
+                if on_rewrite is not None:
+                    on_rewrite(page["url"], stored_path, new_content)
+            page["targets"] = resolved
+            page["pending"] = sorted(pending)
+        return count
+
+    def merge(self, other):
+        """合并另一个索引（分布式抓取合并节点结果时使用）"""
+        with self.lock:
+            self.urls.update(other.urls)
+            self.pages.update(other.pages)
+            self.owners = {path: key for key, path in self.urls.items()}
+
+    def save(self):
+        with self.lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"urls": self.urls, "pages": self.pages}, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="文档内部链接本地化工具")
+    parser.add_argument('command', choices=['relink'])
+    parser.add_argument('output_dir', help="爬虫的输出目录")
+    parser.add_argument('--all', action='store_true', help="重新改写所有页面，而不只是需要更新的页面")
+    args = parser.parse_args()
+
+    index = LinkIndex(args.output_dir)
+    count = index.relink(list(index.pages) if args.all else None)
+    index.save()
+    logger.info(f"已重新改写 {count} 个页面的链接（索引中共 {len(index.urls)} 个页面）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""页面预检
+
+在启动浏览器渲染之前，先用HEAD请求（不支持时用只读响应头的GET请求）检查页面的
+HTTP状态并解析重定向。404、410页面不再进入浏览器；5xx和网络错误可能是临时的，
+仍交给浏览器渲染（由渲染的重试处理）。重定向后的目标URL用于去重，多个URL指向
+同一页面时只渲染一次。
+
+预检结果按规范URL缓存，保存在 output_dir/preflight_cache.json，后续运行在有效期内
+直接使用缓存结果。单页应用对不存在的文档可能仍返回200，这类页面仍由渲染后的
+错误页面检查识别。
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("huawei_scraper")
+
+PREFLIGHT_NAME = "preflight_cache.json"
+PREFLIGHT_TIMEOUT = (5, 10)
+
+# 确定为错误页面、不再渲染的状态码及其缓存时间（秒）
+ERROR_TTL = {
+    404: 7 * 86400,
+    410: 30 * 86400,
+}
+# 正常页面（包括重定向目标）的缓存时间
+OK_TTL = 86400
+# HEAD不被支持时改用GET
+HEAD_UNSUPPORTED = {405, 501}
+# 限流是临时状态，与5xx一样不写入缓存
+UNCACHED_STATUS = {429}
+
+
+class Preflight:
+    """带缓存的页面状态预检"""
+
+    def __init__(self, session, path):
+        self.session = session
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.checked = 0
+        self.cache_hits = 0
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                logger.warning(f"读取预检缓存失败，忽略: {e}")
+        now = time.time()
+        self.entries = {key: entry for key, entry in self.entries.items()
+                        if entry["expires_at"] > now and entry["status"] not in UNCACHED_STATUS}
+
+    def request(self, url):
+        """返回 (状态码, 重定向后的URL)"""
+        response = self.session.head(url, allow_redirects=True, timeout=PREFLIGHT_TIMEOUT)
+        if response.status_code in HEAD_UNSUPPORTED:
+            response = self.session.get(url, allow_redirects=True, timeout=PREFLIGHT_TIMEOUT, stream=True)
+            response.close()
+        return response.status_code, response.url
+
+    def check(self, url, key):
+        """预检页面，返回 {status, final_url, ok, cached}；key为URL的规范形式
+
+        网络错误、5xx或无法判断时视为正常页面，交给浏览器渲染。cached为True表示结果来自缓存，
+        没有实际发出请求。
+        """
+        entry = self.entries.get(key)
+        if entry is not None and entry["expires_at"] > time.time():
+            with self.lock:
+                self.cache_hits += 1
+            return dict(entry, cached=True)
+
+        try:
+            status, final_url = self.request(url)
+        except Exception as e:
+            logger.debug(f"预检失败，直接渲染: {url}，错误: {e}")
+            return {"status": None, "final_url": url, "ok": True, "cached": False}
+
+        ok = status not in ERROR_TTL
+        entry = {"status": status, "final_url": final_url, "ok": ok}
+        with self.lock:
+            self.checked += 1
+            # 5xx和429可能是临时错误，不写入缓存
+            if status < 500 and status not in UNCACHED_STATUS:
+                entry["expires_at"] = time.time() + ERROR_TTL.get(status, OK_TTL)
+                self.entries[key] = entry
+        return dict(entry, cached=False)
+
+    def save(self):
+        with self.lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def report(self):
+        logger.info(f"页面预检: 请求 {self.checked} 次，缓存命中 {self.cache_hits} 次")
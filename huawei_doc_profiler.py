@@ -0,0 +1,173 @@
+"""抓取性能分析
+
+采样式分析器：后台线程定期采样所有抓取线程的调用栈（默认每5毫秒一次），
+同时统计各抓取阶段的耗时和主动延迟（sleep）的时间。抓取结束时在 output_dir/profile/
+下生成:
+- collapsed.txt: 折叠调用栈，可直接用 flamegraph.pl 或 speedscope 生成火焰图；
+- report.txt: 按自身耗时排序的函数、各阶段耗时，以及主动延迟与实际工作的时间对比。
+
+采样只能看到本进程的线程，而页面解析和改写（CPU阶段）平时在进程池中执行。采样开启期间
+CPU阶段改在抓取线程中执行，其调用栈才会出现在结果中；这时CPU阶段受GIL限制，
+抓取吞吐会低于未开启分析时。
+
+启用方式（无需修改代码）:
+- 命令行参数 --profile，或环境变量 HUAWEI_SCRAPER_PROFILE=1；
+- 运行中向进程发送 SIGUSR1 信号开启/暂停采样（仅限POSIX系统）。
+"""
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+logger = logging.getLogger("huawei_scraper")
+
+PROFILE_DIRNAME = "profile"
+PROFILE_ENV = "HUAWEI_SCRAPER_PROFILE"
+DEFAULT_INTERVAL = 0.005
+# 报告中列出的函数数
+TOP_FUNCTIONS = 30
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """采样调用栈、统计阶段耗时和主动延迟"""
+
+    def __init__(self, output_dir, interval=DEFAULT_INTERVAL):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.thread = None
+        self.finished = threading.Event()
+
+        self.stacks = Counter()
+        self.self_samples = Counter()
+        self.samples = 0
+        self.sampling_seconds = 0.0
+        self.stage_seconds = defaultdict(float)
+        self.stage_calls = Counter()
+        self.sleep_seconds = 0.0
+
+    def start(self):
+        """开始（或恢复）采样"""
+        self.enabled = True
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+            self.thread.start()
+        logger.info(f"性能分析已开启，采样间隔 {self.interval * 1000:.0f} 毫秒")
+
+    def toggle(self, *_):
+        """开启/暂停采样（用作信号处理函数）"""
+        if self.enabled:
+            self.enabled = False
+            logger.info("性能分析已暂停")
+        else:
+            self.start()
+
+    def install_signal(self):
+        """收到SIGUSR1时开启/暂停采样"""
+        import signal
+
+        if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, self.toggle)
+
+    def run(self):
+        last = time.perf_counter()
+        while not self.finished.wait(self.interval):
+            now = time.perf_counter()
+            if self.enabled:
+                self.sample()
+                self.sampling_seconds += now - last
+            last = now
+
+    def sample(self):
+        own = threading.get_ident()
+        # 同类线程合并为一个根节点（crawler-0、crawler-1 -> crawler）
+        names = {thread.ident: re.sub(r'[-_]?\d+$', '', thread.name) for thread in threading.enumerate()}
+        with self.lock:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, "thread"))
+                stack.reverse()
+                self.stacks[';'.join(stack)] += 1
+                self.self_samples[stack[-1]] += 1
+            self.samples += 1
+
+    def instrument(self, obj, names):
+        """为对象的方法加上阶段计时（未开启分析时只多一次判断）"""
+        for name in names:
+            method = getattr(obj, name)
+
+            @functools.wraps(method)
+            def timed(*args, _method=method, _name=name, **kwargs):
+                if not self.enabled:
+                    return _method(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return _method(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    with self.lock:
+                        self.stage_seconds[_name] += elapsed
+                        self.stage_calls[_name] += 1
+
+            setattr(obj, name, timed)
+
+    def record_sleep(self, seconds):
+        if self.enabled:
+            with self.lock:
+                self.sleep_seconds += seconds
+
+    def stop(self):
+        self.enabled = False
+        self.finished.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def report_lines(self, wall_seconds):
+        lines = [f"采样 {self.samples} 次，采样时长 {self.sampling_seconds:.1f} 秒", ""]
+
+        total = sum(self.self_samples.values()) or 1
+        lines.append(f"按自身耗时排序的函数（前 {TOP_FUNCTIONS} 个，所有线程合计）:")
+        for label, count in self.self_samples.most_common(TOP_FUNCTIONS):
+            lines.append(f"  {count * self.interval:9.2f} 秒  {count / total:6.1%}  {label}")
+        lines.append("")
+
+        lines.append("各阶段耗时（包含子阶段）:")
+        for name, seconds in sorted(self.stage_seconds.items(), key=lambda item: -item[1]):
+            calls = self.stage_calls[name]
+            lines.append(f"  {name:24s} {seconds:9.2f} 秒  {calls:6d} 次  平均 {seconds / calls * 1000:8.1f} 毫秒")
+        lines.append("")
+
+        lines.append(f"主动延迟 {self.sleep_seconds:.1f} 秒，抓取线程总耗时约 {wall_seconds:.1f} 秒 "
+                     f"(延迟占 {self.sleep_seconds / wall_seconds:.1%})" if wall_seconds else
+                     f"主动延迟 {self.sleep_seconds:.1f} 秒")
+        return lines
+
+    def report(self, wall_seconds):
+        """写出折叠调用栈和分析报告，wall_seconds为所有抓取线程的总耗时"""
+        self.stop()
+        if not self.samples and not self.stage_calls:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(os.path.join(self.output_dir, 'collapsed.txt'), 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        lines = self.report_lines(wall_seconds)
+        with open(os.path.join(self.output_dir, 'report.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        for line in lines:
+            logger.info(line)
+        logger.info(f"性能分析结果已保存到 {self.output_dir}")
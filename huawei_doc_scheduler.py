@@ -0,0 +1,242 @@
+"""优先级调度器
+
+按栏目匹配、深度、陈旧程度和变化可能性为待抓取URL打分，分数高的页面优先抓取，
+并为每个栏目限制页面数和耗时。整体时间预算耗尽后不再分配新页面，
+使限时抓取优先覆盖最重要的内容。
+"""
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlparse
+
+from huawei_doc_breaker import page_keys
+
+logger = logging.getLogger("huawei_scraper")
+
+HISTORY_NAME = "crawl_history.json"
+
+# 打分权重
+SECTION_WEIGHT = 10.0   # 栏目权重的系数
+TARGET_BONUS = 5.0      # 匹配include规则的页面
+DEPTH_PENALTY = 2.0     # 每深一层扣分
+STALENESS_WEIGHT = 0.5  # 每陈旧一天加分
+STALENESS_CAP = 30      # 陈旧天数上限
+CHANGE_WEIGHT = 5.0     # 历史上的变化概率（0~1）
+
+
+def match_section(url, sections):
+    """返回URL所属栏目的配置，未匹配任何声明的栏目时返回None"""
+    for section in sections:
+        for rule in section["match"]:
+            if (url.startswith(rule) if rule.startswith('http') else rule in url):
+                return section
+    return None
+
+
+def default_section(url):
+    """未声明栏目时，以 /doc/ 后的第一级目录作为栏目"""
+    parts = urlparse(url).path.split('/doc/', 1)
+    if len(parts) == 2 and parts[1]:
+        return parts[1].split('/')[0]
+    return "other"
+
+
+class CrawlHistory:
+    """跨运行的抓取历史：上次抓取时间、内容哈希、抓取次数和变化次数"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                logger.warning(f"读取抓取历史失败，忽略: {e}")
+
+    def get(self, url):
+        return self.entries.get(url)
+
+    def staleness_days(self, url, now=None):
+        """距上次抓取的天数，从未抓取过的页面视为最陈旧"""
+        entry = self.entries.get(url)
+        if not entry:
+            return STALENESS_CAP
+        now = now or time.time()
+        return min(STALENESS_CAP, (now - entry["fetched_at"]) / 86400)
+
+    def change_probability(self, url):
+        """页面内容发生变化的估计概率（拉普拉斯平滑）"""
+        entry = self.entries.get(url)
+        if not entry:
+            return 0.5
+        return (entry["changes"] + 1) / (entry["fetches"] + 2)
+
+    def record(self, url, content_hash):
+        """记录一次抓取，返回内容是否发生变化"""
+        with self.lock:
+            entry = self.entries.get(url)
+            changed = entry is None or entry["hash"] != content_hash
+            if entry is None:
+                entry = {"fetches": 0, "changes": 0}
+                self.entries[url] = entry
+            entry["fetches"] += 1
+            if changed and entry.get("hash"):
+                entry["changes"] += 1
+            entry["hash"] = content_hash
+            entry["fetched_at"] = time.time()
+            return changed
+
+    def save(self):
+        with self.lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+class PriorityFrontier:
+    """按分数排序的待抓取队列，支持多个抓取线程共同消费
+
+    每个栏目可以声明 max_pages 和 max_seconds 预算，超出预算的URL被丢弃；
+    time_budget 为整次抓取的时间预算（秒），耗尽后不再分配新页面；
+    breakers 为熔断器，域名或栏目熔断期间其URL暂停分配，冷却结束后重新进入队列。
+    """
+
+    def __init__(self, sections=(), history=None, time_budget=None, breakers=None):
+        self.sections = list(sections)
+        self.history = history
+        self.breakers = breakers
+        # 熔断键 -> 暂停分配的队列项
+        self.parked = defaultdict(list)
+        self.deadline = time.monotonic() + time_budget if time_budget else None
+
+        self.heap = []
+        self.seq = 0
+        self.in_flight = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+        # 各栏目已分配的页面数和已消耗的时间
+        self.section_pages = Counter()
+        self.section_seconds = defaultdict(float)
+        self.dropped = Counter()
+
+    def section_of(self, url):
+        """返回 (栏目名, 栏目配置)"""
+        section = match_section(url, self.sections)
+        if section is not None:
+            return section["name"], section
+        return default_section(url), None
+
+    def score(self, url, level, target=True):
+        """计算URL的优先级分数，分数越高越先抓取"""
+        _, section = self.section_of(url)
+        score = SECTION_WEIGHT * (section.get("weight", 1.0) if section else 0.0)
+        if target:
+            score += TARGET_BONUS
+        score -= DEPTH_PENALTY * level
+        if self.history is not None:
+            score += STALENESS_WEIGHT * self.history.staleness_days(url)
+            score += CHANGE_WEIGHT * self.history.change_probability(url)
+        return score
+
+    def push(self, url, level, other=False):
+        """加入URL；other表示不匹配include规则、仅作为入口页面额外链接抓取的URL"""
+        score = self.score(url, level, target=not other)
+        with self.cond:
+            self.seq += 1
+            # 分数相同时先入队的先抓取
+            heapq.heappush(self.heap, (-score, self.seq, url, level, other))
+            self.cond.notify()
+
+    def over_budget(self, name, section):
+        """栏目的页面数或耗时预算是否已耗尽"""
+        if section is None:
+            return False
+        max_pages = section.get("max_pages")
+        if max_pages is not None and self.section_pages[name] >= max_pages:
+            return True
+        max_seconds = section.get("max_seconds")
+        return max_seconds is not None and self.section_seconds[name] >= max_seconds
+
+    def time_up(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def pop(self):
+        """取出分数最高的URL；没有可抓取的URL且没有正在处理的URL时返回None"""
+        with self.cond:
+            while True:
+                if self.closed or self.time_up():
+                    return None
+                self.unpark()
+                while self.heap:
+                    entry = heapq.heappop(self.heap)
+                    _, _, url, level, other = entry
+                    name, section = self.section_of(url)
+                    if self.over_budget(name, section):
+                        self.dropped[name] += 1
+                        continue
+                    if self.breakers is not None:
+                        blocked = self.breakers.acquire(page_keys(url, name))
+                        if blocked is not None:
+                            self.parked[blocked].append(entry)
+                            continue
+                    self.section_pages[name] += 1
+                    self.in_flight += 1
+                    return url, level, other
+                if self.in_flight == 0 and not self.parked:
+                    return None
+                # 定期醒来检查时间预算
+                self.cond.wait(timeout=1)
+
+    def unpark(self):
+        """冷却结束的熔断键，其暂停的URL重新进入队列（由熔断器决定是否只放行探测请求）"""
+        for key in [key for key in self.parked if self.breakers.ready(key)]:
+            for entry in self.parked.pop(key):
+                heapq.heappush(self.heap, entry)
+
+    def requeue(self, url, level, other=False):
+        """重新加入处理中断的URL（随后以requeued=True调用task_done）
+
+        该URL再次取出时会重新计入栏目的页面数，这里先撤销上次的计数，每个页面只计一次。
+        """
+        name, _ = self.section_of(url)
+        with self.cond:
+            self.section_pages[name] -= 1
+        self.push(url, level, other)
+
+    def task_done(self, url=None, elapsed=0.0, requeued=False):
+        """标记一个URL处理完成，并计入所属栏目的耗时
+
+        requeued为True时URL已重新排队，本次处理花费的时间仍计入栏目的时间预算。
+        """
+        with self.cond:
+            if url is not None:
+                name, _ = self.section_of(url)
+                self.section_seconds[name] += elapsed
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def report(self):
+        """输出各栏目的页面数、耗时和因预算丢弃的URL数"""
+        if self.time_up():
+            logger.info(f"时间预算已耗尽，队列中还有 {len(self.heap)} 个URL未抓取")
+        for key, entries in self.parked.items():
+            logger.info(f"熔断中的 {key}: {len(entries)} 个URL未抓取")
+        for name in sorted(set(self.section_pages) | set(self.dropped)):
+            logger.info(f"栏目 {name}: {self.section_pages[name]} 个页面，"
+                        f"耗时 {self.section_seconds[name]:.1f} 秒，超出预算丢弃 {self.dropped[name]} 个")
+
+    def __len__(self):
+        return len(self.heap)
@@ -0,0 +1,150 @@
+"""浏览器与HTTP会话共享的登录态
+
+只在第一个浏览器中访问一次预热页面并接受cookies提示，得到的cookies同步给其他浏览器
+和requests会话（资源下载因此带有与浏览器相同的cookies）。状态保存在
+output_dir/session_state.json，有效期内的后续运行不再预热，已接受cookies提示后
+也不再在每个页面上查找"接受"按钮。
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("huawei_scraper")
+
+SESSION_STATE_NAME = "session_state.json"
+# 状态的有效期（秒），过期后重新预热
+STATE_TTL = 12 * 3600
+
+
+class SessionState:
+    """cookies与cookies提示的接受状态，在浏览器、requests会话和磁盘之间同步"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.cookies = {}
+        self.consent = False
+        self.updated_at = 0
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data["updated_at"] + STATE_TTL > time.time():
+                    self.consent = data["consent"]
+                    self.merge(data["cookies"])
+                    self.updated_at = data["updated_at"]
+                else:
+                    logger.info("保存的会话状态已过期，将重新预热")
+            except Exception as e:
+                logger.warning(f"读取会话状态失败，忽略: {e}")
+
+    @property
+    def ready(self):
+        """是否已有可用的cookies（无需再预热）"""
+        return bool(self.cookies)
+
+    def merge(self, cookies):
+        """合并Selenium格式的cookies，丢弃已过期的cookies"""
+        now = time.time()
+        with self.lock:
+            for cookie in cookies:
+                key = (cookie.get("domain", ""), cookie.get("path", "/"), cookie["name"])
+                expiry = cookie.get("expiry")
+                if expiry is not None and expiry <= now:
+                    self.cookies.pop(key, None)
+                else:
+                    self.cookies[key] = cookie
+            self.updated_at = now
+
+    def mark_consent(self):
+        with self.lock:
+            self.consent = True
+
+    def capture_driver(self, driver):
+        """读取浏览器中所有域名的cookies"""
+        try:
+            cookies = [cookie_from_cdp(cookie)
+                       for cookie in driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]]
+        except Exception:
+            # 非Chrome驱动只能读取当前域名的cookies
+            cookies = driver.get_cookies()
+        self.merge(cookies)
+        return len(cookies)
+
+    def apply_driver(self, driver, fallback_url=None):
+        """把cookies写入浏览器"""
+        cookies = list(self.cookies.values())
+        if not cookies:
+            return
+        try:
+            driver.execute_cdp_cmd("Network.setCookies", {"cookies": [cookie_to_cdp(c) for c in cookies]})
+            return
+        except Exception:
+            pass
+        # 不支持CDP时，只能在访问对应域名后逐个写入
+        if fallback_url:
+            driver.get(fallback_url)
+        for cookie in cookies:
+            try:
+                driver.add_cookie(cookie)
+            except Exception:
+                pass
+
+    def capture_session(self, session):
+        """读取requests会话中的cookies（资源请求可能更新cookies）"""
+        self.merge([{
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "secure": cookie.secure,
+            **({"expiry": cookie.expires} if cookie.expires else {}),
+        } for cookie in session.cookies])
+
+    def apply_session(self, session):
+        """把cookies写入requests会话"""
+        for cookie in list(self.cookies.values()):
+            session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""),
+                                path=cookie.get("path", "/"), secure=cookie.get("secure", False),
+                                expires=cookie.get("expiry"))
+
+    def save(self):
+        with self.lock:
+            data = {"updated_at": self.updated_at, "consent": self.consent, "cookies": list(self.cookies.values())}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+def cookie_from_cdp(cookie):
+    """CDP格式的cookie转换为Selenium格式"""
+    result = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "domain": cookie["domain"],
+        "path": cookie.get("path", "/"),
+        "secure": cookie.get("secure", False),
+        "httpOnly": cookie.get("httpOnly", False),
+    }
+    # 会话cookie的expires为-1
+    if cookie.get("expires", -1) > 0:
+        result["expiry"] = int(cookie["expires"])
+    return result
+
+
+def cookie_to_cdp(cookie):
+    """Selenium格式的cookie转换为CDP格式"""
+    result = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "domain": cookie.get("domain", ""),
+        "path": cookie.get("path", "/"),
+        "secure": cookie.get("secure", False),
+        "httpOnly": cookie.get("httpOnly", False),
+    }
+    if cookie.get("expiry"):
+        result["expires"] = cookie["expiry"]
+    return result
@@ -0,0 +1,276 @@
+"""页面框架去重存储
+
+同一栏目的页面共用相同的页头、侧边导航树、页脚和脚本标签。该存储方式为每个栏目
+检测共享的页面框架（模板），模板只保存一次；每个页面只保存相对模板的差异
+（基本上就是页面独有的正文）和模板引用，需要时再还原出完整页面。
+
+页面保存为 <页面路径>.page.json，模板保存在 output_dir/_templates/<栏目>/<模板ID>.html。
+差异记录不比完整页面小时（例如每个页面的导航都不同），直接保存完整的 <页面路径>.html。
+
+用法:
+    python huawei_doc_storage.py reassemble <output_dir> [--out DIR]   # 还原所有页面
+    python huawei_doc_storage.py stats <output_dir>                    # 统计空间节省
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger("huawei_scraper")
+
+TEMPLATES_DIRNAME = "_templates"
+PAGE_SUFFIX = ".page.json"
+
+# 页面与模板的共享比例低于该值时，为该栏目创建新的模板
+MIN_SHARED_RATIO = 0.5
+# 每个栏目最多保留的模板数
+MAX_TEMPLATES_PER_SECTION = 8
+
+# 正文区域选择器，与爬虫保持一致
+CONTENT_SELECTOR = '.doc-content, .api-content, .markdown-body, article, main'
+
+
+def tokenize(html):
+    """按标签边界切分HTML，''.join(tokens) 与原文完全一致"""
+    return re.split(r'(?<=>)', html)
+
+
+def make_template(html):
+    """从页面生成模板：清空正文区域，只保留页面框架"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    content = soup.select_one(CONTENT_SELECTOR)
+    if content is None:
+        return html
+    content.clear()
+    return str(soup)
+
+
+def diff_ops(template_tokens, page_tokens):
+    """计算页面相对模板的差异
+
+    返回操作列表：[起, 止] 表示复制模板的 tokens[起:止]，字符串表示原样插入的内容。
+    同时返回从模板复制的字符数。
+    """
+    matcher = difflib.SequenceMatcher(None, template_tokens, page_tokens)
+    ops = []
+    shared = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+            shared += sum(len(token) for token in template_tokens[i1:i2])
+        elif j2 > j1:
+            literal = ''.join(page_tokens[j1:j2])
+            if ops and isinstance(ops[-1], str):
+                ops[-1] += literal
+            else:
+                ops.append(literal)
+    return ops, shared
+
+
+def apply_ops(template_tokens, ops):
+    """根据模板和差异还原页面"""
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.append(''.join(template_tokens[op[0]:op[1]]))
+    return ''.join(parts)
+
+
+class ShellStore:
+    """按栏目检测共享页面框架，页面只保存相对模板的差异"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.templates_dir = os.path.join(output_dir, TEMPLATES_DIRNAME)
+        self.lock = threading.Lock()
+        # 栏目 -> [(模板ID, tokens)]
+        self.templates = {}
+        self.logical_bytes = 0
+        self.stored_bytes = 0
+        self.full_pages = 0
+
+    def template_path(self, template_id):
+        return os.path.join(self.templates_dir, f"{template_id}.html")
+
+    def section_templates(self, section):
+        """加载栏目已有的模板（包括之前运行保存的模板）"""
+        if section not in self.templates:
+            templates = []
+            section_dir = os.path.join(self.templates_dir, section)
+            if os.path.isdir(section_dir):
+                for name in sorted(os.listdir(section_dir)):
+                    if name.endswith('.html'):
+                        with open(os.path.join(section_dir, name), 'r', encoding='utf-8') as f:
+                            templates.append((f"{section}/{name[:-5]}", tokenize(f.read())))
+            self.templates[section] = templates
+        return self.templates[section]
+
+    def add_template(self, section, html):
+        """保存新模板（按内容寻址，相同的模板只保存一次）"""
+        template = make_template(html)
+        template_id = f"{section}/{hashlib.sha256(template.encode('utf-8')).hexdigest()[:16]}"
+        path = self.template_path(template_id)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(template)
+            self.stored_bytes += len(template.encode('utf-8'))
+            logger.info(f"栏目 {section} 新增页面模板: {template_id}")
+        tokens = tokenize(template)
+        templates = self.section_templates(section)
+        if all(existing_id != template_id for existing_id, _ in templates):
+            templates.append((template_id, tokens))
+            # 只保留最近的模板
+            del templates[:-MAX_TEMPLATES_PER_SECTION]
+        return template_id, tokens
+
+    def encode(self, html, section):
+        """选择与页面共享内容最多的模板，返回 (模板ID, 差异)
+
+        只在锁内取得栏目模板列表的快照，差异计算（CPU密集）在锁外进行，多个抓取线程可以同时计算。
+        """
+        page_tokens = tokenize(html)
+        with self.lock:
+            templates = list(self.section_templates(section))
+        best = None
+        for template_id, tokens in templates:
+            ops, shared = diff_ops(tokens, page_tokens)
+            if best is None or shared > best[2]:
+                best = (template_id, ops, shared)
+        if best is None or best[2] < MIN_SHARED_RATIO * len(html):
+            with self.lock:
+                template_id, tokens = self.add_template(section, html)
+            ops, shared = diff_ops(tokens, page_tokens)
+            best = (template_id, ops, shared)
+        return best[0], best[1]
+
+    def save(self, html, file_path, section):
+        """保存页面（file_path为完整页面本应保存的路径），返回实际保存路径
+
+        差异记录不比完整页面小时保存完整页面，并删除同一页面的另一种形式，避免重复导出。
+        """
+        template_id, ops = self.encode(html, section)
+        record = json.dumps({"template": template_id, "ops": ops}, ensure_ascii=False, separators=(',', ':'))
+        page_path = page_record_path(file_path)
+        data = record.encode('utf-8')
+        size = len(html.encode('utf-8'))
+        if len(data) >= size:
+            page_path, stale_path = file_path, page_path
+            data = html.encode('utf-8')
+        else:
+            stale_path = file_path
+        os.makedirs(os.path.dirname(page_path), exist_ok=True)
+        with open(page_path, 'wb') as f:
+            f.write(data)
+        if stale_path != page_path and os.path.exists(stale_path):
+            os.remove(stale_path)
+        with self.lock:
+            self.logical_bytes += size
+            self.stored_bytes += len(data)
+            if page_path == file_path:
+                self.full_pages += 1
+        return page_path
+
+    def report(self):
+        """输出空间节省情况"""
+        if not self.logical_bytes:
+            return
+        logger.info(f"框架去重存储: 页面原始大小 {self.logical_bytes} 字节，实际写入 {self.stored_bytes} 字节 "
+                    f"(节省 {1 - self.stored_bytes / self.logical_bytes:.1%})，"
+                    f"差异不小于原页面而保存完整页面 {self.full_pages} 个")
+
+
+def page_record_path(file_path):
+    """完整页面路径对应的差异记录路径"""
+    base = file_path[:-5] if file_path.endswith('.html') else file_path
+    return f"{base}{PAGE_SUFFIX}"
+
+
+def find_output_dir(page_path):
+    """向上查找包含模板目录的输出目录"""
+    directory = os.path.dirname(os.path.abspath(page_path))
+    while True:
+        if os.path.isdir(os.path.join(directory, TEMPLATES_DIRNAME)):
+            return directory
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            raise FileNotFoundError(f"找不到页面模板目录: {page_path}")
+        directory = parent
+
+
+def reassemble_file(page_path, output_dir=None):
+    """从差异记录还原完整页面HTML"""
+    output_dir = output_dir or find_output_dir(page_path)
+    with open(page_path, 'r', encoding='utf-8') as f:
+        record = json.load(f)
+    with open(os.path.join(output_dir, TEMPLATES_DIRNAME, f"{record['template']}.html"), 'r', encoding='utf-8') as f:
+        template_tokens = tokenize(f.read())
+    return apply_ops(template_tokens, record["ops"])
+
+
+def iter_page_records(output_dir):
+    for root, dirs, files in os.walk(output_dir):
+        if root == output_dir and TEMPLATES_DIRNAME in dirs:
+            dirs.remove(TEMPLATES_DIRNAME)
+        for name in files:
+            if name.endswith(PAGE_SUFFIX):
+                yield os.path.join(root, name)
+
+
+def reassemble_all(output_dir, out_dir=None):
+    """还原所有页面；out_dir为空时写在差异记录旁边"""
+    count = 0
+    for page_path in iter_page_records(output_dir):
+        html = reassemble_file(page_path, output_dir)
+        target = page_path[:-len(PAGE_SUFFIX)] + '.html'
+        if out_dir:
+            target = os.path.join(out_dir, os.path.relpath(target, output_dir))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(html)
+        count += 1
+    return count
+
+
+def storage_stats(output_dir):
+    """统计还原后的页面大小与实际存储大小"""
+    logical = stored = pages = 0
+    templates_dir = os.path.join(output_dir, TEMPLATES_DIRNAME)
+    for root, _, files in os.walk(templates_dir):
+        stored += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    for page_path in iter_page_records(output_dir):
+        pages += 1
+        stored += os.path.getsize(page_path)
+        logical += len(reassemble_file(page_path, output_dir).encode('utf-8'))
+    return {'pages': pages, 'logical_bytes': logical, 'stored_bytes': stored}
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="页面框架去重存储工具")
+    parser.add_argument('command', choices=['reassemble', 'stats'])
+    parser.add_argument('output_dir', help="爬虫的输出目录")
+    parser.add_argument('--out', help="还原页面的输出目录，默认写在差异记录旁边")
+    args = parser.parse_args()
+
+    if args.command == 'reassemble':
+        count = reassemble_all(args.output_dir, args.out)
+        logger.info(f"已还原 {count} 个页面")
+    else:
+        stats = storage_stats(args.output_dir)
+        ratio = stats['logical_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0
+        logger.info(f"{stats['pages']} 个页面，完整大小 {stats['logical_bytes']} 字节，"
+                    f"实际存储 {stats['stored_bytes']} 字节 (压缩比 {ratio:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
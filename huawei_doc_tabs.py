@@ -0,0 +1,404 @@
+"""多标签页渲染后端
+
+每个抓取线程各启动一个无头Chrome时，每个浏览器占用数百MB内存。该后端只启动一个
+Chrome，在其中打开多个标签页：页面加载策略设为none，driver.get只发起导航而不等待，
+调度线程轮流检查各标签页的加载状态，多个页面的网络等待因此在同一个浏览器中重叠进行。
+
+每个标签页有独立的超时，超时或出错的标签页会被关闭并换成新标签页，
+每个标签页渲染一定数量的页面后也会被替换，避免内存持续增长。
+所有WebDriver命令都在一个调度线程中执行，一次卡住的调用会阻塞所有标签页：抓取线程
+最多等待页面剩余的时间预算，超时后结束整个浏览器，换新的浏览器和调度线程，
+未完成的页面重新排队，超时的页面由抓取线程重新加入抓取队列。
+所有标签页共享同一个浏览器的cookies（与会话状态同步一致）。
+
+内存对比（离线镜像，需要Chrome）:
+    python huawei_doc_tabs.py bench huawei_docs_full --concurrency 8
+"""
+import argparse
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from huawei_doc_engine import CONTENT_SELECTOR, ERROR_PAGE, PROFILES, CrawlEngine
+from huawei_doc_watchdog import kill_process_tree
+
+logger = logging.getLogger("huawei_scraper")
+
+# 单个标签页加载一个页面的超时（秒）
+TAB_TIMEOUT = 45
+# 每个标签页最多渲染的页面数，超出后替换为新标签页
+TAB_RECYCLE_PAGES = 50
+# 轮询各标签页状态的间隔（秒）
+POLL_INTERVAL = 0.1
+# 页面加载完成后两次滚动（触发懒加载）之间的等待（秒）
+SCROLL_WAIT = 1.0
+# 重启浏览器时等待旧调度线程退出的时间（秒）
+RESTART_JOIN_TIMEOUT = 30
+
+# 标签页的状态脚本：加载状态、是否出现正文区域
+STATE_SCRIPT = """
+return [document.readyState, !!document.querySelector(arguments[0]), document.title || ''];
+"""
+
+
+def process_tree_rss(pid):
+    """进程及其所有子进程的常驻内存（字节），优先使用psutil，否则读取/proc（仅Linux）"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            return sum(p.memory_info().rss for p in [process] + process.children(recursive=True))
+        except psutil.Error:
+            return 0
+
+    children = {}
+    rss = {}
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'r') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(name))
+        rss[int(name)] = int(fields[21]) * page_size
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total
+
+
+def resolve(future, html_content):
+    """设置渲染结果；抓取线程等待超时后已放弃（取消）的页面忽略结果"""
+    try:
+        future.set_result(html_content)
+    except InvalidStateError:
+        pass
+
+
+def driver_rss(driver):
+    """WebDriver启动的chromedriver及浏览器进程的总内存"""
+    try:
+        return process_tree_rss(driver.service.process.pid)
+    except Exception:
+        return 0
+
+
+class Tab:
+    def __init__(self, handle):
+        self.handle = handle
+        self.request = None
+        self.started = 0.0
+        self.stage = None
+        self.stage_at = 0.0
+        self.pages = 0
+
+
+class TabRenderer:
+    """在一个Chrome的多个标签页中并发渲染页面
+
+    render() 可以被多个抓取线程同时调用；所有WebDriver命令都在调度线程中执行。
+    每次重启浏览器后generation加一，旧的调度线程发现后退出。
+    """
+
+    def __init__(self, engine, tabs):
+        self.engine = engine
+        self.tab_count = tabs
+        self.requests = queue.Queue()
+        self.driver = None
+        self.thread = None
+        self.closed = False
+        self.tabs = []
+        self.generation = 0
+        self.restart_lock = threading.Lock()
+        self.rendered = 0
+        self.recycled = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.peak_rss = 0
+
+    def start(self):
+        self.driver = self.engine.init_driver(page_load_strategy='none')
+        self.tabs = [Tab(self.driver.current_window_handle)]
+        for _ in range(self.tab_count - 1):
+            self.tabs.append(self.open_tab())
+        self.thread = threading.Thread(target=self.run, args=(self.generation,), name="tab-scheduler", daemon=True)
+        self.thread.start()
+        logger.info(f"多标签页渲染: 1 个浏览器，{self.tab_count} 个标签页")
+
+    def wait_timeout(self):
+        """抓取线程等待渲染结果的时间：页面剩余的时间预算，没有时限时按标签页超时和重试次数计算"""
+        remaining = self.engine.watchdog.remaining()
+        if remaining == float('inf'):
+            remaining = TAB_TIMEOUT * (self.engine.profile["render_retries"] + 2)
+        return max(1, remaining)
+
+    def open_tab(self):
+        self.driver.switch_to.new_window('tab')
+        return Tab(self.driver.current_window_handle)
+
+    def render(self, url):
+        """渲染页面并返回HTML，错误页面返回ERROR_PAGE，失败时返回None"""
+        if self.closed:
+            return None
+        future = Future()
+        generation = self.generation
+        self.requests.put((url, future, 0))
+        try:
+            return future.result(timeout=self.wait_timeout())
+        except FutureTimeoutError:
+            # 放弃该页面（调度线程不再处理），由抓取线程重新排队
+            future.cancel()
+            logger.error(f"等待渲染超时，重启浏览器: {url}")
+            self.engine.watchdog.interrupt()
+            self.restart(generation)
+            return None
+
+    def restart(self, generation):
+        """结束卡住的浏览器，换新的浏览器和调度线程；多个线程同时超时时只重启一次"""
+        with self.restart_lock:
+            if generation != self.generation or self.closed:
+                return
+            self.generation += 1
+            self.restarts += 1
+            old_driver, old_thread = self.driver, self.thread
+            # 结束浏览器后，阻塞的WebDriver调用因连接断开而返回，旧调度线程把未完成的页面重新排队后退出
+            try:
+                kill_process_tree(old_driver.service.process.pid)
+            except Exception as e:
+                logger.warning(f"结束浏览器进程失败: {e}")
+            old_thread.join(timeout=RESTART_JOIN_TIMEOUT)
+            if old_thread.is_alive():
+                logger.error("旧的标签页调度线程没有退出，放弃其中的标签页")
+                for tab in self.tabs:
+                    if tab.request is not None:
+                        self.requests.put(tab.request)
+                        tab.request = None
+            try:
+                old_driver.quit()
+            except Exception:
+                pass
+            try:
+                self.start()
+            except Exception as e:
+                logger.error(f"重启浏览器失败: {e}")
+
+    def run(self, generation):
+        while not self.closed and generation == self.generation:
+            try:
+                self.assign()
+                busy = False
+                for tab in list(self.tabs):
+                    if tab.request is not None:
+                        busy = True
+                        self.poll(tab)
+                if not busy:
+                    time.sleep(POLL_INTERVAL)
+                else:
+                    time.sleep(POLL_INTERVAL / len(self.tabs))
+            except Exception as e:
+                logger.error(f"标签页调度出错: {e}")
+                time.sleep(1)
+
+    def assign(self):
+        """把等待的页面分配给空闲标签页并发起导航（不等待加载完成）"""
+        for tab in self.tabs:
+            if tab.request is not None:
+                continue
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                return
+            if request[1].done():
+                # 抓取线程已放弃等待
+                continue
+            tab.request = request
+            tab.started = time.monotonic()
+            tab.stage = 'loading'
+            try:
+                self.driver.switch_to.window(tab.handle)
+                self.engine.mark_first_request()
+                self.driver.get(request[0])
+            except Exception as e:
+                self.fail(tab, f"发起导航失败: {e}")
+
+    def poll(self, tab):
+        """推进标签页的状态：加载 → 滚动到一半 → 滚动到底部 → 取出HTML"""
+        url = tab.request[0]
+        now = time.monotonic()
+        if now - tab.started > TAB_TIMEOUT:
+            self.timeouts += 1
+            self.fail(tab, f"标签页加载超时 ({TAB_TIMEOUT} 秒)")
+            return
+        driver = self.driver
+        try:
+            driver.switch_to.window(tab.handle)
+            if tab.stage == 'loading':
+                ready_state, has_content, _ = driver.execute_script(STATE_SCRIPT, CONTENT_SELECTOR)
+                # 与Selenium后端一致：正文出现，或页面加载完成后最多再等10秒
+                if has_content or (ready_state == 'complete' and now - tab.started > 10):
+                    if self.engine.is_error_page(driver):
+                        logger.warning(f"页面 {url} 被识别为错误页面，跳过")
+                        self.finish(tab, ERROR_PAGE)
+                        return
+                    self.accept_consent(driver)
+                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
+                    tab.stage, tab.stage_at = 'half', now
+            elif tab.stage == 'half' and now - tab.stage_at >= SCROLL_WAIT:
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                tab.stage, tab.stage_at = 'bottom', now
+            elif tab.stage == 'bottom' and now - tab.stage_at >= SCROLL_WAIT:
+                html_content = driver.page_source
+                if html_content and len(html_content) > 1000:
+                    self.finish(tab, html_content)
+                else:
+                    self.fail(tab, f"页面内容为空或太小 ({len(html_content) if html_content else 0} 字节)")
+        except Exception as e:
+            self.fail(tab, str(e))
+
+    def accept_consent(self, driver):
+        """与Selenium后端一致：接受cookies提示之前在每个页面上查找"接受"按钮，接受后同步cookies
+
+        预热页面由init_driver中的establish_session访问（浏览器重启后重新写入cookies）。
+        """
+        engine = self.engine
+        if not engine.profile["consent_click"] or engine.session_state.consent:
+            return
+        if engine.accept_consent(driver):
+            engine.session_state.mark_consent()
+            with engine.state_lock:
+                engine.sync_session_state(driver)
+
+    def finish(self, tab, html_content):
+        _, future, _ = tab.request
+        tab.request = None
+        tab.pages += 1
+        self.rendered += 1
+        resolve(future, html_content)
+        if tab.pages >= TAB_RECYCLE_PAGES:
+            self.recycle(tab)
+
+    def fail(self, tab, reason):
+        """标签页出错或超时：替换标签页，页面重新排队或放弃"""
+        url, future, attempts = tab.request
+        tab.request = None
+        self.recycle(tab)
+        if future.done():
+            return
+        if attempts < self.engine.profile["render_retries"]:
+            logger.warning(f"渲染 {url} 失败: {reason}，稍后重试")
+            self.requests.put((url, future, attempts + 1))
+        else:
+            logger.error(f"获取页面失败: {url}，错误: {reason}")
+            resolve(future, None)
+
+    def recycle(self, tab):
+        """关闭标签页并换成新的标签页"""
+        self.recycled += 1
+        self.peak_rss = max(self.peak_rss, driver_rss(self.driver))
+        driver = self.driver
+        index = self.tabs.index(tab)
+        try:
+            # 保留至少一个窗口，浏览器才不会退出
+            new_tab = self.open_tab()
+            driver.switch_to.window(tab.handle)
+            driver.close()
+        except Exception as e:
+            logger.warning(f"替换标签页失败: {e}")
+            return
+        self.tabs[index] = new_tab
+
+    def close(self):
+        self.closed = True
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        # 放弃正在渲染和等待渲染的页面，避免抓取线程一直等待
+        pending = [tab.request for tab in self.tabs if tab.request is not None]
+        while not self.requests.empty():
+            pending.append(self.requests.get_nowait())
+        for _, future, _ in pending:
+            resolve(future, None)
+        if self.driver is not None:
+            self.peak_rss = max(self.peak_rss, driver_rss(self.driver))
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+
+    def report(self):
+        logger.info(f"多标签页渲染: {self.rendered} 个页面，超时 {self.timeouts} 次，替换标签页 {self.recycled} 次，"
+                    f"重启浏览器 {self.restarts} 次，浏览器内存峰值 {self.peak_rss / 2 ** 20:.0f} MB")
+
+
+def bench(mirror_dir, concurrency, pages):
+    """在离线镜像上比较"每个线程一个浏览器"与"一个浏览器多个标签页"的内存和吞吐"""
+    from huawei_doc_transport import serve_directory
+
+    files = []
+    for root, _, names in os.walk(mirror_dir):
+        for name in names:
+            if name.endswith('.html'):
+                files.append(os.path.relpath(os.path.join(root, name), mirror_dir).replace(os.sep, '/'))
+    if not files:
+        raise SystemExit(f"镜像目录中没有页面: {mirror_dir}")
+    server, base = serve_directory(mirror_dir)
+    urls = [f"{base}/{files[i % len(files)]}" for i in range(pages)]
+    profile = dict(PROFILES["full"], output_dir=os.path.join(mirror_dir, "_bench"), warmup_url=None,
+                   request_delay=(0, 0), render_workers=concurrency)
+    try:
+        engine = CrawlEngine(profile)
+        drivers = [engine.init_driver() for _ in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda item: engine.get_page_content(item[1], drivers[item[0] % concurrency]),
+                              enumerate(urls)))
+        driver_seconds = time.perf_counter() - start
+        driver_memory = sum(driver_rss(driver) for driver in drivers)
+        for driver in drivers:
+            driver.quit()
+
+        engine = CrawlEngine(profile)
+        renderer = TabRenderer(engine, concurrency)
+        renderer.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(renderer.render, urls))
+        tab_seconds = time.perf_counter() - start
+        tab_memory = driver_rss(renderer.driver)
+        renderer.close()
+    finally:
+        server.shutdown()
+
+    for name, seconds, memory in (("每个线程一个浏览器", driver_seconds, driver_memory),
+                                  ("一个浏览器多个标签页", tab_seconds, tab_memory)):
+        logger.info(f"{name}: 并发 {concurrency}，{pages / seconds:.2f} 页/秒，内存 {memory / 2 ** 20:.0f} MB，"
+                    f"每GB内存可并发渲染 {concurrency / (memory / 2 ** 30):.1f} 个页面")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="多标签页渲染后端工具")
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('mirror_dir', help="离线镜像目录（爬虫的输出目录）")
+    parser.add_argument('--concurrency', type=int, default=8, help="并发渲染数（浏览器数或标签页数）")
+    parser.add_argument('--pages', type=int, default=40, help="渲染的页面数")
+    args = parser.parse_args()
+
+    bench(args.mirror_dir, args.concurrency, args.pages)
+
+
+if __name__ == "__main__":
+    main()
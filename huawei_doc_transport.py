@@ -0,0 +1,394 @@
+"""HTTP传输层
+
+为requests会话提供可配置的连接池大小、连接复用统计，以及可选的HTTP/2多路复用
+（需要安装 httpx[http2]），用于 developer.huawei.com 和CDN域名。
+
+基准测试（在本地启动HTTP服务器提供离线镜像，比较默认会话与调优后的会话）:
+    python huawei_doc_transport.py bench huawei_docs_full --requests 2000 --concurrency 16
+
+本地服务器只支持HTTP/1.1，不能测量HTTP/2。要比较HTTP/2，需要用支持HTTP/2的HTTPS服务器
+（例如 caddy file-server）提供同一个镜像目录，并用 --http2-url 指定其地址，基准测试会在该
+服务器上分别以HTTP/1.1和HTTP/2运行同样的请求:
+    python huawei_doc_transport.py bench huawei_docs_full --http2-url https://localhost:8443 --insecure
+"""
+import argparse
+import functools
+import http.client
+import http.server
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import extract_cookies_to_jar
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger("huawei_scraper")
+
+# 默认连接池设置：缓存的连接池（域名）数量和每个域名保持的连接数
+DEFAULT_POOL_CONNECTIONS = 16
+DEFAULT_POOL_MAXSIZE = 32
+
+# 启用HTTP/2时使用HTTP/2的域名：文档站点，以及文档图片和静态资源所在的CDN
+HTTP2_HOSTS = [
+    "developer.huawei.com",
+    "alliance-communityfile-drcn.dbankcdn.com",
+    "res.vmallres.com",
+]
+
+
+def default_retry():
+    return Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+    )
+
+
+class MeteredHTTPAdapter(HTTPAdapter):
+    """记录每个域名的请求数和新建连接数的HTTPAdapter"""
+
+    def __init__(self, *args, **kwargs):
+        self.pools = {}
+        self.metrics_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        conn = super().get_connection_with_tls_context(request, verify, proxies=proxies, cert=cert)
+        self.track(conn)
+        return conn
+
+    def get_connection(self, url, proxies=None):
+        # 旧版本requests使用此方法
+        conn = super().get_connection(url, proxies)
+        self.track(conn)
+        return conn
+
+    def track(self, conn):
+        """记住使用过的连接池（即使被LRU淘汰，统计仍然保留）"""
+        key = f"{conn.scheme}://{conn.host}:{conn.port}"
+        with self.metrics_lock:
+            self.pools.setdefault(key, conn)
+
+    def metrics(self):
+        """每个域名的请求数、新建连接数和连接复用率"""
+        result = {}
+        with self.metrics_lock:
+            for key, pool in self.pools.items():
+                requests_made = pool.num_requests
+                connections = pool.num_connections
+                result[key] = {
+                    'requests': requests_made,
+                    'connections': connections,
+                    'reuse_ratio': 1 - connections / requests_made if requests_made else 0.0,
+                }
+        return result
+
+
+class HttpxOriginalResponse:
+    """提供http.client风格的响应头（msg），requests据此把Set-Cookie提取到cookie jar"""
+
+    def __init__(self, headers):
+        self.msg = http.client.HTTPMessage()
+        for name, value in headers.multi_items():
+            self.msg[name] = value
+
+
+class HttpxRaw:
+    """把httpx的流式响应包装成requests所需的raw对象"""
+
+    def __init__(self, response):
+        self.response = response
+        self.iterator = None
+        self.buffer = b''
+        # Session.send和重定向处理通过raw._original_response把Set-Cookie写入session.cookies
+        self._original_response = HttpxOriginalResponse(response.headers)
+
+    def stream(self, chunk_size=65536, decode_content=True):
+        yield from self.response.iter_bytes(chunk_size)
+
+    def read(self, amt=None, decode_content=True):
+        if self.iterator is None:
+            self.iterator = self.response.iter_bytes()
+        while amt is None or len(self.buffer) < amt:
+            try:
+                self.buffer += next(self.iterator)
+            except StopIteration:
+                break
+        if amt is None:
+            data, self.buffer = self.buffer, b''
+        else:
+            data, self.buffer = self.buffer[:amt], self.buffer[amt:]
+        return data
+
+    def release_conn(self):
+        self.response.close()
+
+    def close(self):
+        self.response.close()
+
+
+class Http2Adapter(requests.adapters.BaseAdapter):
+    """通过httpx发送请求的适配器，同一域名的请求在一个HTTP/2连接上多路复用
+
+    与HTTP/1.1适配器一致：支持verify、cert和代理（httpx在客户端级别设置这些参数，
+    每种组合使用一个客户端），并按default_retry()的策略重试连接错误和429/5xx。
+    """
+
+    def __init__(self, max_connections=DEFAULT_POOL_MAXSIZE, max_retries=None):
+        super().__init__()
+        import httpx  # noqa: F401  未安装时抛出ImportError，由create_session回退到HTTP/1.1
+
+        self.max_connections = max_connections
+        self.max_retries = max_retries or default_retry()
+        self.lock = threading.Lock()
+        # (verify, cert, 代理) -> httpx.Client
+        self.clients = {}
+        self.request_count = 0
+        self.http2_count = 0
+        self.retry_count = 0
+
+    def get_client(self, verify, cert, proxy):
+        import httpx
+
+        key = (verify, cert if not isinstance(cert, list) else tuple(cert), proxy)
+        with self.lock:
+            client = self.clients.get(key)
+            if client is None:
+                options = dict(
+                    http2=True,
+                    follow_redirects=False,
+                    verify=verify,
+                    cert=cert,
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_connections),
+                )
+                try:
+                    client = httpx.Client(proxy=proxy, **options)
+                except TypeError:
+                    # 旧版本httpx使用proxies参数
+                    client = httpx.Client(proxies=proxy, **options)
+                self.clients[key] = client
+        return client
+
+    def backoff(self, attempt, response=None):
+        """重试前的等待时间：优先使用Retry-After，否则按指数退避"""
+        if response is not None and self.max_retries.respect_retry_after_header:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        return self.max_retries.backoff_factor * (2 ** attempt)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        import httpx
+
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        client = self.get_client(verify, cert, select_proxy(request.url, proxies))
+        retry = self.max_retries
+        retries = retry.total if request.method in retry.allowed_methods else 0
+        for attempt in range(retries + 1):
+            httpx_request = client.build_request(
+                request.method, request.url, headers=dict(request.headers), content=request.body, timeout=timeout)
+            try:
+                httpx_response = client.send(httpx_request, stream=True)
+            except httpx.TimeoutException as e:
+                error = requests.exceptions.Timeout(e, request=request)
+            except httpx.TransportError as e:
+                error = requests.exceptions.ConnectionError(e, request=request)
+            else:
+                if attempt < retries and httpx_response.status_code in retry.status_forcelist:
+                    wait = self.backoff(attempt, httpx_response)
+                    httpx_response.close()
+                else:
+                    break
+                error = None
+            if attempt == retries:
+                raise error
+            with self.lock:
+                self.retry_count += 1
+            time.sleep(wait if error is None else self.backoff(attempt))
+
+        with self.lock:
+            self.request_count += 1
+            if httpx_response.http_version == "HTTP/2":
+                self.http2_count += 1
+
+        response = requests.Response()
+        response.status_code = httpx_response.status_code
+        response.headers = CaseInsensitiveDict(httpx_response.headers.items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = HttpxRaw(httpx_response)
+        response.reason = httpx_response.reason_phrase
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        extract_cookies_to_jar(response.cookies, request, response.raw)
+        # 非流式请求由Session.send读取完整内容，读完后httpx自动释放连接
+        return response
+
+    def metrics(self):
+        with self.lock:
+            return {'requests': self.request_count, 'http2_requests': self.http2_count, 'retries': self.retry_count}
+
+    def close(self):
+        with self.lock:
+            clients = list(self.clients.values())
+            self.clients.clear()
+        for client in clients:
+            client.close()
+
+
+def create_session(headers, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                   http2_hosts=()):
+    """创建带重试机制和调优连接池的会话，http2_hosts中的域名使用HTTP/2（需要httpx）"""
+    session = requests.Session()
+    adapter = MeteredHTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=default_retry(),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    if http2_hosts:
+        try:
+            http2_adapter = Http2Adapter(max_connections=pool_maxsize, max_retries=default_retry())
+        except ImportError:
+            logger.warning("未安装 httpx[http2]，继续使用HTTP/1.1")
+        else:
+            for host in http2_hosts:
+                session.mount(f"https://{host}", http2_adapter)
+            logger.info(f"以下域名使用HTTP/2: {', '.join(http2_hosts)}")
+
+    session.headers.update(headers)
+    return session
+
+
+def session_metrics(session):
+    """汇总会话中所有适配器的连接统计"""
+    metrics = {}
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen or not hasattr(adapter, 'metrics'):
+            continue
+        seen.add(id(adapter))
+        if isinstance(adapter, Http2Adapter):
+            metrics['http2'] = adapter.metrics()
+        else:
+            metrics.update(adapter.metrics())
+    return metrics
+
+
+def log_session_metrics(session):
+    for key, value in session_metrics(session).items():
+        if key == 'http2':
+            logger.info(f"HTTP/2: {value['requests']} 个请求，其中 {value['http2_requests']} 个使用HTTP/2，"
+                        f"重试 {value['retries']} 次")
+        else:
+            logger.info(f"连接池 {key}: {value['requests']} 个请求，新建 {value['connections']} 个连接，"
+                        f"复用率 {value['reuse_ratio']:.1%}")
+
+
+def serve_directory(directory):
+    """在本地随机端口以HTTP/1.1提供目录内容，返回 (服务器, 基础URL)"""
+
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+    handler = functools.partial(Handler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_bench(session, urls, concurrency):
+    """并发请求所有URL，返回 (耗时, 字节数, 失败数)"""
+    def fetch(url):
+        response = session.get(url, timeout=30)
+        return len(response.content) if response.ok else -1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        sizes = list(executor.map(fetch, urls))
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(size for size in sizes if size > 0), sum(1 for size in sizes if size < 0)
+
+
+def log_bench(name, session, urls, concurrency):
+    elapsed, size, failed = run_bench(session, urls, concurrency)
+    metrics = session_metrics(session)
+    connections = sum(m['connections'] for key, m in metrics.items() if key != 'http2')
+    message = (f"{name}: {len(urls)} 个请求，耗时 {elapsed:.2f} 秒，"
+               f"{len(urls) / elapsed:.0f} 请求/秒，{size / elapsed / 1e6:.1f} MB/秒，"
+               f"新建 {connections} 个连接，失败 {failed} 个")
+    if 'http2' in metrics:
+        message += f"，其中 {metrics['http2']['http2_requests']} 个请求使用HTTP/2"
+    logger.info(message)
+
+
+def bench(mirror_dir, total_requests, concurrency, pool_maxsize, http2_url=None, verify=True):
+    """在离线镜像上比较默认会话与调优后的会话；指定http2_url时再在该服务器上比较HTTP/1.1与HTTP/2"""
+    files = []
+    for root, _, names in os.walk(mirror_dir):
+        for name in names:
+            files.append(os.path.relpath(os.path.join(root, name), mirror_dir).replace(os.sep, '/'))
+    if not files:
+        raise SystemExit(f"镜像目录为空: {mirror_dir}")
+
+    server, base = serve_directory(mirror_dir)
+    try:
+        rng = random.Random(0)
+        paths = [rng.choice(files) for _ in range(total_requests)]
+        urls = [f"{base}/{path}" for path in paths]
+        headers = {"User-Agent": "huawei-doc-bench"}
+
+        # 默认会话与原来的create_session相同（连接池大小为requests的默认值10），仅增加统计
+        baseline = requests.Session()
+        baseline.headers.update(headers)
+        baseline.mount("http://", MeteredHTTPAdapter(max_retries=default_retry()))
+        tuned = create_session(headers, pool_maxsize=pool_maxsize)
+
+        for name, session in (("默认会话 (pool_maxsize=10)", baseline), (f"调优会话 (pool_maxsize={pool_maxsize})", tuned)):
+            log_bench(name, session, urls, concurrency)
+    finally:
+        server.shutdown()
+
+    if http2_url:
+        urls = [f"{http2_url.rstrip('/')}/{path}" for path in paths]
+        http1 = create_session(headers, pool_maxsize=pool_maxsize)
+        http2 = create_session(headers, pool_maxsize=pool_maxsize, http2_hosts=[urlparse(http2_url).netloc])
+        for name, session in (("HTTP/1.1", http1), ("HTTP/2", http2)):
+            session.verify = verify
+            log_bench(f"{name} ({http2_url})", session, urls, concurrency)
+            session.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="HTTP传输层工具")
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('mirror_dir', help="离线镜像目录（爬虫的输出目录）")
+    parser.add_argument('--requests', type=int, default=2000, help="请求总数")
+    parser.add_argument('--concurrency', type=int, default=16, help="并发请求数")
+    parser.add_argument('--pool-maxsize', type=int, default=DEFAULT_POOL_MAXSIZE, help="调优会话的连接池大小")
+    parser.add_argument('--http2-url', help="提供同一镜像目录的HTTP/2服务器地址（HTTPS），在其上比较HTTP/1.1与HTTP/2")
+    parser.add_argument('--insecure', action='store_true', help="不校验 --http2-url 服务器的证书（自签名证书）")
+    args = parser.parse_args()
+
+    bench(args.mirror_dir, args.requests, args.concurrency, args.pool_maxsize, args.http2_url, not args.insecure)
+
+
+if __name__ == "__main__":
+    main()
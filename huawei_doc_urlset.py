@@ -0,0 +1,356 @@
+"""紧凑的URL集合
+
+已处理、已调度的URL原先保存在Python字符串集合中，每个URL占用数百字节。
+这里只保存URL（规范形式）的64位指纹：
+- FingerprintSet: 基于array的开放寻址哈希表，每个URL约16字节（装载率0.5）；
+- DiskFingerprintSet: 内存中的指纹超过上限后写入磁盘上的有序文件，通过mmap二分查找；
+- BloomFilter: 按可配置的误判率占用更少内存，可能把未见过的URL误判为已见过。
+
+前两种为精确集合（仅在两个URL的64位指纹相同时误判，百万URL时概率约为 3e-8）。
+
+内存测试:
+    python huawei_doc_urlset.py bench --urls 1000000
+"""
+import argparse
+import hashlib
+import heapq
+import logging
+import math
+import mmap
+import os
+import threading
+import time
+from array import array
+from urllib.parse import urlparse
+
+logger = logging.getLogger("huawei_scraper")
+
+# 开放寻址表的最大装载率
+MAX_LOAD = 0.5
+# 磁盘模式下内存中最多保存的指纹数，超出后写入磁盘
+DEFAULT_MEMORY_LIMIT = 1 << 20
+# 合并写入磁盘文件时每次写入的指纹数
+SPILL_BUFFER = 1 << 16
+# 布隆过滤器的默认误判率
+DEFAULT_ERROR_RATE = 0.001
+
+URL_SET_MODES = ('exact', 'disk', 'bloom')
+
+
+def canonical_url(url):
+    """URL的规范形式，用于去重和分片：小写协议与域名，去掉锚点、查询参数和末尾的/"""
+    parsed = urlparse(url)
+    path = parsed.path.rstrip('/') or '/'
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}{path}"
+
+
+def fingerprint(text):
+    """文本的64位指纹（跨进程、跨运行稳定，0保留为空槽位）"""
+    value = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+    return value or 1
+
+
+def find_slot(slots, mask, value):
+    """返回指纹所在的槽位，或应插入的空槽位（线性探测）"""
+    index = value & mask
+    while True:
+        slot = slots[index]
+        if slot == 0 or slot == value:
+            return index
+        index = (index + 1) & mask
+
+
+class FingerprintSet:
+    """保存64位指纹的开放寻址哈希集合（线性探测）
+
+    槽位数组和掩码作为一个元组 (slots, mask) 一起发布：扩容时先建好新表再整体替换，
+    不加锁的查询每次只读取一次该元组，不会拿到新数组配旧掩码（或相反）。
+    """
+
+    def __init__(self, capacity=1024):
+        size = 1 << max(4, math.ceil(math.log2(capacity / MAX_LOAD)))
+        self.table = (array('Q', bytes(8 * size)), size - 1)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def slots(self):
+        return self.table[0]
+
+    def _grow(self):
+        old = self.slots
+        slots = array('Q', bytes(16 * len(old)))
+        mask = len(slots) - 1
+        for value in old:
+            if value:
+                slots[find_slot(slots, mask, value)] = value
+        self.table = (slots, mask)
+
+    def add_fingerprint(self, value):
+        """加入指纹，返回是否为新指纹"""
+        with self.lock:
+            slots, mask = self.table
+            index = find_slot(slots, mask, value)
+            if slots[index]:
+                return False
+            slots[index] = value
+            self.count += 1
+            if self.count > MAX_LOAD * len(slots):
+                self._grow()
+            return True
+
+    def contains_fingerprint(self, value):
+        slots, mask = self.table
+        return slots[find_slot(slots, mask, value)] != 0
+
+    def add(self, text):
+        return self.add_fingerprint(fingerprint(text))
+
+    def __contains__(self, text):
+        return self.contains_fingerprint(fingerprint(text))
+
+    def fingerprints(self):
+        return [value for value in self.slots if value]
+
+    def sorted_fingerprints(self):
+        """升序的指纹（array，每个指纹8字节）"""
+        return array('Q', sorted(value for value in self.slots if value))
+
+    def clear(self):
+        """清空集合（保留已分配的容量）"""
+        with self.lock:
+            slots, mask = self.table
+            self.table = (array('Q', bytes(8 * len(slots))), mask)
+            self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def nbytes(self):
+        return self.slots.itemsize * len(self.slots)
+
+
+class DiskFingerprintSet:
+    """内存 + 磁盘两级的精确指纹集合
+
+    内存中的指纹超过 memory_limit 后与磁盘上的有序指纹文件合并，
+    查询时先查内存，再在磁盘文件中二分查找。
+
+    磁盘文件只是本次运行的溢出空间，不用于断点续爬（每次运行的URL集合都从空开始），
+    因此打开和关闭时都会删除。
+    """
+
+    def __init__(self, path, memory_limit=DEFAULT_MEMORY_LIMIT):
+        self.path = path
+        self.memory_limit = memory_limit
+        self.memory = FingerprintSet(min(memory_limit, 1 << 16))
+        self.lock = threading.Lock()
+        self.file = None
+        self.map = None
+        self.disk = None
+        self.disk_count = 0
+        # 不沿用上次运行的文件
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _disk_contains(self, value):
+        if not self.disk_count:
+            return False
+        low, high = 0, self.disk_count
+        disk = self.disk
+        while low < high:
+            mid = (low + high) // 2
+            current = disk[mid]
+            if current < value:
+                low = mid + 1
+            elif current > value:
+                high = mid
+            else:
+                return True
+        return False
+
+    def _spill(self):
+        """把内存中的指纹合并进磁盘上的有序文件"""
+        start = time.perf_counter()
+        tmp_path = f"{self.path}.tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # 磁盘上的有序指纹与内存中排好序的指纹流式归并，按块写入，不把磁盘文件读入内存
+        disk = self.disk if self.disk_count else ()
+        count = 0
+        previous = None
+        buffer = array('Q')
+        with open(tmp_path, 'wb') as f:
+            for value in heapq.merge(disk, self.memory.sorted_fingerprints()):
+                if value == previous:
+                    continue
+                previous = value
+                buffer.append(value)
+                if len(buffer) >= SPILL_BUFFER:
+                    buffer.tofile(f)
+                    count += len(buffer)
+                    buffer = array('Q')
+            buffer.tofile(f)
+            count += len(buffer)
+        self._close_map()
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.disk = memoryview(self.map).cast('Q')
+        self.disk_count = count
+        self.memory.clear()
+        logger.info(f"URL指纹写入磁盘: {self.disk_count} 个，耗时 {time.perf_counter() - start:.2f} 秒")
+
+    def _close_map(self):
+        if self.map is not None:
+            self.disk.release()
+            self.map.close()
+            self.file.close()
+            self.map = self.file = self.disk = None
+
+    def add(self, text):
+        value = fingerprint(text)
+        with self.lock:
+            if self._disk_contains(value) or not self.memory.add_fingerprint(value):
+                return False
+            if len(self.memory) >= self.memory_limit:
+                self._spill()
+            return True
+
+    def __contains__(self, text):
+        value = fingerprint(text)
+        with self.lock:
+            return self.memory.contains_fingerprint(value) or self._disk_contains(value)
+
+    def __len__(self):
+        return len(self.memory) + self.disk_count
+
+    def nbytes(self):
+        """内存占用（磁盘文件通过mmap按需读入，由操作系统页缓存管理）"""
+        return self.memory.nbytes()
+
+    def close(self):
+        with self.lock:
+            self._close_map()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BloomFilter:
+    """布隆过滤器：按期望容量和误判率确定位数组大小和哈希函数个数"""
+
+    def __init__(self, capacity=DEFAULT_MEMORY_LIMIT, error_rate=DEFAULT_ERROR_RATE):
+        self.bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def _positions(self, text):
+        # 双重哈希: h1 + i*h2
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, text):
+        """加入URL，返回是否为新URL（可能把新URL误判为已存在）"""
+        positions = self._positions(text)
+        with self.lock:
+            array_ = self.array
+            new = False
+            for position in positions:
+                mask = 1 << (position & 7)
+                if not array_[position >> 3] & mask:
+                    array_[position >> 3] |= mask
+                    new = True
+            if new:
+                self.count += 1
+                if self.count == self.capacity + 1:
+                    logger.warning(f"布隆过滤器超出容量 {self.capacity}，误判率将高于 {self.error_rate}")
+            return new
+
+    def __contains__(self, text):
+        array_ = self.array
+        return all(array_[position >> 3] & (1 << (position & 7)) for position in self._positions(text))
+
+    def __len__(self):
+        return self.count
+
+    def nbytes(self):
+        return len(self.array)
+
+
+def make_url_set(mode='exact', path=None, memory_limit=DEFAULT_MEMORY_LIMIT, error_rate=DEFAULT_ERROR_RATE):
+    """按模式创建URL集合: exact（内存指纹）、disk（内存+磁盘指纹）、bloom（布隆过滤器）"""
+    if mode == 'exact':
+        return FingerprintSet()
+    if mode == 'disk':
+        return DiskFingerprintSet(path, memory_limit)
+    if mode == 'bloom':
+        return BloomFilter(memory_limit, error_rate)
+    raise ValueError(f"未知的URL集合模式: {mode}")
+
+
+def memory_report(name, url_set):
+    """输出URL集合的内存占用（每百万URL）"""
+    count = len(url_set)
+    if not count:
+        return
+    per_million = url_set.nbytes() / count * 1e6
+    logger.info(f"{name}: {count} 个URL，内存 {url_set.nbytes() / 1e6:.1f} MB "
+                f"(每百万URL {per_million / 1e6:.1f} MB)")
+
+
+def bench(total, error_rate):
+    """比较字符串集合与各种URL集合的内存占用和速度"""
+    import tempfile
+    import tracemalloc
+
+    def urls():
+        # 在统计范围内生成URL：字符串集合需要持有URL本身，指纹集合不需要
+        for i in range(total):
+            yield (f"https://developer.huawei.com/consumer/{'cn' if i % 2 else 'en'}/doc/harmonyos-references/"
+                   f"api-{i:08d}")
+
+    probes = [f"https://developer.huawei.com/consumer/cn/doc/missing-{i}" for i in range(min(total, 100000))]
+    with tempfile.TemporaryDirectory() as tmp:
+        builders = [
+            ('set[str]', set),
+            ('exact', lambda: make_url_set('exact')),
+            ('disk', lambda: make_url_set('disk', os.path.join(tmp, 'urls.fp'), memory_limit=total // 4)),
+            ('bloom', lambda: make_url_set('bloom', memory_limit=total, error_rate=error_rate)),
+        ]
+        for name, build in builders:
+            tracemalloc.start()
+            start = time.perf_counter()
+            url_set = build()
+            for url in urls():
+                url_set.add(url)
+            elapsed = time.perf_counter() - start
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            start = time.perf_counter()
+            false_positives = sum(1 for url in probes if url in url_set)
+            lookup = time.perf_counter() - start
+            logger.info(f"{name:8s}: 每百万URL {memory / total:.1f} MB，插入 {total / elapsed:,.0f} 次/秒，"
+                        f"查询 {len(probes) / lookup:,.0f} 次/秒，误判率 {false_positives / len(probes):.4%}")
+            if isinstance(url_set, DiskFingerprintSet):
+                url_set.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="URL集合工具")
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--urls', type=int, default=1000000, help="测试的URL数量")
+    parser.add_argument('--error-rate', type=float, default=DEFAULT_ERROR_RATE, help="布隆过滤器的误判率")
+    args = parser.parse_args()
+
+    bench(args.urls, args.error_rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""单页处理时限与浏览器看门狗
+
+每个页面从开始处理（预检、渲染、下载资源、保存）起有一个总的时间预算（page_deadline），
+各阶段在预算用完后不再重试、不再下载剩余资源。WebDriver的调用（例如 driver.page_source）
+在chromedriver卡死时可能永远不返回，这时协作式的检查无效：看门狗线程发现页面超出预算
+一定时间后，直接结束该抓取线程的chromedriver及浏览器进程，阻塞的调用因连接断开而返回，
+抓取线程换一个新浏览器，并把页面重新加入队列（每个页面最多重试page_attempts次）。
+共享的渲染后端（多标签页、Playwright）没有每个线程的浏览器可结束，抓取线程最多按
+剩余预算等待渲染结果，超时后由后端自行重启浏览器，并通过interrupt()同样重新排队。
+
+抓取结束时报告单页耗时的分位数（p50/p90/p99/最大值）和看门狗结束浏览器的次数。
+"""
+import logging
+import math
+import os
+import signal
+import threading
+import time
+from array import array
+
+logger = logging.getLogger("huawei_scraper")
+
+# 超出预算多久后看门狗结束浏览器（秒），留给协作式检查收尾的时间
+WATCHDOG_GRACE = 15
+# 看门狗的检查间隔（秒）
+CHECK_INTERVAL = 1.0
+
+
+def kill_process_tree(pid):
+    """结束进程及其所有子进程，优先使用psutil，否则读取/proc（仅Linux）"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            processes = process.children(recursive=True) + [process]
+        except psutil.Error:
+            return
+        for p in processes:
+            try:
+                p.kill()
+            except psutil.Error:
+                pass
+        return
+
+    children = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'r') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            os.kill(current, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(math.ceil(fraction * len(sorted_values))) - 1)]
+
+
+class PageSlot:
+    """抓取线程当前正在处理的页面"""
+
+    def __init__(self, url, driver, deadline):
+        self.url = url
+        self.driver = driver
+        self.started = time.monotonic()
+        self.deadline = deadline
+        self.killed = False
+
+
+class Watchdog:
+    """记录各抓取线程的页面处理时间，结束超出预算的浏览器"""
+
+    def __init__(self, page_deadline, grace=WATCHDOG_GRACE):
+        self.page_deadline = page_deadline
+        self.grace = grace
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.slots = set()
+        self.latencies = array('d')
+        self.kills = 0
+        self.thread = None
+        self.finished = threading.Event()
+
+    def start(self):
+        if self.page_deadline and self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="watchdog", daemon=True)
+            self.thread.start()
+
+    def begin(self, url, driver=None):
+        """当前线程开始处理页面"""
+        deadline = time.monotonic() + self.page_deadline if self.page_deadline else math.inf
+        slot = PageSlot(url, driver, deadline)
+        self.local.slot = slot
+        with self.lock:
+            self.slots.add(slot)
+        return slot
+
+    def end(self, slot):
+        """当前线程处理完页面，返回耗时"""
+        elapsed = time.monotonic() - slot.started
+        self.local.slot = None
+        with self.lock:
+            self.slots.discard(slot)
+            self.latencies.append(elapsed)
+        return elapsed
+
+    def remaining(self):
+        """当前线程的页面剩余的时间预算（秒），没有时限时为无穷大"""
+        slot = getattr(self.local, 'slot', None)
+        if slot is None:
+            return math.inf
+        return slot.deadline - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def killed(self):
+        """当前线程的浏览器是否已被看门狗结束"""
+        slot = getattr(self.local, 'slot', None)
+        return slot is not None and slot.killed
+
+    def interrupt(self):
+        """共享渲染后端等待超时后自行重启了浏览器：标记当前线程的页面为已中断，由抓取线程重新排队"""
+        slot = getattr(self.local, 'slot', None)
+        if slot is not None and not slot.killed:
+            slot.killed = True
+            with self.lock:
+                self.kills += 1
+
+    def run(self):
+        while not self.finished.wait(CHECK_INTERVAL):
+            now = time.monotonic()
+            # 在锁内结束浏览器，避免抓取线程已经开始处理下一个页面
+            with self.lock:
+                for slot in self.slots:
+                    if not slot.killed and slot.driver is not None and now > slot.deadline + self.grace:
+                        self.kill(slot)
+
+    def kill(self, slot):
+        """结束卡住的浏览器，阻塞在WebDriver调用中的抓取线程随之返回"""
+        slot.killed = True
+        self.kills += 1
+        logger.error(f"页面处理超出时限 {self.page_deadline} 秒，结束浏览器: {slot.url}")
+        try:
+            kill_process_tree(slot.driver.service.process.pid)
+        except Exception as e:
+            logger.warning(f"结束浏览器进程失败: {e}")
+
+    def stop(self):
+        self.finished.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def report(self):
+        self.stop()
+        if not self.latencies:
+            return
+        values = sorted(self.latencies)
+        logger.info(f"单页耗时: p50 {percentile(values, 0.5):.1f} 秒，p90 {percentile(values, 0.9):.1f} 秒，"
+                    f"p99 {percentile(values, 0.99):.1f} 秒，最大 {values[-1]:.1f} 秒"
+                    + (f"（时限 {self.page_deadline} 秒，看门狗结束浏览器 {self.kills} 次）" if self.page_deadline else ""))
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from huawei_doc_images import ImageOptimizer, rewrite_image_refs
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class RewriteImageRefsTest(unittest.TestCase):
+    def test_css_url_rewritten_relative_to_stylesheet(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            resources_dir = os.path.join(output_dir, "resources")
+            css_path = os.path.join(resources_dir, "css", "theme.css")
+            page_path = os.path.join(output_dir, "guide", "page.html")
+            write(css_path, ".a{background:url(../img/bg.png)} .b{background:url('../img/other.png')}")
+            write(page_path, '<img src="../resources/img/bg.png">')
+
+            count = rewrite_image_refs(output_dir, resources_dir, {"resources/img/bg.png": "resources/img/bg.webp"})
+
+            self.assertEqual(count, 2)
+            self.assertEqual(read(css_path),
+                             ".a{background:url(../img/bg.webp)} .b{background:url('../img/other.png')}")
+            self.assertEqual(read(page_path), '<img src="../resources/img/bg.webp">')
+
+
+class ImageOptimizerTest(unittest.TestCase):
+    def test_webp_originals_removed_after_css_rewritten(self):
+        try:
+            from PIL import Image
+        except ImportError:
+            self.skipTest("需要Pillow")
+        with tempfile.TemporaryDirectory() as output_dir:
+            image_path = os.path.join(output_dir, "resources", "img", "bg.png")
+            css_path = os.path.join(output_dir, "resources", "css", "theme.css")
+            os.makedirs(os.path.dirname(image_path))
+            Image.new('RGB', (64, 64), (200, 30, 30)).save(image_path, 'PNG')
+            write(css_path, ".a{background:url(../img/bg.png)}")
+
+            ImageOptimizer(output_dir, 'webp', min_bytes=0, workers=1).run()
+
+            self.assertFalse(os.path.exists(image_path))
+            self.assertEqual(read(css_path), ".a{background:url(../img/bg.webp)}")
+            self.assertTrue(os.path.exists(os.path.join(output_dir, "resources", "img", "bg.webp")))
+
+
+if __name__ == '__main__':
+    unittest.main()